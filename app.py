@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import os
-import subprocess
 from flask import Flask, request, render_template, send_file, jsonify
 from werkzeug.utils import secure_filename
 import time
+from whisper_daemon import DaemonError, WhisperDaemonClient
+from subtitles import write_srt
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
@@ -14,6 +15,9 @@ app.config['TIMEOUT'] = 3600  # 1時間のタイムアウト
 
 ALLOWED_EXTENSIONS = {'mp4', 'mp3', 'wav', 'm4a', 'avi', 'mov', 'mkv'}
 
+# 常駐Whisperデーモン（モデルを保持したままUnixソケットで文字起こしを受け付ける）
+daemon_client = WhisperDaemonClient(timeout=app.config['TIMEOUT'])
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -52,49 +56,36 @@ def transcribe():
         print(f"[INFO] モデル: {model}, 言語: {language}", flush=True)
         print(f"[INFO] Whisper処理を開始します...", flush=True)
 
-        whisper_cmd = [
-            '/Users/touharamomoko/Library/Python/3.9/bin/whisper',
-            filepath,
-            '--model', model,
-            '--language', language,
-            '--output_format', 'txt',
-            '--output_format', 'srt',
-            '--verbose', 'True',  # 詳細ログを表示
-            '-o', app.config['UPLOAD_FOLDER']
-        ]
-
-        # PATHにHomebrewのbinを追加
-        import os as os_module
-        env = os_module.environ.copy()
-        env['PATH'] = '/opt/homebrew/bin:' + env.get('PATH', '')
-
-        result = subprocess.run(whisper_cmd, check=True, capture_output=True, text=True, env=env)
-        print(f"[INFO] Whisper処理完了", flush=True)
-        if result.stdout:
-            print(f"[WHISPER OUTPUT] {result.stdout}", flush=True)
-
-        # 結果ファイル読み込み
+        # デーモンで文字起こし（セグメントはファイルを経由せず直接受け取る）
+        done, segments = daemon_client.transcribe(filepath, model=model, language=language)
+        print(f"[INFO] Whisper処理完了 ({done['processing_time']}秒)", flush=True)
+
+        # ダウンロード用にtxt/srtを書き出す
         base_output = os.path.join(app.config['UPLOAD_FOLDER'],
                                    os.path.splitext(unique_filename)[0])
         txt_file = f"{base_output}.txt"
         srt_file = f"{base_output}.srt"
 
-        result_text = ""
-        if os.path.exists(txt_file):
-            with open(txt_file, 'r', encoding='utf-8') as f:
-                result_text = f.read()
+        with open(txt_file, 'w', encoding='utf-8') as f:
+            f.write(done['text'])
+        with open(srt_file, 'w', encoding='utf-8') as f:
+            write_srt(f, segments)
 
         return jsonify({
             'success': True,
-            'text': result_text,
+            'text': done['text'],
             'txt_file': os.path.basename(txt_file),
-            'srt_file': os.path.basename(srt_file) if os.path.exists(srt_file) else None
+            'srt_file': os.path.basename(srt_file)
         })
 
-    except subprocess.CalledProcessError as e:
-        return jsonify({'error': f'文字起こしに失敗しました: {e.stderr}'}), 500
+    except DaemonError as e:
+        return jsonify({'error': f'文字起こしに失敗しました: {str(e)}'}), 500
     except Exception as e:
         return jsonify({'error': f'エラーが発生しました: {str(e)}'}), 500
+    finally:
+        # 音声ファイル削除
+        if os.path.exists(filepath):
+            os.remove(filepath)
 
 @app.route('/download/<filename>')
 def download(filename):
@@ -103,8 +94,19 @@ def download(filename):
         return send_file(filepath, as_attachment=True)
     return jsonify({'error': 'ファイルが見つかりません'}), 404
 
+@app.route('/daemon', methods=['GET'])
+def daemon_status():
+    """Whisperデーモンの状態（ロード済みモデル・ワーカー・処理件数）"""
+    try:
+        return jsonify(daemon_client.stats())
+    except DaemonError as e:
+        return jsonify({'error': str(e)}), 503
+
 if __name__ == '__main__':
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    # デーモンが起動していなければ起動（モデルはデーモン側で一度だけロードされる）
+    if os.environ.get('WERKZEUG_RUN_MAIN') != 'true' and not daemon_client.ensure_running(wait_seconds=120):
+        print("[WARN] Whisperデーモンの起動を確認できませんでした（python whisper_daemon.py で手動起動できます）", flush=True)
     print("=" * 60)
     print("Whisper文字起こしWebアプリを起動しました！")
     print("ブラウザで以下のURLにアクセスしてください：")
@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import os
-import subprocess
 import tempfile
 from flask import Flask, request, render_template, send_file, jsonify, Response, stream_with_context
 from werkzeug.utils import secure_filename
 import time
 import json
 from faster_whisper import WhisperModel
+from model_registry import ModelRegistry, models_from_env
+from batched_inference import CrossRequestBatcher, transcribe_batched
+from inference_workers import InferenceWorkerPool, workers_from_env
+from audio_decode import load_audio_input
+from subtitles import SrtWriter, format_clock
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
@@ -16,62 +20,124 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 
 ALLOWED_EXTENSIONS = {'mp4', 'mp3', 'wav', 'm4a', 'avi', 'mov', 'mkv'}
 
-# グローバル変数でモデルをキャッシュ
-cached_models = {}
+def create_model(model_name, cpu_threads=0):
+    """モデルを生成 - faster-whisper版（cpu_threads=0はCPUコア数に合わせて自動）"""
+    print(f"[INFO] モデル '{model_name}' をロード中...")
+
+    # GPU検出（CUDA, MPS, CPUの順で試す）
+    import torch
+    if torch.cuda.is_available():
+        device = "cuda"
+        compute_type = "float16"
+        print(f"[INFO] CUDA GPU検出 - GPU処理を使用")
+    elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
+        device = "cpu"  # faster-whisperはMPS非対応のためCPUフォールバック
+        compute_type = "int8"
+        print(f"[INFO] Apple Silicon検出 - 最適化されたCPU処理を使用")
+    else:
+        device = "cpu"
+        compute_type = "int8"
+        print(f"[INFO] CPU処理を使用")
+
+    model = WhisperModel(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        download_root=os.path.join(os.path.expanduser("~"), ".cache/whisper"),
+        cpu_threads=cpu_threads,
+        # ワーカープロセスでは1プロセス1ジョブのため並列デコードは不要
+        num_workers=1 if cpu_threads else 4
+    )
+    print(f"[INFO] モデル '{model_name}' のロード完了 (device={device}, compute_type={compute_type})")
+    return model
+
+# モデルレジストリ（シングルフライトロード + メモリ予算付きLRU）
+model_registry = ModelRegistry(
+    loader=create_model,
+    memory_budget_mb=int(os.environ.get('WHISPER_MODEL_MEMORY_BUDGET_MB', '4096'))
+)
+
+# 推論モード（sequential: 逐次デコード / batched: VADウィンドウをバッチ推論）
+INFERENCE_MODE = os.environ.get('WHISPER_INFERENCE_MODE', 'sequential')
+BATCH_SIZE = int(os.environ.get('WHISPER_BATCH_SIZE', '8'))
+
+# 同時リクエストのバッチを結合するスケジューラ（batchedモードのみ、プロセスごとに1つ）
+_batcher = None
+_batcher_pid = None
+
+def get_batcher():
+    global _batcher, _batcher_pid
+    if INFERENCE_MODE != 'batched':
+        return None
+    # fork後の子プロセスには親のスケジューラスレッドが引き継がれないため作り直す
+    if _batcher is None or _batcher_pid != os.getpid():
+        _batcher = CrossRequestBatcher(
+            max_batch_size=int(os.environ.get('WHISPER_MAX_BATCH_SIZE', '16')),
+            max_delay=int(os.environ.get('WHISPER_BATCH_MAX_DELAY_MS', '20')) / 1000
+        )
+        _batcher_pid = os.getpid()
+    return _batcher
 
 def load_model(model_name):
-    """モデルをロード（キャッシュ機能付き）- faster-whisper版"""
-    if model_name not in cached_models:
-        print(f"[INFO] モデル '{model_name}' をロード中...")
-
-        # GPU検出（CUDA, MPS, CPUの順で試す）
-        import torch
-        if torch.cuda.is_available():
-            device = "cuda"
-            compute_type = "float16"
-            print(f"[INFO] CUDA GPU検出 - GPU処理を使用")
-        elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-            device = "cpu"  # faster-whisperはMPS非対応のためCPUフォールバック
-            compute_type = "int8"
-            print(f"[INFO] Apple Silicon検出 - 最適化されたCPU処理を使用")
-        else:
-            device = "cpu"
-            compute_type = "int8"
-            print(f"[INFO] CPU処理を使用")
-
-        cached_models[model_name] = WhisperModel(
-            model_name,
-            device=device,
-            compute_type=compute_type,
-            download_root=os.path.join(os.path.expanduser("~"), ".cache/whisper"),
-            num_workers=4
+    """モデルをロード（キャッシュ機能付き）"""
+    return model_registry.get(model_name)
+
+def run_transcription(model, audio_path, options):
+    """
+    文字起こしを実行（リクエストスレッドと推論ワーカーで共通）
+
+    Returns:
+        (info, segments): 言語と音声長の辞書、セグメント辞書のジェネレータ
+    """
+    language = options.get('language')
+    # ffmpegのパイプ出力から直接float32配列にデコード（中間WAVを作らない）
+    audio = load_audio_input(audio_path)
+    batcher = get_batcher()
+    if batcher is not None:
+        # 前のウィンドウの文脈を使わないため、ウィンドウを並べてまとめて推論できる
+        segments, info = transcribe_batched(
+            model,
+            batcher,
+            audio,
+            batch_size=BATCH_SIZE,
+            language=language if language != 'auto' else None,
+            beam_size=1,
+            vad_filter=True,
+            vad_parameters=dict(min_silence_duration_ms=1000),
+            temperature=0.0,
+            word_timestamps=False,
+        )
+    else:
+        segments, info = model.transcribe(
+            audio,
+            language=language if language != 'auto' else None,
+            beam_size=1,
+            vad_filter=True,
+            vad_parameters=dict(min_silence_duration_ms=1000),
+            temperature=0.0,
+            condition_on_previous_text=False,
+            word_timestamps=False,
         )
-        print(f"[INFO] モデル '{model_name}' のロード完了 (device={device}, compute_type={compute_type})")
-    return cached_models[model_name]
+
+    info_dict = {'language': info.language, 'duration': info.duration}
+    return info_dict, ({'start': seg.start, 'end': seg.end, 'text': seg.text} for seg in segments)
+
+# 推論ワーカープール（WHISPER_WORKERS > 0 のときのみ、起動は __main__ で行う）
+NUM_WORKERS = workers_from_env()
+worker_pool = InferenceWorkerPool(
+    loader=create_model,
+    transcribe_fn=run_transcription,
+    num_workers=NUM_WORKERS,
+    cpu_threads=int(os.environ.get('WHISPER_CPU_THREADS', '0')) or None,
+    preload_models=models_from_env('WHISPER_WARMUP_MODELS', 'small'),
+    # CTranslate2のモデルは内部スレッドを持つためfork前にはロードせず、各ワーカーでロードする
+    preload_before_fork=False,
+    memory_budget_mb=int(os.environ.get('WHISPER_MODEL_MEMORY_BUDGET_MB', '4096'))
+) if NUM_WORKERS else None
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def convert_to_wav(input_path):
-    """音声ファイルをWAVに変換（高速化のため）"""
-    output_path = input_path.rsplit('.', 1)[0] + '_converted.wav'
-
-    # ffmpegで16kHz, モノラルに変換（Whisperに最適化）
-    cmd = [
-        'ffmpeg', '-i', input_path,
-        '-ar', '16000',  # 16kHzサンプリング
-        '-ac', '1',      # モノラル
-        '-c:a', 'pcm_s16le',  # 16bit PCM
-        '-y',            # 上書き
-        output_path
-    ]
-
-    try:
-        subprocess.run(cmd, check=True, capture_output=True)
-        return output_path
-    except:
-        return input_path  # 変換失敗時は元ファイルを使用
-
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -114,61 +180,52 @@ def transcribe():
 
             start_time = time.time()
 
-            # モデルロード
-            yield f"data: {json.dumps({'status': 'loading_model', 'progress': 20, 'message': f'モデル {model_name} をロード中...'})}\n\n"
-            model = load_model(model_name)
-            yield f"data: {json.dumps({'status': 'model_loaded', 'progress': 30, 'message': 'モデルロード完了'})}\n\n"
-
-            # 文字起こし開始
-            yield f"data: {json.dumps({'status': 'transcribing', 'progress': 40, 'message': 'Whisper処理中...'})}\n\n"
-
-            segments, info = model.transcribe(
-                filepath,
-                language=language if language != 'auto' else None,
-                beam_size=1,
-                vad_filter=True,
-                vad_parameters=dict(min_silence_duration_ms=1000),
-                temperature=0.0,
-                condition_on_previous_text=False,
-                word_timestamps=False,
-            )
-
-            # セグメントをリアルタイム処理
-            segments_list = []
-            segment_count = 0
-            for seg in segments:
-                segments_list.append({'start': seg.start, 'end': seg.end, 'text': seg.text.strip()})
-                segment_count += 1
-
-                # 10セグメントごとに進捗更新
-                if segment_count % 10 == 0:
-                    progress = min(40 + (segment_count // 10) * 5, 90)
-                    yield f"data: {json.dumps({'status': 'transcribing', 'progress': progress, 'message': f'処理中... ({segment_count}セグメント)'})}\n\n"
-
-            processing_time = time.time() - start_time
-            yield f"data: {json.dumps({'status': 'processing', 'progress': 95, 'message': 'ファイル生成中...'})}\n\n"
-
-            # 結果をファイルに保存
+            options = {'language': language}
+            if worker_pool is not None:
+                # 推論ワーカーに投入（モデルはワーカー側でロード済み）
+                yield f"data: {json.dumps({'status': 'transcribing', 'progress': 40, 'message': 'Whisper処理中（推論ワーカー）...'})}\n\n"
+                info, segments = worker_pool.transcribe(model_name, filepath, options)
+            else:
+                # モデルロード
+                yield f"data: {json.dumps({'status': 'loading_model', 'progress': 20, 'message': f'モデル {model_name} をロード中...'})}\n\n"
+                model = load_model(model_name)
+                yield f"data: {json.dumps({'status': 'model_loaded', 'progress': 30, 'message': 'モデルロード完了'})}\n\n"
+
+                # 文字起こし開始
+                yield f"data: {json.dumps({'status': 'transcribing', 'progress': 40, 'message': 'Whisper処理中...'})}\n\n"
+                info, segments = run_transcription(model, filepath, options)
+
+            # 結果ファイルはセグメントが確定するたびに追記
             base_output = os.path.join(app.config['UPLOAD_FOLDER'], os.path.splitext(unique_filename)[0])
-            full_text = "".join([segment['text'] for segment in segments_list])
-
-            # テキストファイル保存
             txt_file = f"{base_output}.txt"
-            with open(txt_file, 'w', encoding='utf-8') as f:
-                f.write(full_text)
-
-            # SRTファイル保存
             srt_file = f"{base_output}.srt"
-            with open(srt_file, 'w', encoding='utf-8') as f:
-                for i, segment in enumerate(segments_list, 1):
-                    start = segment['start']
-                    end = segment['end']
-                    text = segment['text']
-
-                    start_time = f"{int(start//3600):02d}:{int((start%3600)//60):02d}:{int(start%60):02d},{int((start%1)*1000):03d}"
-                    end_time = f"{int(end//3600):02d}:{int((end%3600)//60):02d}:{int(end%60):02d},{int((end%1)*1000):03d}"
+            duration = info['duration'] or 0
+
+            # セグメントをデコードされ次第1件ずつ送信（進捗は音声上の位置から算出）
+            texts = []
+            with open(txt_file, 'w', encoding='utf-8') as txt_f, open(srt_file, 'w', encoding='utf-8') as srt_f:
+                srt_writer = SrtWriter(srt_f)
+                for i, seg in enumerate(segments, 1):
+                    text = seg['text'].strip()
+                    texts.append(text)
+
+                    txt_f.write(text)
+                    txt_f.flush()
+                    srt_writer.write(seg['start'], seg['end'], text)
+                    srt_f.flush()
+
+                    ratio = min(seg['end'] / duration, 1.0) if duration else 0.0
+                    progress = 40 + int(ratio * 55)
+                    event = {
+                        'status': 'segment',
+                        'progress': progress,
+                        'message': f'処理中... {format_clock(seg["end"])} / {format_clock(duration)}',
+                        'segment': {'index': i, 'start': seg['start'], 'end': seg['end'], 'text': text}
+                    }
+                    yield f"data: {json.dumps(event)}\n\n"
 
-                    f.write(f"{i}\n{start_time} --> {end_time}\n{text}\n\n")
+            processing_time = time.time() - start_time
+            full_text = "".join(texts)
 
             # 音声ファイル削除
             if os.path.exists(filepath):
@@ -183,7 +240,7 @@ def transcribe():
                 'txt_file': os.path.basename(txt_file),
                 'srt_file': os.path.basename(srt_file),
                 'processing_time': f"{processing_time:.1f}秒",
-                'language_detected': info.language if info else 'unknown'
+                'language_detected': info['language'] or 'unknown'
             }
             yield f"data: {json.dumps(result)}\n\n"
 
@@ -212,9 +269,27 @@ def preload():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/models', methods=['GET'])
+def models():
+    """ロード済みモデルとキャッシュ統計"""
+    stats = model_registry.stats()
+    stats['inference_mode'] = INFERENCE_MODE
+    if worker_pool is not None:
+        stats['workers'] = worker_pool.stats()
+    elif get_batcher() is not None:
+        stats['batcher'] = get_batcher().stats()
+    return jsonify(stats)
+
 if __name__ == '__main__':
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+    if worker_pool is not None:
+        # ワーカーモードではリローダーを使わない（モデルの二重ロードを防ぐ）
+        worker_pool.start()
+    elif os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # 起動時ウォームアップ（デバッグリローダーの親プロセスではロードしない）
+        model_registry.warmup_async(models_from_env('WHISPER_WARMUP_MODELS', 'small'))
+
     # 起動メッセージ
     # GPU検出情報を表示
     try:
@@ -232,7 +307,15 @@ if __name__ == '__main__':
     print("- モデル: small（デフォルト、速度と精度の最適バランス）")
     print("- beam_size: 1（最速設定）")
     print("- VADフィルタ: 有効（無音スキップ）")
+    if INFERENCE_MODE == 'batched':
+        print(f"- 推論モード: batched（batch_size={BATCH_SIZE}, 同時リクエストのバッチを結合）")
+    else:
+        print("- 推論モード: sequential（WHISPER_INFERENCE_MODE=batched でバッチ推論）")
     print("- 不要な処理: 全て削除")
+    if worker_pool is not None:
+        print(f"- 推論ワーカー: {NUM_WORKERS}プロセス（cpu_threads={worker_pool.cpu_threads}）")
+    else:
+        print("- 推論ワーカー: なし（WHISPER_WORKERS=N でプロセス並列）")
 
     if gpu_available:
         print("- GPU: CUDA GPU検出 - 超高速処理モード")
@@ -260,4 +343,4 @@ if __name__ == '__main__':
     print("http://localhost:8081")
     print("=" * 60)
 
-    app.run(debug=True, host='0.0.0.0', port=8081)
+    app.run(debug=True, host='0.0.0.0', port=8081, use_reloader=worker_pool is None)
@@ -10,6 +10,10 @@ import json
 from flask import Flask, request, render_template, send_file, jsonify, Response, stream_with_context
 from werkzeug.utils import secure_filename
 from lightning_whisper_mlx import LightningWhisperMLX
+from model_registry import ModelRegistry, models_from_env
+from inference_workers import InferenceWorkerPool, workers_from_env
+from audio_decode import load_audio_input
+from subtitles import write_srt
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
@@ -18,12 +22,9 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 
 ALLOWED_EXTENSIONS = {'mp4', 'mp3', 'wav', 'm4a', 'avi', 'mov', 'mkv'}
 
-# グローバル変数でモデルをキャッシュ
-cached_models = {}
-
-def load_model(model_name):
+def create_model(model_name, cpu_threads=0):
     """
-    Lightning Whisper MLXモデルをロード（Apple Silicon GPU使用）
+    Lightning Whisper MLXモデルを生成（Apple Silicon GPU使用、cpu_threadsは未使用）
 
     対応モデル:
     - tiny: 最速、精度は低い
@@ -34,35 +35,90 @@ def load_model(model_name):
     - large-v3: 最高精度
     - distil-large-v3: large-v3並の精度で高速
     """
-    if model_name not in cached_models:
-        print(f"[INFO] モデル '{model_name}' をMLX GPU でロード中...")
-        print(f"[INFO] Apple Silicon GPU (Metal) を使用します")
+    print(f"[INFO] モデル '{model_name}' をMLX GPU でロード中...")
+    print(f"[INFO] Apple Silicon GPU (Metal) を使用します")
+
+    start_time = time.time()
+
+    # Lightning Whisper MLX - 自動的にApple Silicon GPUを使用
+    model = LightningWhisperMLX(
+        model=model_name,
+        batch_size=12,  # 最適なバッチサイズ
+        quant=None      # フル精度（品質重視）、"8bit"で2倍高速化可能
+    )
 
-        start_time = time.time()
+    load_time = time.time() - start_time
+    print(f"[INFO] モデルロード完了 ({load_time:.1f}秒) - GPU処理準備完了")
 
-        # Lightning Whisper MLX - 自動的にApple Silicon GPUを使用
-        cached_models[model_name] = LightningWhisperMLX(
-            model=model_name,
-            batch_size=12,  # 最適なバッチサイズ
-            quant=None      # フル精度（品質重視）、"8bit"で2倍高速化可能
-        )
+    return model
 
-        load_time = time.time() - start_time
-        print(f"[INFO] モデルロード完了 ({load_time:.1f}秒) - GPU処理準備完了")
+# モデルレジストリ（シングルフライトロード + メモリ予算付きLRU）
+model_registry = ModelRegistry(
+    loader=create_model,
+    memory_budget_mb=int(os.environ.get('WHISPER_MODEL_MEMORY_BUDGET_MB', '8192'))
+)
+
+def load_model(model_name):
+    """モデルをロード（キャッシュ機能付き）"""
+    return model_registry.get(model_name)
+
+def normalize_segment(segment):
+    """Lightning Whisper MLXのセグメント（辞書または[start, end, text]）を辞書に変換"""
+    if isinstance(segment, dict):
+        start = segment.get('start', 0)
+        end = segment.get('end', 0)
+        text = segment.get('text', '')
+    elif isinstance(segment, (list, tuple)) and len(segment) >= 3:
+        start, end, text = segment[0], segment[1], segment[2]
+    else:
+        return None
+    return {'start': start, 'end': end, 'text': text if isinstance(text, str) else str(text)}
+
+def run_transcription(model, audio_path, options):
+    """
+    文字起こしを実行（リクエストスレッドと推論ワーカーで共通）
 
-    return cached_models[model_name]
+    Returns:
+        (info, segments): 言語・全文の辞書、セグメント辞書のリスト
+    """
+    # Lightning Whisper MLXで処理（自動的にGPU使用）
+    # 配列を渡すとMLX側のffmpeg呼び出し（全量をメモリに読み込む）を省ける
+    result = model.transcribe(audio_path=load_audio_input(audio_path))
+
+    # 結果の取得（Lightning Whisper MLXの形式に対応）
+    if isinstance(result, dict):
+        full_text = result.get('text', '')
+        raw_segments = result.get('segments', [])
+        detected_language = result.get('language', options.get('language'))
+    elif isinstance(result, str):
+        # 文字列のみが返された場合
+        full_text = result
+        raw_segments = []
+        detected_language = options.get('language')
+    else:
+        # その他の形式
+        full_text = str(result)
+        raw_segments = []
+        detected_language = options.get('language')
+
+    segments = [seg for seg in map(normalize_segment, raw_segments) if seg is not None]
+    return {'language': detected_language, 'text': full_text}, segments
+
+# 推論ワーカープール（WHISPER_WORKERS > 0 のときのみ、起動は __main__ で行う）
+# Metalの状態はforkで引き継げないためspawnで起動し、各ワーカーがモデルをロードする
+NUM_WORKERS = workers_from_env()
+worker_pool = InferenceWorkerPool(
+    loader=create_model,
+    transcribe_fn=run_transcription,
+    num_workers=NUM_WORKERS,
+    preload_models=models_from_env('WHISPER_WARMUP_MODELS', 'small'),
+    start_method='spawn',
+    memory_budget_mb=int(os.environ.get('WHISPER_MODEL_MEMORY_BUDGET_MB', '8192'))
+) if NUM_WORKERS else None
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def format_srt_time(seconds):
-    """秒数をSRT形式の時間に変換"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
-
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -105,39 +161,31 @@ def transcribe():
 
             start_time = time.time()
 
-            # モデルロード
-            yield f"data: {json.dumps({'status': 'loading_model', 'progress': 20, 'message': f'モデル {model_name} をGPUでロード中...'})}\n\n"
-            model = load_model(model_name)
-            yield f"data: {json.dumps({'status': 'model_loaded', 'progress': 30, 'message': 'GPU処理準備完了'})}\n\n"
-
-            # 文字起こし開始
-            yield f"data: {json.dumps({'status': 'transcribing', 'progress': 40, 'message': 'GPU処理中（Metal高速化）...'})}\n\n"
+            options = {'language': language}
+            if worker_pool is not None:
+                # 推論ワーカーに投入（モデルはワーカー側でロード済み）
+                yield f"data: {json.dumps({'status': 'transcribing', 'progress': 40, 'message': 'GPU処理中（推論ワーカー）...'})}\n\n"
+                info, segments = worker_pool.transcribe(model_name, filepath, options)
+                segments = list(segments)
+            else:
+                # モデルロード
+                yield f"data: {json.dumps({'status': 'loading_model', 'progress': 20, 'message': f'モデル {model_name} をGPUでロード中...'})}\n\n"
+                model = load_model(model_name)
+                yield f"data: {json.dumps({'status': 'model_loaded', 'progress': 30, 'message': 'GPU処理準備完了'})}\n\n"
 
-            print(f"[INFO] GPU処理開始: {filepath}", flush=True)
+                # 文字起こし開始
+                yield f"data: {json.dumps({'status': 'transcribing', 'progress': 40, 'message': 'GPU処理中（Metal高速化）...'})}\n\n"
 
-            # Lightning Whisper MLXで処理（自動的にGPU使用）
-            result = model.transcribe(audio_path=filepath)
+                print(f"[INFO] GPU処理開始: {filepath}", flush=True)
+                info, segments = run_transcription(model, filepath, options)
 
             processing_time = time.time() - start_time
             print(f"[INFO] GPU処理完了 ({processing_time:.1f}秒)", flush=True)
 
             yield f"data: {json.dumps({'status': 'processing', 'progress': 90, 'message': 'ファイル生成中...'})}\n\n"
 
-            # 結果の取得（Lightning Whisper MLXの形式に対応）
-            if isinstance(result, dict):
-                full_text = result.get('text', '')
-                segments = result.get('segments', [])
-                detected_language = result.get('language', language)
-            elif isinstance(result, str):
-                # 文字列のみが返された場合
-                full_text = result
-                segments = []
-                detected_language = language
-            else:
-                # その他の形式
-                full_text = str(result)
-                segments = []
-                detected_language = language
+            full_text = info['text']
+            detected_language = info['language']
 
             # 結果をファイルに保存
             base_output = os.path.join(app.config['UPLOAD_FOLDER'], os.path.splitext(unique_filename)[0])
@@ -150,27 +198,8 @@ def transcribe():
             # SRTファイル保存
             srt_file = f"{base_output}.srt"
             with open(srt_file, 'w', encoding='utf-8') as f:
-                if segments:
-                    for i, segment in enumerate(segments, 1):
-                        # segmentが辞書かリストかを確認
-                        if isinstance(segment, dict):
-                            start = segment.get('start', 0)
-                            end = segment.get('end', 0)
-                            text = segment.get('text', '').strip()
-                        elif isinstance(segment, (list, tuple)) and len(segment) >= 3:
-                            # [start, end, text] 形式
-                            start, end, text = segment[0], segment[1], segment[2]
-                            text = text.strip() if isinstance(text, str) else str(text)
-                        else:
-                            continue
-
-                        if text:  # 空でないセグメントのみ保存
-                            start_time_str = format_srt_time(start)
-                            end_time_str = format_srt_time(end)
-
-                            f.write(f"{i}\n{start_time_str} --> {end_time_str}\n{text}\n\n")
-                else:
-                    # セグメント情報がない場合は全文のみ
+                # 空でないセグメントのみ保存し、セグメント情報がない場合は全文のみ
+                if not write_srt(f, segments or []):
                     f.write(f"1\n00:00:00,000 --> 99:99:99,999\n{full_text}\n\n")
 
             # 音声ファイル削除
@@ -216,9 +245,24 @@ def preload():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/models', methods=['GET'])
+def models():
+    """ロード済みモデルとキャッシュ統計"""
+    stats = model_registry.stats()
+    if worker_pool is not None:
+        stats['workers'] = worker_pool.stats()
+    return jsonify(stats)
+
 if __name__ == '__main__':
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+    if worker_pool is not None:
+        # ワーカーモードではリローダーを使わない（モデルの二重ロードを防ぐ）
+        worker_pool.start()
+    elif os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # 起動時ウォームアップ（デバッグリローダーの親プロセスではロードしない）
+        model_registry.warmup_async(models_from_env('WHISPER_WARMUP_MODELS', 'small'))
+
     # GPU情報表示
     try:
         import mlx.core as mx
@@ -241,6 +285,8 @@ if __name__ == '__main__':
     print("- モデル: small（デフォルト、日本語最適）")
     print("- バッチサイズ: 12")
     print("- 量子化: None（最高品質）")
+    if worker_pool is not None:
+        print(f"- 推論ワーカー: {NUM_WORKERS}プロセス")
     print("=" * 60)
     print("【期待される性能（Apple M2 GPU使用時）】")
     print("- 18分の音声: 約25-40秒 ★GPU高速化★")
@@ -253,4 +299,4 @@ if __name__ == '__main__':
     print("http://localhost:8081")
     print("=" * 60)
 
-    app.run(debug=True, host='0.0.0.0', port=8081)
+    app.run(debug=True, host='0.0.0.0', port=8081, use_reloader=worker_pool is None)
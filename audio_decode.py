@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ffmpegのパイプ出力から直接NumPy配列へデコード（app_fast.py / app_mlx.py 共通）
+
+- デコード本体は backend/app/infrastructure/audio.py の decode_to_array を共用する
+  （ffmpegの標準出力から16kHzモノラルのPCMを固定サイズのチャンクで読み、
+  事前確保した float32 バッファにその場で変換して書き込む。標準エラーは並行して読み捨てる）
+- ffprobeで求めた長さを渡してバッファを一度で確保する
+- 中間WAVファイルはディスクに書かない（Whisperエンジンには配列をそのまま渡す）
+"""
+import os
+import subprocess
+
+from backend_shared import load_backend_module
+
+_audio = load_backend_module('infrastructure', 'audio')
+
+SAMPLE_RATE = 16000
+
+AudioDecodeError = _audio.AudioToolError
+ffmpeg_available = _audio.ffmpeg_available
+
+
+def probe_duration(path):
+    """ffprobeで音声の長さ（秒）を取得。取得できなければ None"""
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error',
+             '-show_entries', 'format=duration',
+             '-of', 'default=noprint_wrappers=1:nokey=1',
+             path],
+            check=True, capture_output=True, text=True
+        )
+        return float(result.stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def decode_audio(path, sample_rate=SAMPLE_RATE):
+    """
+    音声ファイルを16kHzモノラルの float32 配列（-1.0〜1.0）にデコード
+
+    Raises:
+        AudioDecodeError: ffmpegがない、またはデコードに失敗した場合
+    """
+    return _audio.decode_to_array(path, duration=probe_duration(path), sample_rate=sample_rate)
+
+
+def load_audio_input(path):
+    """
+    エンジンに渡す音声入力を用意
+
+    ffmpegがあればパイプでデコードした配列、なければファイルパスをそのまま返す
+    （その場合はエンジン側でデコードする）
+    """
+    if not ffmpeg_available():
+        return path
+    try:
+        return decode_audio(path)
+    except AudioDecodeError as e:
+        print(f"[WARN] パイプデコードに失敗したためファイルを直接渡します: {os.path.basename(path)}: {e}", flush=True)
+        return path
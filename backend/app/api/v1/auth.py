@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends
-from app.core.security import get_current_user
+from app.core.security import get_current_user_strict
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.get("/me")
-async def get_me(current_user=Depends(get_current_user)):
+async def get_me(current_user=Depends(get_current_user_strict)):
     """Get current user information."""
     return {
         "id": str(current_user.id),
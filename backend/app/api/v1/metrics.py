@@ -0,0 +1,43 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.config import settings
+from app.core.metrics import MetricsRegistry, get_metrics_registry
+
+router = APIRouter()
+
+# Prometheusのテキスト形式
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics_auth = HTTPBearer(auto_error=False)
+
+
+async def verify_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_auth)
+) -> None:
+    """
+    Require the configured bearer token when METRICS_TOKEN is set.
+
+    Raises:
+        HTTPException: If the token is missing or does not match
+    """
+    if not settings.METRICS_TOKEN:
+        return
+    # タイミング差でトークンを推測されないよう定数時間で比較する
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="メトリクスの取得には認証が必要です",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(verify_metrics_token)])
+async def metrics(registry: MetricsRegistry = Depends(get_metrics_registry)):
+    """Per-stage latency histograms, counters and gauges in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
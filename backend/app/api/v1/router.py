@@ -2,9 +2,13 @@ from fastapi import APIRouter
 from app.api.v1.health import router as health_router
 from app.api.v1.auth import router as auth_router
 from app.api.v1.transcriptions import router as transcriptions_router
+from app.api.v1.uploads import router as uploads_router
+from app.api.v1.metrics import router as metrics_router
 
 router = APIRouter()
 
 router.include_router(health_router, tags=["health"])
 router.include_router(auth_router)
 router.include_router(transcriptions_router)
+router.include_router(uploads_router)
+router.include_router(metrics_router, tags=["metrics"])
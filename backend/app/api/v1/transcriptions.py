@@ -1,83 +1,237 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
-from typing import Optional
-from app.core.security import get_current_user
+import hashlib
+import json
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Literal, Optional
+from app.core.config import settings
+from app.core.security import get_current_user, get_current_user_strict
+from app.services.engine_router import EngineRouter, get_engine_router
+from app.services.export_service import EXPORT_FORMATS, ExportCache, get_export_cache, stream_export
 from app.services.file_service import get_file_service, FileService
-from app.services.transcription_service import TranscriptionService
-from app.infrastructure.openai_client import get_whisper_client
+from app.services.job_service import get_job_queue, JobQueue, JobStatus, TranscriptionJob
+from app.services.progress_service import ProgressBroker, get_progress_broker
+from app.services.transcription_service import TranscriptionService, get_transcription_service
 
 router = APIRouter(prefix="/transcriptions", tags=["transcriptions"])
 
 
-def get_transcription_service():
-    """Dependency to get transcription service."""
-    return TranscriptionService(whisper_client=get_whisper_client())
+# 本文はエンドポイント内でストリーミング解析するため、フォームの形式はドキュメント用に別途記述する
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "language": {"type": "string"},
+                        "title": {"type": "string"},
+                        "engine": {"type": "string"},
+                        "latency_budget_seconds": {"type": "number", "exclusiveMinimum": 0},
+                    },
+                }
+            }
+        },
+    }
+}
 
 
-@router.post("")
+def _parse_latency_budget(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        budget = float(value)
+    except ValueError:
+        budget = 0.0
+    if not budget > 0:
+        raise HTTPException(status_code=400, detail="latency_budget_seconds は正の数で指定してください")
+    return budget
+
+
+@router.post("", status_code=202, openapi_extra=UPLOAD_FORM_SCHEMA)
 async def create_transcription(
-    file: UploadFile = File(...),
-    language: Optional[str] = Form(None),
-    title: Optional[str] = Form(None),
+    request: Request,
     current_user=Depends(get_current_user),
+    engine_router: EngineRouter = Depends(get_engine_router),
     file_service: FileService = Depends(get_file_service),
-    transcription_service: TranscriptionService = Depends(get_transcription_service)
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
     """
-    Create a new transcription from uploaded audio file.
+    Queue a new transcription job for an uploaded audio file.
+
+    Returns immediately with the job; follow `GET /transcriptions/jobs/{job_id}/events`
+    (or poll `GET /transcriptions/jobs/{job_id}`) for progress and the
+    resulting transcription id.
 
     - **file**: Audio file (mp3, mp4, wav, m4a, webm, etc.)
     - **language**: Language code (ja, en, etc.) or None for auto-detect
     - **title**: Custom title or None to use filename
+    - **engine**: Transcription engine (openai, faster_whisper, mlx) or None to route automatically
+    - **latency_budget_seconds**: How long you are willing to wait; short budgets favour faster engines
+
+    The multipart body is parsed as it arrives, so oversized uploads are
+    cut off at the size limit. Responds 429 when the user already has the
+    maximum number of jobs queued or running, and 503 when the queue is
+    full; both set `Retry-After`.
     """
-    # ファイル検証（拡張子・サイズ）
-    file_service.validate_audio_file(file)
+    # キューの空きとユーザーごとの上限をアップロード受信前に確認（429 / 503 + Retry-After）
+    job_queue.check_admission(str(current_user.id))
 
-    # ファイル内容を読み込み
-    content = await file.read()
+    # 本文を受信しながら一時ファイルへ保存（拡張子・マジックナンバー・サイズ・ハッシュを同時に検証・計算）
+    received = await file_service.ingest_multipart(request)
+    upload, fields = received.upload, received.fields
 
-    # ファイル内容検証（マジックナンバー）
-    file_service.validate_file_content(content)
+    try:
+        engine = fields.get("engine") or None
+        latency_budget = _parse_latency_budget(fields.get("latency_budget_seconds"))
+        if engine and engine not in {available.name for available in engine_router.registry.available()}:
+            raise HTTPException(status_code=400, detail=f"利用できないエンジンです: {engine}")
+    except HTTPException:
+        upload.discard()
+        raise
 
-    # ファイル名をサニタイズ
-    safe_filename = file_service.sanitize_filename(file.filename or "audio")
+    # ジョブ登録（一時ファイルの所有権はジョブへ移る）
+    job = await job_queue.submit(
+        audio_path=upload.path,
+        filename=received.filename,
+        user_id=str(current_user.id),
+        language=fields.get("language") or None,
+        title=fields.get("title") or None,
+        audio_sha256=upload.sha256,
+        engine=engine,
+        latency_budget=latency_budget
+    )
 
-    # ファイルポインタをリセット
-    await file.seek(0)
+    return job.to_dict()
+
+
+@router.get("/jobs")
+async def list_jobs(
+    status: Optional[JobStatus] = None,
+    current_user=Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Get the user's transcription jobs, newest first."""
+    jobs = job_queue.list_jobs(user_id=str(current_user.id), status=status)
+    return {"items": [job.to_dict() for job in jobs], "total": len(jobs)}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    current_user=Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Get status and timings of a transcription job."""
+    job = job_queue.get_job(job_id=job_id, user_id=str(current_user.id))
+
+    if not job:
+        raise HTTPException(status_code=404, detail="ジョブが見つかりません")
+
+    return job.to_dict()
 
-    try:
-        # 文字起こし実行
-        result = await transcription_service.transcribe_and_save(
-            audio_file=file.file,
-            filename=safe_filename,
-            user_id=str(current_user.id),
-            language=language,
-            title=title
-        )
 
-        return result
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"文字起こしに失敗しました: {str(e)}"
-        )
+
+async def _job_events(job: TranscriptionJob, broker: ProgressBroker) -> AsyncIterator[str]:
+    # 購読してから現在の状態を送ることで、その間に終わったジョブも取りこぼさない
+    async with broker.subscribe(job.id) as subscription:
+        yield f"retry: {int(settings.PROGRESS_KEEPALIVE_SECONDS * 1000)}\n"
+        yield _sse("job", job.to_dict())
+        if job.is_finished:
+            return
+
+        while True:
+            event = await subscription.get(timeout=settings.PROGRESS_KEEPALIVE_SECONDS)
+            if event is None:
+                # プロキシに接続を切られないよう定期的にコメント行を送る
+                yield ": keepalive\n\n"
+                continue
+            if event.get("final"):
+                yield _sse("done", job.to_dict())
+                return
+            yield _sse("progress", event)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    current_user=Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue),
+    broker: ProgressBroker = Depends(get_progress_broker)
+):
+    """
+    Stream progress of a transcription job as server-sent events.
+
+    - `job`: current job state, sent first
+    - `progress`: stage, chunks done / total, audio seconds processed and ETA
+    - `done`: final job state with `transcription_id` or `error`; the stream ends after it
+
+    The job keeps running if the client disconnects; reconnect instead of
+    submitting the audio again.
+    """
+    job = job_queue.get_job(job_id=job_id, user_id=str(current_user.id))
+
+    if not job:
+        raise HTTPException(status_code=404, detail="ジョブが見つかりません")
+
+    return StreamingResponse(
+        _job_events(job, broker),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("")
 async def list_transcriptions(
-    page: int = 1,
-    per_page: int = 20,
+    cursor: Optional[str] = None,
+    per_page: int = Query(20, ge=1, le=100),
     current_user=Depends(get_current_user),
     transcription_service: TranscriptionService = Depends(get_transcription_service)
 ):
-    """Get paginated list of user's transcriptions."""
+    """
+    Get paginated list of user's transcriptions (summary columns only).
+
+    - **cursor**: `next_cursor` from the previous page, or None for the first page
+    - **per_page**: Number of items per page (1-100)
+    """
     return await transcription_service.get_user_transcriptions(
         user_id=str(current_user.id),
-        page=page,
+        cursor=cursor,
         per_page=per_page
     )
 
 
+@router.get("/search")
+async def search_transcriptions(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user=Depends(get_current_user),
+    transcription_service: TranscriptionService = Depends(get_transcription_service)
+):
+    """
+    Search the user's transcriptions.
+
+    - **q**: Search query (Japanese supported; `OR` and `-word` are allowed)
+    - **limit**: Maximum number of transcriptions (1-100)
+    - **offset**: Number of results to skip
+
+    Each item includes `hits`, the matching segments with `start`/`end`.
+    """
+    return await transcription_service.search_transcriptions(
+        user_id=str(current_user.id),
+        query=q,
+        limit=limit,
+        offset=offset
+    )
+
+
 @router.get("/{transcription_id}")
 async def get_transcription(
     transcription_id: str,
@@ -96,10 +250,85 @@ async def get_transcription(
     return result
 
 
+@router.get("/{transcription_id}/segments")
+async def get_transcription_segments(
+    transcription_id: str,
+    start: float = Query(0.0, alias="from", ge=0),
+    end: Optional[float] = Query(None, alias="to", ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user=Depends(get_current_user),
+    transcription_service: TranscriptionService = Depends(get_transcription_service)
+):
+    """
+    Get the segments of a transcription that overlap a time window.
+
+    - **from**: Window start in seconds
+    - **to**: Window end in seconds, or None for the end of the audio
+    - **limit**: Maximum number of segments; `next_from` is set when more remain
+    """
+    result = await transcription_service.get_segments(
+        transcription_id=transcription_id,
+        user_id=str(current_user.id),
+        start=start,
+        end=end,
+        limit=limit
+    )
+
+    if not result:
+        raise HTTPException(status_code=404, detail="文字起こしが見つかりません")
+
+    return result
+
+
+@router.get("/{transcription_id}/export")
+async def export_transcription(
+    transcription_id: str,
+    format: Literal["srt", "vtt", "txt", "json"] = Query("srt"),
+    if_none_match: Optional[str] = Header(None),
+    current_user=Depends(get_current_user),
+    transcription_service: TranscriptionService = Depends(get_transcription_service),
+    export_cache: ExportCache = Depends(get_export_cache)
+):
+    """
+    Download a transcription as subtitles or text.
+
+    - **format**: srt, vtt, txt (one line per segment) or json (record with segments)
+
+    The output is streamed while it is rendered; renderings are cached per
+    `updated_at`, and `ETag` / `If-None-Match` let clients skip unchanged downloads.
+    """
+    user_id = str(current_user.id)
+    meta = await transcription_service.get_cache_meta(transcription_id, user_id)
+    if not meta:
+        raise HTTPException(status_code=404, detail="文字起こしが見つかりません")
+
+    updated_at = meta.get("updated_at") or ""
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"{meta.get('title') or transcription_id}.{extension}"
+    etag = '"' + hashlib.sha1(f"{transcription_id}:{updated_at}:{format}".encode()).hexdigest()[:20] + '"'
+    headers = {
+        "ETag": etag,
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+    }
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+
+    # 同じ版のレンダリング結果があればそのまま返す
+    cached = export_cache.get((transcription_id, updated_at, format))
+    if cached is not None:
+        return Response(content=cached, media_type=media_type, headers=headers)
+
+    record = await transcription_service.get_export_record(transcription_id, user_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="文字起こしが見つかりません")
+
+    return StreamingResponse(stream_export(record, format, export_cache), media_type=media_type, headers=headers)
+
+
 @router.delete("/{transcription_id}")
 async def delete_transcription(
     transcription_id: str,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_current_user_strict),
     transcription_service: TranscriptionService = Depends(get_transcription_service)
 ):
     """Delete a transcription."""
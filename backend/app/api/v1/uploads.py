@@ -0,0 +1,112 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from app.core.security import get_current_user
+from app.domain.schemas import UploadSessionCreate
+from app.services.engine_router import EngineRouter, get_engine_router
+from app.services.upload_service import UploadService, UploadSession, get_upload_service
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+
+async def _get_owned_session(upload_id: str, current_user, upload_service: UploadService) -> UploadSession:
+    session = await upload_service.get_session(upload_id=upload_id, user_id=str(current_user.id))
+    if not session:
+        raise HTTPException(status_code=404, detail="アップロードが見つかりません")
+    return session
+
+
+@router.post("", status_code=201)
+async def create_upload(
+    body: UploadSessionCreate,
+    current_user=Depends(get_current_user),
+    engine_router: EngineRouter = Depends(get_engine_router),
+    upload_service: UploadService = Depends(get_upload_service)
+):
+    """
+    Start a resumable upload.
+
+    Send the file as `total_parts` parts of `part_size` bytes with
+    `PUT /uploads/{id}/parts/{n}` (n = 1..total_parts, in any order and in
+    parallel), then call `POST /uploads/{id}/complete`. After a dropped
+    connection, `GET /uploads/{id}` lists the parts still missing.
+
+    - **filename**: Original filename
+    - **size**: Total size in bytes
+    - **part_size**: Bytes per part (1-64MB), or None for the server default
+    - **language**, **title**, **engine**, **latency_budget_seconds**: As for `POST /transcriptions`
+    """
+    # 明示的に指定されたエンジンはアップロード前に検証
+    if body.engine and body.engine not in {available.name for available in engine_router.registry.available()}:
+        raise HTTPException(status_code=400, detail=f"利用できないエンジンです: {body.engine}")
+
+    session = await upload_service.create_session(
+        user_id=str(current_user.id),
+        filename=body.filename,
+        size=body.size,
+        part_size=body.part_size,
+        language=body.language,
+        title=body.title,
+        engine=body.engine,
+        latency_budget=body.latency_budget_seconds
+    )
+    return session.to_dict(received=[])
+
+
+@router.get("/{upload_id}")
+async def get_upload(
+    upload_id: str,
+    current_user=Depends(get_current_user),
+    upload_service: UploadService = Depends(get_upload_service)
+):
+    """Get an upload with the parts received so far and those still missing."""
+    session = await _get_owned_session(upload_id, current_user, upload_service)
+    return session.to_dict(received=await upload_service.received_parts(session))
+
+
+@router.put("/{upload_id}/parts/{part_number}")
+async def put_upload_part(
+    upload_id: str,
+    part_number: int,
+    request: Request,
+    x_part_sha256: Optional[str] = Header(None),
+    current_user=Depends(get_current_user),
+    upload_service: UploadService = Depends(get_upload_service)
+):
+    """
+    Upload one part as the raw request body. Re-sending a part replaces it.
+
+    - **X-Part-SHA256**: Optional hex SHA-256 of the part, verified before it is stored
+    """
+    session = await _get_owned_session(upload_id, current_user, upload_service)
+    return await upload_service.put_part(session, part_number, request.stream(), sha256=x_part_sha256)
+
+
+@router.post("/{upload_id}/complete", status_code=202)
+async def complete_upload(
+    upload_id: str,
+    current_user=Depends(get_current_user),
+    upload_service: UploadService = Depends(get_upload_service)
+):
+    """
+    Assemble the parts and queue the transcription.
+
+    Returns the job like `POST /transcriptions`; the transcription is saved
+    with the upload id as its id.
+    """
+    session = await _get_owned_session(upload_id, current_user, upload_service)
+    job = await upload_service.complete(session)
+    return job.to_dict()
+
+
+@router.delete("/{upload_id}")
+async def abort_upload(
+    upload_id: str,
+    current_user=Depends(get_current_user),
+    upload_service: UploadService = Depends(get_upload_service)
+):
+    """Cancel an upload and delete its stored parts. Allowed until it completes, or after its job failed."""
+    session = await _get_owned_session(upload_id, current_user, upload_service)
+    if not upload_service.can_abort(session):
+        raise HTTPException(status_code=409, detail="このアップロードは完了済みです")
+    await upload_service.abort(session)
+    return {"message": "削除しました"}
@@ -19,9 +19,98 @@ class Settings(BaseSettings):
     SUPABASE_URL: str = ""
     SUPABASE_ANON_KEY: str = ""
     SUPABASE_SERVICE_KEY: str = ""
+    SUPABASE_JWT_SECRET: str = ""  # 空の場合はJWKS（非対称鍵）またはSupabase Authで検証
+    SUPABASE_TIMEOUT_SECONDS: float = 30.0
+    SUPABASE_MAX_CONNECTIONS: int = 100
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+
+    # Auth settings
+    JWT_AUDIENCE: str = "authenticated"
+    AUTH_CACHE_MAX_ENTRIES: int = 1024
+    AUTH_CACHE_TTL_SECONDS: int = 300
 
     # OpenAI settings
     OPENAI_API_KEY: str = ""
+    OPENAI_REQUESTS_PER_MINUTE: float = 50.0  # アカウントのレート制限（RPM）に合わせる。0 = 制限なし
+    OPENAI_REQUEST_BURST: int = 5
+    OPENAI_MAX_RETRIES: int = 4
+    OPENAI_RETRY_BASE_SECONDS: float = 1.0
+    OPENAI_RETRY_MAX_SECONDS: float = 60.0
+
+    # Transcription job queue settings
+    TRANSCRIPTION_WORKERS: int = 4
+    TRANSCRIPTION_QUEUE_SIZE: int = 100
+    TRANSCRIPTION_JOB_RETENTION: int = 1000
+    TRANSCRIPTION_MAX_JOBS_PER_USER: int = 3  # 待機中・実行中を合わせた1ユーザーあたりの上限。0 = 無制限
+
+    # Job progress stream (SSE) settings
+    PROGRESS_MAX_PENDING_EVENTS: int = 100
+    PROGRESS_KEEPALIVE_SECONDS: float = 15.0
+
+    # Long audio chunking settings
+    MAX_UPLOAD_SIZE_MB: int = 500
+    CHUNK_SECONDS: float = 600.0
+    CHUNK_OVERLAP_SECONDS: float = 2.0
+    CHUNK_PARALLELISM: int = 4
+
+    # Silence trimming before transcription
+    SILENCE_TRIM_ENABLED: bool = True
+    SILENCE_TRIM_MIN_SECONDS: float = 2.0  # これより短い無音は残す
+    SILENCE_TRIM_PADDING_SECONDS: float = 0.3  # 発話の前後に残す無音
+    SILENCE_TRIM_NOISE_DB: float = -35.0
+    SILENCE_TRIM_MIN_RATIO: float = 0.1  # 削れる割合がこれ未満なら元の音声をそのまま使う
+
+    # Re-encoding before upload to the OpenAI API
+    TRANSCODE_UPLOADS: bool = True
+    TRANSCODE_MIN_BYTES: int = 1024 * 1024  # これより小さいファイルはそのまま送る
+    TRANSCODE_BITRATE_KBPS: int = 24
+    TRANSCODE_SKIP_BELOW_KBPS: int = 64  # 元のビットレートがこれ以下なら圧縮済みとみなす
+
+    # Resumable upload settings
+    STORAGE_BUCKET: str = "transcriptions"
+    UPLOAD_PART_SIZE_MB: int = 8
+    UPLOAD_SESSION_TTL_SECONDS: int = 86400
+    UPLOAD_ASSEMBLY_PARALLELISM: int = 4  # 結合時に並列でダウンロードするパート数
+    UPLOAD_CLEANUP_INTERVAL_SECONDS: int = 600  # 期限切れセッションのパートを削除する間隔（0で無効）
+
+    # Transcription result cache settings (process-local tier)
+    RESULT_CACHE_MAX_ENTRIES: int = 256
+    RESULT_CACHE_MAX_MB: int = 64
+    RESULT_CACHE_TTL_SECONDS: int = 86400
+
+    # Transcription engine settings
+    TRANSCRIPTION_ENGINES: str = "openai"  # 有効にするエンジン（カンマ区切り: openai, faster_whisper, mlx）
+    DEFAULT_LATENCY_BUDGET_SECONDS: float = 600.0
+    OPENAI_MAX_CONCURRENCY: int = 8
+    OPENAI_REALTIME_FACTOR: float = 0.05
+    LOCAL_WHISPER_MODEL: str = "small"
+    LOCAL_WHISPER_DEVICE: str = "auto"
+    LOCAL_WHISPER_COMPUTE_TYPE: str = "int8"
+    LOCAL_WHISPER_CPU_THREADS: int = 0
+    LOCAL_ENGINE_MAX_CONCURRENCY: int = 1
+    LOCAL_ENGINE_REALTIME_FACTOR: float = 0.3
+    LOCAL_ENGINE_MAX_DURATION_SECONDS: float = 0.0  # 0 = 無制限
+
+    # Hedged requests and fallback to a local engine
+    HEDGE_ENGINE: str = ""  # 例: faster_whisper（TRANSCRIPTION_ENGINES にも含めること）。空 = 無効
+    HEDGE_PERCENTILE: float = 95.0  # 実時間比のこのパーセンタイルを超えたら予備エンジンにも投げる
+    HEDGE_MIN_DELAY_SECONDS: float = 5.0
+    HEDGE_MIN_SAMPLES: int = 20  # これより実測が少ない間はエンジンの見積もりを使う
+    LATENCY_WINDOW_SIZE: int = 200
+    CIRCUIT_FAILURE_RATIO: float = 0.5  # 失敗・遅延の割合がこれ以上でブレーカーを開く
+    CIRCUIT_MIN_CALLS: int = 10
+    CIRCUIT_WINDOW_SIZE: int = 20
+    CIRCUIT_COOLDOWN_SECONDS: float = 60.0
+
+    # Rendered export cache settings
+    EXPORT_CACHE_MAX_ENTRIES: int = 64
+    EXPORT_CACHE_MAX_MB: int = 32
+
+    # Segment index cache settings
+    SEGMENT_INDEX_CACHE_SIZE: int = 128
+
+    # Metrics settings
+    METRICS_TOKEN: str = ""  # 設定するとメトリクス取得に「Authorization: Bearer <トークン>」が必要。空 = 保護なし（内部ネットワークからのみ届く構成にすること）
 
     # CORS settings
     CORS_ORIGINS: str = "http://localhost:3000"
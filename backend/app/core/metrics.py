@@ -0,0 +1,263 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 処理段階ごとの所要時間のバケット（秒）。ファイル検証のミリ秒単位から長時間の文字起こしまで
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value read from a callback when metrics are scraped, so the hot path pays nothing."""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def set_function(self, function: Callable[[], Dict[LabelValues, float]]) -> None:
+        """Set the callback returning ``{label values: value}`` (``{(): value}`` without labels)."""
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is None:
+            return []
+        try:
+            values = self._function()
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = STAGE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # ラベルごとに [各バケットの件数..., +Inf の件数], 合計値
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall time of the block (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# シングルトンインスタンス
+metrics_registry = MetricsRegistry()
+
+stage_duration = metrics_registry.register(Histogram(
+    "whisper_stage_duration_seconds",
+    "Time spent in each stage of the transcription pipeline.",
+    labelnames=("stage",)
+))
+bytes_processed = metrics_registry.register(Counter(
+    "whisper_upload_bytes_total",
+    "Bytes of audio received in uploads."
+))
+audio_seconds_transcribed = metrics_registry.register(Counter(
+    "whisper_audio_seconds_transcribed_total",
+    "Seconds of audio transcribed, by engine (cache hits are labelled engine=\"cache\").",
+    labelnames=("engine",)
+))
+errors_total = metrics_registry.register(Counter(
+    "whisper_errors_total",
+    "Errors in the transcription pipeline, by stage and exception type.",
+    labelnames=("stage", "type")
+))
+silence_trimmed_seconds = metrics_registry.register(Counter(
+    "whisper_silence_trimmed_seconds_total",
+    "Seconds of silence cut from audio before transcription."
+))
+transcodes_total = metrics_registry.register(Counter(
+    "whisper_transcodes_total",
+    "Uploads to the OpenAI API by re-encoding outcome.",
+    labelnames=("outcome",)
+))
+transcode_bytes_saved = metrics_registry.register(Counter(
+    "whisper_transcode_bytes_saved_total",
+    "Bytes not uploaded to the OpenAI API thanks to re-encoding."
+))
+upstream_retries_total = metrics_registry.register(Counter(
+    "whisper_upstream_retries_total",
+    "Requests to an upstream API retried after a transient error, by engine and reason.",
+    labelnames=("engine", "reason")
+))
+admission_rejections_total = metrics_registry.register(Counter(
+    "whisper_admission_rejections_total",
+    "Transcription requests turned away before queueing, by reason.",
+    labelnames=("reason",)
+))
+engine_fallbacks_total = metrics_registry.register(Counter(
+    "whisper_engine_fallbacks_total",
+    "Requests sent to the fallback engine, by engine and reason (hedge, hedge_won, error, circuit_open).",
+    labelnames=("engine", "reason")
+))
+jobs_gauge = metrics_registry.register(Gauge(
+    "whisper_jobs",
+    "Transcription jobs currently known to the job queue, by status.",
+    labelnames=("status",)
+))
+engine_active_gauge = metrics_registry.register(Gauge(
+    "whisper_engine_active_requests",
+    "Requests running or waiting on each transcription engine.",
+    labelnames=("engine",)
+))
+result_cache_gauge = metrics_registry.register(Gauge(
+    "whisper_result_cache",
+    "Transcription result cache size and lookups (entries, bytes, local_hits, db_hits, misses, evictions).",
+    labelnames=("stat",)
+))
+circuit_open_gauge = metrics_registry.register(Gauge(
+    "whisper_engine_circuit_open",
+    "1 while the circuit breaker of an engine is open or half-open, 0 when closed.",
+    labelnames=("engine",)
+))
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Time a pipeline stage and count the exception type if it fails."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        errors_total.inc(stage=stage, type=_error_type(e))
+        raise
+    finally:
+        stage_duration.observe(time.perf_counter() - start, stage=stage)
+
+
+def _error_type(error: Exception) -> str:
+    # HTTPExceptionはステータスコードで区別する
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return f"{type(error).__name__}_{status_code}"
+    return type(error).__name__
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Dependency to get the metrics registry."""
+    return metrics_registry
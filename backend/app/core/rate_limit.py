@@ -0,0 +1,98 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Async token bucket shared by every request to an upstream API.
+
+    Tokens refill at ``rate`` per second up to ``capacity``; ``acquire``
+    waits, in arrival order, until a token is free. ``pause`` empties the
+    bucket and holds everyone back, for when the upstream answers 429.
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._state_lock = threading.Lock()
+        self._waiting = 0
+        self.waited_seconds = 0.0
+
+    async def acquire(self) -> float:
+        """Take one token, returning the seconds spent waiting for it."""
+        if self.rate <= 0:
+            return 0.0
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    wait = self._take()
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - started
+        self.waited_seconds += waited
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds`` and drop any saved-up burst."""
+        with self._state_lock:
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _take(self) -> float:
+        """Take a token if one is free; otherwise return how long to wait."""
+        with self._state_lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def stats(self) -> dict:
+        with self._state_lock:
+            return {
+                "rate_per_second": self.rate,
+                "capacity": self.capacity,
+                "tokens": round(self._tokens, 2),
+                "waiting": self._waiting,
+                "paused_seconds": round(max(self._paused_until - time.monotonic(), 0.0), 1),
+                "waited_seconds": round(self.waited_seconds, 1),
+            }
+
+
+def backoff_delay(
+    attempt: int,
+    base_seconds: float = 1.0,
+    max_seconds: float = 60.0,
+    retry_after: Optional[float] = None
+) -> float:
+    """
+    Delay before retry number ``attempt`` (0-based): exponential backoff with full jitter.
+
+    A ``Retry-After`` from the upstream is used as the lower bound, so
+    retries are spread out but never sent earlier than the server asked.
+    """
+    delay = random.uniform(0.0, min(max_seconds, base_seconds * 2 ** attempt))
+    if retry_after:
+        delay = max(delay, min(retry_after, max_seconds))
+    return delay
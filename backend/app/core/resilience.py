@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Optional
+
+
+class LatencyTracker:
+    """Rolling window of latency samples with percentile lookup."""
+
+    def __init__(self, window_size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._samples.append(value)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The ``q``-th percentile (0-100) of the window, or None when empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        # 最近傍順位法（サンプル数が少なくても実測値のどれかを返す）
+        rank = max(int(-(-q * len(samples) // 100)) - 1, 0)
+        return samples[min(rank, len(samples) - 1)]
+
+    def stats(self) -> dict:
+        p50, p95, p99 = (self.percentile(q) for q in (50, 95, 99))
+        return {
+            "samples": len(self),
+            "p50": round(p50, 4) if p50 is not None else None,
+            "p95": round(p95, 4) if p95 is not None else None,
+            "p99": round(p99, 4) if p99 is not None else None,
+        }
+
+
+class CircuitState(str, Enum):
+    """States of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over the outcomes of the last ``window_size`` calls.
+
+    Opens when at least ``min_calls`` outcomes are recorded and the share of
+    bad ones (errors, or calls too slow to be useful) reaches
+    ``failure_ratio``. After ``cooldown_seconds`` a single probe call is let
+    through; its outcome closes the breaker or opens it again. A probe whose
+    outcome is never recorded is given up after another cooldown.
+
+    ``clock`` returns monotonic seconds; tests pass a fake one.
+    """
+
+    def __init__(
+        self,
+        failure_ratio: float = 0.5,
+        min_calls: int = 10,
+        window_size: int = 20,
+        cooldown_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+        self.times_opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state == CircuitState.OPEN and self._clock() - self._opened_at >= self.cooldown_seconds:
+                return CircuitState.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to the protected upstream now; in half-open state only one probe is allowed."""
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return True
+            if self._state == CircuitState.OPEN:
+                if self._clock() - self._opened_at < self.cooldown_seconds:
+                    return False
+                self._state = CircuitState.HALF_OPEN
+                self._probe_started = None
+            now = self._clock()
+            if self._probe_started is not None and now - self._probe_started < self.cooldown_seconds:
+                return False
+            self._probe_started = now
+            return True
+
+    def record(self, ok: bool) -> None:
+        """Record the outcome of a call to the upstream."""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._probe_started = None
+                if ok:
+                    self._state = CircuitState.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            if self._state == CircuitState.OPEN:
+                return
+
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+                self._open()
+
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self.times_opened += 1
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state.value,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": self._outcomes.count(False),
+                "times_opened": self.times_opened,
+            }
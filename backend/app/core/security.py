@@ -1,28 +1,243 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.infrastructure.supabase_client import get_supabase_client
+from app.core.config import settings
+from app.domain.models import AuthenticatedUser
+from app.infrastructure.supabase_client import get_http_client, get_supabase_client
 
 security = HTTPBearer()
 
+# ローカル検証を許可する署名アルゴリズム
+ALLOWED_ALGORITHMS = {"HS256", "RS256", "ES256"}
+
+
+class TokenVerifier:
+    """
+    Verify Supabase access tokens locally.
+
+    HS256 tokens are checked against the project JWT secret; asymmetric
+    tokens against the project's JWKS, which is fetched once and refreshed
+    only when an unknown key id shows up. Verified tokens are kept in an
+    LRU cache until the earlier of their expiry and ``cache_ttl_seconds``.
+
+    The JWKS is fetched over the shared Supabase connection pool;
+    ``http_client`` and ``clock`` (monotonic seconds, for the refetch
+    limit) can be replaced in tests.
+    """
+
+    def __init__(
+        self,
+        jwt_secret: str,
+        jwks_url: str,
+        audience: str = "authenticated",
+        cache_max_entries: int = 1024,
+        cache_ttl_seconds: float = 300,
+        jwks_min_refresh_seconds: float = 60,
+        http_client: Callable[[], httpx.AsyncClient] = get_http_client,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.jwt_secret = jwt_secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.cache_max_entries = cache_max_entries
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.jwks_min_refresh_seconds = jwks_min_refresh_seconds
+        self._http_client = http_client
+        self._clock = clock
+        self._cache: "OrderedDict[str, Tuple[float, AuthenticatedUser]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._keys_fetched_at: Optional[float] = None
+        self._keys_lock = asyncio.Lock()
+
+    async def verify(self, token: str) -> Optional[AuthenticatedUser]:
+        """
+        Verify a token without a network call when possible.
+
+        Returns:
+            The user, or None if the token can't be checked locally
+            (no secret configured, or a key id not in the JWKS)
+
+        Raises:
+            jwt.InvalidTokenError: If the token is invalid or expired
+        """
+        cached = self.get_cached(token)
+        if cached is not None:
+            return cached
+
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        if algorithm not in ALLOWED_ALGORITHMS:
+            raise jwt.InvalidAlgorithmError(f"Unsupported algorithm: {algorithm}")
+
+        if algorithm == "HS256":
+            if not self.jwt_secret:
+                return None
+            key = self.jwt_secret
+        else:
+            signing_key = await self._get_signing_key(header.get("kid"))
+            if signing_key is None:
+                return None
+            key = signing_key.key
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=self.audience,
+            options={"require": ["exp", "sub"]}
+        )
+
+        user = AuthenticatedUser.from_claims(claims)
+        self.remember(token, user, expires_at=claims["exp"])
+        return user
+
+    def get_cached(self, token: str) -> Optional[AuthenticatedUser]:
+        key = self._cache_key(token)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+
+            expires_at, user = entry
+            if time.time() >= expires_at:
+                del self._cache[key]
+                return None
+
+            self._cache.move_to_end(key)
+            return user
+
+    def remember(self, token: str, user: AuthenticatedUser, expires_at: Optional[float] = None) -> None:
+        """Cache a verified user until the token expires or the TTL passes."""
+        deadline = time.time() + self.cache_ttl_seconds
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+
+        key = self._cache_key(token)
+        with self._cache_lock:
+            self._cache[key] = (deadline, user)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+
+    async def _get_signing_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        if kid in self._keys:
+            return self._keys[kid]
+
+        async with self._keys_lock:
+            if kid in self._keys:
+                return self._keys[kid]
+
+            # 未知のkidの場合のみJWKSを再取得（頻度は制限）
+            if (
+                self._keys_fetched_at is not None
+                and self._clock() - self._keys_fetched_at < self.jwks_min_refresh_seconds
+            ):
+                return None
+
+            self._keys_fetched_at = self._clock()
+            try:
+                # 接続を毎回張り直さないよう、Supabaseクライアントと同じコネクションプールを使う
+                response = await self._http_client().get(self.jwks_url, timeout=5.0)
+                response.raise_for_status()
+                jwk_set = jwt.PyJWKSet.from_dict(response.json())
+            except (httpx.HTTPError, jwt.PyJWKSetError, ValueError):
+                return None
+
+            self._keys = {key.key_id: key for key in jwk_set.keys if key.key_id}
+            return self._keys.get(kid)
+
+    @staticmethod
+    def _cache_key(token: str) -> str:
+        # トークン本体はメモリに保持しない
+        return hashlib.sha256(token.encode()).hexdigest()
+
+
+token_verifier = TokenVerifier(
+    jwt_secret=settings.SUPABASE_JWT_SECRET,
+    jwks_url=f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json",
+    audience=settings.JWT_AUDIENCE,
+    cache_max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    cache_ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS
+)
+
+
+async def _verify_remote(token: str) -> AuthenticatedUser:
+    """Verify a token with the Supabase Auth server."""
+    user_response = await get_supabase_client().auth.get_user(token)
+
+    if not user_response or not user_response.user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token"
+        )
+
+    user = AuthenticatedUser.from_supabase_user(user_response.user)
+    # 署名はSupabaseが検証済みなので、有効期限だけ読んでキャッシュをそれまでに制限する
+    expires_at = _unverified_expiry(token)
+    if expires_at is not None:
+        token_verifier.remember(token, user, expires_at=expires_at)
+    return user
+
+
+def _unverified_expiry(token: str) -> Optional[float]:
+    """Read ``exp`` from a token without verifying it; None if it is missing or malformed."""
+    try:
+        expires_at = jwt.decode(token, options={"verify_signature": False})["exp"]
+    except (jwt.PyJWTError, KeyError):
+        return None
+    if isinstance(expires_at, bool) or not isinstance(expires_at, (int, float)):
+        return None
+    return float(expires_at)
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
-):
+) -> AuthenticatedUser:
     """Verify JWT token and return current user."""
     token = credentials.credentials
 
     try:
-        supabase = get_supabase_client()
-        user_response = supabase.auth.get_user(token)
+        user = await token_verifier.verify(token)
+        if user is not None:
+            return user
 
-        if not user_response or not user_response.user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token"
-            )
+        # ローカル検証できない場合のみSupabaseに問い合わせ
+        return await _verify_remote(token)
 
-        return user_response.user
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Authentication failed: {str(e)}"
+        )
+
+
+async def get_current_user_strict(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> AuthenticatedUser:
+    """
+    Verify JWT token with the Supabase Auth server and return current user.
+
+    Use on routes that must observe session revocation immediately or need
+    the full user profile.
+    """
+    token = credentials.credentials
+
+    try:
+        return await _verify_remote(token)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,36 @@
+# 字幕（SRT / WebVTT）の書式。リポジトリ直下のプロトタイプ（subtitles.py）もファイルパスから
+# 読み込んで共用するため、標準ライブラリ以外（app.* を含む）をimportしないこと。
+from typing import Iterable, Iterator, Optional, Tuple
+
+
+def format_timestamp(seconds: Optional[float], decimal_marker: str = ",") -> str:
+    """
+    Format seconds as ``HH:MM:SS,mmm`` (SRT) or ``HH:MM:SS.mmm`` (WebVTT).
+
+    Works in integer milliseconds, so values like 2.9999 round to 00:00:03,000
+    instead of producing 1000 ms. Negative and missing values count as 0.
+    """
+    millis = int(round(max(seconds or 0.0, 0.0) * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_marker}{millis:03d}"
+
+
+def format_cue(index: int, start: Optional[float], end: Optional[float], text: str, decimal_marker: str = ",") -> str:
+    """One numbered cue followed by a blank line; ``decimal_marker="."`` for WebVTT."""
+    return (
+        f"{index}\n"
+        f"{format_timestamp(start, decimal_marker)} --> {format_timestamp(end, decimal_marker)}\n"
+        f"{text}\n\n"
+    )
+
+
+def iter_cues(segments: Iterable[dict]) -> Iterator[Tuple[int, dict, str]]:
+    """Non-empty segments as ``(number, segment, stripped text)``, numbered from 1."""
+    index = 0
+    for seg in segments:
+        text = (seg.get("text") or "").strip()
+        if text:
+            index += 1
+            yield index, seg, text
@@ -1 +1,103 @@
-# Domain models will be defined here
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class AuthenticatedUser:
+    """User identity resolved from a verified access token."""
+
+    id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+    created_at: Optional[datetime] = None
+    email_confirmed_at: Optional[datetime] = None
+    claims: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> "AuthenticatedUser":
+        """Build from locally verified JWT claims."""
+        return cls(
+            id=claims["sub"],
+            email=claims.get("email"),
+            role=claims.get("role"),
+            claims=claims
+        )
+
+    @classmethod
+    def from_supabase_user(cls, user: Any) -> "AuthenticatedUser":
+        """Build from a user returned by ``supabase.auth.get_user``."""
+        return cls(
+            id=str(user.id),
+            email=user.email,
+            role=user.role,
+            created_at=user.created_at,
+            email_confirmed_at=user.email_confirmed_at
+        )
+
+
+@dataclass
+class Segment:
+    """A timed piece of transcript text, common to all transcription engines."""
+
+    start: float
+    end: float
+    text: str
+
+    @classmethod
+    def from_any(cls, value: Any) -> Optional["Segment"]:
+        """
+        Normalize an engine-specific segment.
+
+        Accepts dicts, objects with ``start``/``end``/``text`` attributes
+        (OpenAI, faster-whisper) and ``[start, end, text]`` sequences (MLX).
+
+        Returns:
+            The segment, or None if the shape is not recognized
+        """
+        if isinstance(value, dict):
+            start, end, text = value.get("start", 0), value.get("end", 0), value.get("text", "")
+        elif hasattr(value, "start") and hasattr(value, "end") and hasattr(value, "text"):
+            # 名前付きタプルの場合もあるため、シーケンスより先に属性で判定
+            start, end, text = value.start, value.end, value.text
+        elif isinstance(value, (list, tuple)) and len(value) >= 3:
+            start, end, text = value[0], value[1], value[2]
+        else:
+            return None
+
+        return cls(start=float(start), end=float(end), text=text if isinstance(text, str) else str(text))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"start": self.start, "end": self.end, "text": self.text}
+
+
+@dataclass
+class TranscriptionResult:
+    """Normalized output of a transcription engine."""
+
+    text: str
+    language: Optional[str] = None
+    duration: Optional[float] = None
+    segments: List[Segment] = field(default_factory=list)
+    engine: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], engine: Optional[str] = None) -> "TranscriptionResult":
+        """Build from a verbose_json-style result dict."""
+        segments = [Segment.from_any(seg) for seg in data.get("segments") or []]
+        return cls(
+            text=data.get("text") or "",
+            language=data.get("language"),
+            duration=data.get("duration"),
+            segments=[seg for seg in segments if seg is not None],
+            engine=engine
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to the verbose_json-style dict stored in the database and cache."""
+        return {
+            "text": self.text,
+            "language": self.language,
+            "duration": self.duration,
+            "segments": [seg.to_dict() for seg in self.segments]
+        }
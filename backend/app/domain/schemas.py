@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from uuid import UUID
 from typing import Optional, List
@@ -21,6 +21,16 @@ class TranscriptionCreate(BaseModel):
     language: Optional[str] = None
 
 
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0)
+    part_size: Optional[int] = Field(None, ge=1024 * 1024, le=64 * 1024 * 1024)
+    language: Optional[str] = None
+    title: Optional[str] = None
+    engine: Optional[str] = None
+    latency_budget_seconds: Optional[float] = Field(None, gt=0)
+
+
 class TranscriptionResponse(BaseModel):
     id: UUID
     user_id: UUID
@@ -36,8 +46,18 @@ class TranscriptionResponse(BaseModel):
         from_attributes = True
 
 
+class TranscriptionSummary(BaseModel):
+    id: UUID
+    title: str
+    original_filename: str
+    duration_seconds: Optional[float] = None
+    language: Optional[str] = None
+    text_preview: Optional[str] = None
+    created_at: datetime
+
+
 class TranscriptionListResponse(BaseModel):
-    items: List[TranscriptionResponse]
+    items: List[TranscriptionSummary]
     total: int
-    page: int
     per_page: int
+    next_cursor: Optional[str] = None
@@ -1,9 +1,10 @@
-from app.infrastructure.supabase_client import get_supabase_client, get_supabase_admin
+from app.infrastructure.supabase_client import get_supabase_client, get_supabase_admin, close_supabase_clients
 from app.infrastructure.openai_client import WhisperClient, get_whisper_client, whisper_client
 
 __all__ = [
     "get_supabase_client",
     "get_supabase_admin",
+    "close_supabase_clients",
     "WhisperClient",
     "get_whisper_client",
     "whisper_client",
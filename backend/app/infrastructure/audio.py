@@ -0,0 +1,270 @@
+import asyncio
+import re
+import shutil
+import subprocess
+import threading
+from collections import deque
+from typing import Any, List, Optional, Sequence, Tuple
+
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+# パイプから1回に読むサンプル数（16kHzで約4秒分）
+DECODE_CHUNK_SAMPLES = 16000 * 4
+
+
+class AudioToolError(RuntimeError):
+    """Raised when ffmpeg/ffprobe fails or is not installed."""
+
+
+def ffmpeg_available() -> bool:
+    """Check whether ffmpeg and ffprobe are on PATH."""
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+async def _run(cmd: List[str]) -> Tuple[bytes, bytes]:
+    """Run a command without blocking the event loop."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    except FileNotFoundError as e:
+        raise AudioToolError(f"{cmd[0]} が見つかりません") from e
+
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        message = stderr.decode("utf-8", errors="replace").strip().splitlines()
+        raise AudioToolError(f"{cmd[0]} failed: {message[-1] if message else process.returncode}")
+
+    return stdout, stderr
+
+
+async def probe_duration(path: str) -> float:
+    """
+    Get audio duration in seconds using ffprobe.
+
+    Raises:
+        AudioToolError: If ffprobe fails or reports no duration
+    """
+    stdout, _ = await _run([
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        path
+    ])
+
+    try:
+        return float(stdout.decode().strip())
+    except ValueError as e:
+        raise AudioToolError(f"音声の長さを取得できません: {path}") from e
+
+
+async def detect_silences(
+    path: str,
+    noise_db: float = -35.0,
+    min_silence_seconds: float = 0.5
+) -> List[Tuple[float, float]]:
+    """
+    Detect silent intervals with ffmpeg's silencedetect filter.
+
+    Returns:
+        List of (start, end) tuples in seconds
+    """
+    _, stderr = await _run([
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", path,
+        "-vn",
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence_seconds}",
+        "-f", "null", "-"
+    ])
+
+    silences: List[Tuple[float, float]] = []
+    start: Optional[float] = None
+    for line in stderr.decode("utf-8", errors="replace").splitlines():
+        match = _SILENCE_START_RE.search(line)
+        if match:
+            start = max(float(match.group(1)), 0.0)
+            continue
+        match = _SILENCE_END_RE.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+
+    return silences
+
+
+async def extract_segment(
+    path: str,
+    output_path: str,
+    start: float,
+    duration: float,
+    sample_rate: int = 16000,
+    bitrate: str = "48k"
+) -> str:
+    """
+    Cut [start, start + duration) out of an audio file as mono MP3.
+
+    Returns:
+        Output path
+    """
+    await _run([
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start:.3f}",
+        "-t", f"{duration:.3f}",
+        "-i", path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-c:a", "libmp3lame",
+        "-b:a", bitrate,
+        "-y", output_path
+    ])
+    return output_path
+
+
+def decode_to_array(path: str, duration: Optional[float] = None, sample_rate: int = 16000) -> Any:
+    """
+    Decode audio to a mono float32 NumPy array through an ffmpeg pipe.
+
+    ffmpeg writes 16-bit PCM to stdout, which is read in fixed-size chunks
+    and converted in place into a buffer preallocated from ``duration``,
+    so no intermediate WAV touches disk. stderr is drained by a helper
+    thread while stdout is read, so a chatty ffmpeg cannot fill the pipe
+    and stall. Blocking; call it from a worker thread. NumPy is imported
+    lazily since only the local engines need it.
+
+    Args:
+        path: Input file in any container ffmpeg can read
+        duration: Known length in seconds, used to size the buffer
+        sample_rate: Output sample rate
+
+    Returns:
+        1-D float32 array scaled to [-1.0, 1.0)
+
+    Raises:
+        AudioToolError: If ffmpeg is missing or fails
+    """
+    import numpy as np
+
+    capacity = int((duration + 1.0) * sample_rate) if duration else sample_rate * 60
+    samples = np.empty(capacity, dtype=np.float32)
+    raw = bytearray(DECODE_CHUNK_SAMPLES * 2)
+    view = memoryview(raw)
+    pcm = np.frombuffer(raw, dtype=np.int16)
+
+    try:
+        process = subprocess.Popen(
+            [
+                "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+                "-i", path,
+                "-vn",
+                "-f", "s16le",
+                "-ac", "1",
+                "-ar", str(sample_rate),
+                "-"
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0
+        )
+    except FileNotFoundError as e:
+        raise AudioToolError("ffmpeg が見つかりません") from e
+
+    # エラー表示用に末尾の数行だけ残す
+    stderr_tail: deque = deque(maxlen=20)
+    drain = threading.Thread(target=stderr_tail.extend, args=(process.stderr,), daemon=True)
+    drain.start()
+
+    filled = 0
+    try:
+        while True:
+            nbytes = 0
+            while nbytes < len(raw):
+                n = process.stdout.readinto(view[nbytes:])
+                if not n:
+                    break
+                nbytes += n
+
+            count = nbytes // 2
+            if filled + count > len(samples):
+                # 長さの見積もりが外れた場合のみ拡張
+                grown = np.empty(max(len(samples) * 2, filled + count), dtype=np.float32)
+                grown[:filled] = samples[:filled]
+                samples = grown
+            np.multiply(pcm[:count], 1 / 32768.0, out=samples[filled:filled + count], casting="unsafe")
+            filled += count
+
+            if nbytes < len(raw):
+                break
+        returncode = process.wait()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        drain.join()
+        process.stdout.close()
+        process.stderr.close()
+
+    if returncode != 0:
+        message = [line.decode("utf-8", errors="replace").strip() for line in stderr_tail if line.strip()]
+        raise AudioToolError(f"ffmpeg failed: {message[-1] if message else returncode}")
+
+    return samples[:filled]
+
+
+async def encode_speech(
+    path: str,
+    output_path: str,
+    bitrate: str = "24k",
+    sample_rate: int = 16000
+) -> str:
+    """
+    Re-encode audio as mono Opus in an Ogg container, tuned for speech.
+
+    Returns:
+        Output path
+    """
+    await _run([
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-i", path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-c:a", "libopus",
+        "-b:a", bitrate,
+        "-application", "voip",
+        "-y", output_path
+    ])
+    return output_path
+
+
+async def extract_intervals(
+    path: str,
+    output_path: str,
+    intervals: Sequence[Tuple[float, float]],
+    sample_rate: int = 16000,
+    bitrate: str = "48k"
+) -> str:
+    """
+    Concatenate the given (start, end) intervals of an audio file into one mono MP3.
+
+    Returns:
+        Output path
+    """
+    selection = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in intervals)
+    await _run([
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-i", path,
+        "-vn",
+        # 選択した区間以外のサンプルを捨て、タイムスタンプを詰め直す
+        "-af", f"aselect='{selection}',asetpts=N/SR/TB",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-c:a", "libmp3lame",
+        "-b:a", bitrate,
+        "-y", output_path
+    ])
+    return output_path
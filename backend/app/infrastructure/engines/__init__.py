@@ -0,0 +1,15 @@
+from app.infrastructure.engines.base import TranscriptionEngine, EngineUnavailableError
+from app.infrastructure.engines.openai_engine import OpenAIWhisperEngine
+from app.infrastructure.engines.local_engines import FasterWhisperEngine, MLXWhisperEngine
+from app.infrastructure.engines.registry import EngineRegistry, engine_registry, get_engine_registry
+
+__all__ = [
+    "TranscriptionEngine",
+    "EngineUnavailableError",
+    "OpenAIWhisperEngine",
+    "FasterWhisperEngine",
+    "MLXWhisperEngine",
+    "EngineRegistry",
+    "engine_registry",
+    "get_engine_registry",
+]
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, BinaryIO, Callable, Optional
+
+from app.domain.models import TranscriptionResult
+
+
+class TranscriptionEngine(ABC):
+    """
+    Common interface of speech-to-text backends.
+
+    Besides ``transcribe``, each engine carries the numbers the router needs
+    to estimate how long a request would take on it: a fixed per-request
+    overhead, a realtime factor (processing seconds per audio second, refined
+    from observed runs) and how many requests it can run at once.
+    """
+
+    name: str = ""
+    # True の場合、長い音声は ChunkedTranscriber で分割してから渡す（APIのファイルサイズ上限など）
+    chunked: bool = False
+    # True の場合、エンジン自身がVADで無音を飛ばすため、事前の無音カットを行わない
+    builtin_vad: bool = False
+
+    # 実測値で実時間係数を更新するときの重み
+    RTF_SMOOTHING = 0.2
+
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        realtime_factor: float = 0.1,
+        setup_seconds: float = 0.0,
+        max_duration_seconds: Optional[float] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.realtime_factor = realtime_factor
+        self.setup_seconds = setup_seconds
+        self.max_duration_seconds = max_duration_seconds or None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._completed = 0
+        self._failures = 0
+        self._cancelled = 0
+        self._audio_seconds = 0.0
+        self._busy_seconds = 0.0
+
+    @property
+    @abstractmethod
+    def model_id(self) -> str:
+        """Identifier of the model, stored with results and used in cache keys."""
+
+    def is_available(self) -> bool:
+        """Whether the engine's dependencies are installed and configured."""
+        return True
+
+    @abstractmethod
+    async def transcribe(
+        self,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str] = None,
+        duration: Optional[float] = None
+    ) -> TranscriptionResult:
+        """
+        Transcribe one audio file.
+
+        Args:
+            audio_file: File-like object containing audio data
+            filename: Original filename
+            language: Language code or None for auto-detect
+            duration: Length in seconds if already probed, or None
+
+        Returns:
+            Normalized transcription result
+        """
+
+    @property
+    def active(self) -> int:
+        """Requests running or waiting for a slot on this engine."""
+        return self._active
+
+    def can_handle(self, duration: Optional[float]) -> bool:
+        return self.max_duration_seconds is None or duration is None or duration <= self.max_duration_seconds
+
+    def estimate_upload_bytes(self, size: int, duration: Optional[float]) -> int:
+        """Bytes actually sent for a file of ``size`` bytes, after any re-encoding by the engine."""
+        return size
+
+    def estimate_seconds(self, duration: float) -> float:
+        """Expected completion time of a new request, including waiting for a free slot."""
+        work = self.setup_seconds + duration * self.realtime_factor
+        # 空きスロットがなければ、先行するリクエストが一巡するのを待つ
+        waves = 1 + self._active // max(self.max_concurrency, 1)
+        return work * waves
+
+    @asynccontextmanager
+    async def slot(self, duration: Optional[float]) -> AsyncIterator[None]:
+        """
+        Hold one of the engine's concurrency slots and record timing for the run.
+
+        A run that is cancelled (e.g. the losing side of a hedged request)
+        is counted separately from failures.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        with self._lock:
+            self._active += 1
+        outcome = "failed"
+        try:
+            async with self._semaphore:
+                started = time.monotonic()
+                try:
+                    yield
+                except asyncio.CancelledError:
+                    outcome = "cancelled"
+                    raise
+                outcome = "completed"
+                self._record(duration, time.monotonic() - started)
+        finally:
+            with self._lock:
+                self._active -= 1
+                if outcome == "failed":
+                    self._failures += 1
+                elif outcome == "cancelled":
+                    self._cancelled += 1
+
+    @staticmethod
+    async def run_in_thread(func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run blocking engine work in a worker thread.
+
+        Unlike a bare ``asyncio.to_thread``, cancelling the caller does not
+        return before the thread does: the thread cannot be stopped, so the
+        caller keeps its slot (and ``active`` keeps counting it) until the
+        work actually ends, and only then sees the ``CancelledError``.
+        """
+        work = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+        try:
+            return await asyncio.shield(work)
+        except asyncio.CancelledError:
+            # 結果は捨てるが、スレッドが終わるまで待ってからキャンセルを伝える
+            while not work.done():
+                try:
+                    await asyncio.wait({work})
+                except asyncio.CancelledError:
+                    continue
+            if not work.cancelled():
+                work.exception()
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "model": self.model_id,
+                "available": self.is_available(),
+                "active": self._active,
+                "max_concurrency": self.max_concurrency,
+                "realtime_factor": round(self.realtime_factor, 4),
+                "completed": self._completed,
+                "failures": self._failures,
+                "cancelled": self._cancelled,
+                "audio_seconds": round(self._audio_seconds, 1),
+                "busy_seconds": round(self._busy_seconds, 1),
+            }
+
+    def _record(self, duration: Optional[float], elapsed: float) -> None:
+        with self._lock:
+            self._completed += 1
+            self._busy_seconds += elapsed
+            if not duration:
+                return
+            self._audio_seconds += duration
+            observed = max(elapsed - self.setup_seconds, 0.0) / duration
+            self.realtime_factor += self.RTF_SMOOTHING * (observed - self.realtime_factor)
+
+
+class EngineUnavailableError(RuntimeError):
+    """No registered engine can serve the request."""
@@ -0,0 +1,177 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+from abc import abstractmethod
+from typing import Any, BinaryIO, Optional
+
+from app.domain.models import Segment, TranscriptionResult
+from app.infrastructure import audio
+from app.infrastructure.engines.base import TranscriptionEngine
+
+
+class _LocalModelEngine(TranscriptionEngine):
+    """Engine backed by a model loaded into this process on first use."""
+
+    # インストールされていなければエンジンを無効にするパッケージ
+    package: str = ""
+
+    def __init__(self, model_size: str = "small", **kwargs):
+        super().__init__(**kwargs)
+        self.model_size = model_size
+        self._model: Any = None
+        self._model_lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return importlib.util.find_spec(self.package) is not None
+
+    def get_model(self) -> Any:
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    @abstractmethod
+    def _load_model(self) -> Any:
+        """Load the model; called once, under a lock, on first use."""
+
+    @staticmethod
+    def _decoded_input(audio_file: BinaryIO, duration: Optional[float] = None) -> Optional[Any]:
+        """
+        The audio as a float32 array decoded through an ffmpeg pipe, or None if not possible.
+
+        ``duration`` sizes the output buffer up front; without it the buffer
+        starts at one minute and is regrown (and copied) as decoding goes.
+        """
+        name = getattr(audio_file, "name", None)
+        if not (isinstance(name, str) and os.path.isfile(name) and audio.ffmpeg_available()):
+            return None
+        try:
+            return audio.decode_to_array(name, duration=duration)
+        except audio.AudioToolError:
+            return None
+
+
+class FasterWhisperEngine(_LocalModelEngine):
+    """faster-whisper (CTranslate2) running on this host's CPU or GPU."""
+
+    name = "faster_whisper"
+    package = "faster_whisper"
+    builtin_vad = True
+
+    def __init__(
+        self,
+        model_size: str = "small",
+        device: str = "auto",
+        compute_type: str = "int8",
+        cpu_threads: int = 0,
+        **kwargs
+    ):
+        super().__init__(model_size=model_size, **kwargs)
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+
+    @property
+    def model_id(self) -> str:
+        return f"faster-whisper-{self.model_size}"
+
+    def _load_model(self) -> Any:
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(
+            self.model_size,
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.max_concurrency
+        )
+
+    async def transcribe(
+        self,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str] = None,
+        duration: Optional[float] = None
+    ) -> TranscriptionResult:
+        return await self.run_in_thread(self._transcribe_sync, audio_file, language, duration)
+
+    def _transcribe_sync(self, audio_file: BinaryIO, language: Optional[str], duration: Optional[float]) -> TranscriptionResult:
+        # デコード済み配列を渡せばエンジン側でのコンテナのデコードを省ける
+        decoded = self._decoded_input(audio_file, duration)
+        segments, info = self.get_model().transcribe(
+            audio_file if decoded is None else decoded,
+            language=language,
+            beam_size=1,
+            vad_filter=True,
+            condition_on_previous_text=False
+        )
+        normalized = [Segment.from_any(seg) for seg in segments]
+        return TranscriptionResult(
+            text="".join(seg.text for seg in normalized).strip(),
+            language=info.language,
+            duration=info.duration,
+            segments=normalized,
+            engine=self.name
+        )
+
+
+class MLXWhisperEngine(_LocalModelEngine):
+    """Lightning Whisper MLX on Apple Silicon GPUs."""
+
+    name = "mlx"
+    package = "lightning_whisper_mlx"
+
+    def __init__(self, model_size: str = "small", batch_size: int = 12, **kwargs):
+        super().__init__(model_size=model_size, **kwargs)
+        self.batch_size = batch_size
+
+    @property
+    def model_id(self) -> str:
+        return f"mlx-whisper-{self.model_size}"
+
+    def _load_model(self) -> Any:
+        from lightning_whisper_mlx import LightningWhisperMLX
+
+        return LightningWhisperMLX(model=self.model_size, batch_size=self.batch_size, quant=None)
+
+    async def transcribe(
+        self,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str] = None,
+        duration: Optional[float] = None
+    ) -> TranscriptionResult:
+        return await self.run_in_thread(self._transcribe_sync, audio_file, filename, language, duration)
+
+    def _transcribe_sync(
+        self,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str],
+        duration: Optional[float]
+    ) -> TranscriptionResult:
+        # Lightning Whisper MLX はファイルパスかデコード済み配列を受け付ける
+        decoded = self._decoded_input(audio_file, duration)
+        name = getattr(audio_file, "name", None)
+        if decoded is not None:
+            result = self.get_model().transcribe(audio_path=decoded, language=language)
+        elif isinstance(name, str) and os.path.isfile(name):
+            result = self.get_model().transcribe(audio_path=name, language=language)
+        else:
+            with tempfile.NamedTemporaryFile(suffix=os.path.splitext(filename)[1]) as tmp:
+                shutil.copyfileobj(audio_file, tmp, 1024 * 1024)
+                tmp.flush()
+                result = self.get_model().transcribe(audio_path=tmp.name, language=language)
+
+        if isinstance(result, str):
+            return TranscriptionResult(text=result, language=language, engine=self.name)
+
+        normalized = TranscriptionResult.from_dict(result, engine=self.name)
+        if normalized.language is None:
+            normalized.language = language
+        if normalized.duration is None and normalized.segments:
+            normalized.duration = normalized.segments[-1].end
+        return normalized
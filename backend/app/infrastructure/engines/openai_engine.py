@@ -0,0 +1,105 @@
+import asyncio
+from typing import BinaryIO, Optional
+
+from app.core.metrics import stage_duration, upstream_retries_total
+from app.core.rate_limit import TokenBucket, backoff_delay
+from app.domain.models import TranscriptionResult
+from app.infrastructure.engines.base import TranscriptionEngine
+from app.infrastructure.openai_client import WhisperClient, classify_transient_error
+from app.infrastructure.transcoder import UploadTranscoder
+
+
+class OpenAIWhisperEngine(TranscriptionEngine):
+    """
+    OpenAI Whisper API. Scales out well but has a per-request size limit.
+
+    Every request (including each chunk of long audio) takes a token from
+    ``rate_limiter`` first, so bursts are smoothed to the account's rate
+    limit instead of turning into 429s. Transient errors are retried with
+    jittered exponential backoff; a 429 also pauses the shared bucket.
+    """
+
+    name = "openai"
+    chunked = True
+
+    def __init__(
+        self,
+        whisper_client: WhisperClient,
+        transcoder: Optional[UploadTranscoder] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 4,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 60.0,
+        **kwargs
+    ):
+        super().__init__(setup_seconds=kwargs.pop("setup_seconds", 2.0), **kwargs)
+        self.whisper = whisper_client
+        self.transcoder = transcoder
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._retries = 0
+
+    @property
+    def model_id(self) -> str:
+        return self.whisper.model
+
+    def estimate_upload_bytes(self, size: int, duration: Optional[float]) -> int:
+        if self.transcoder is None:
+            return size
+        return self.transcoder.estimate_bytes(size, duration)
+
+    async def transcribe(
+        self,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str] = None,
+        duration: Optional[float] = None
+    ) -> TranscriptionResult:
+        if self.transcoder is None:
+            return await self._transcribe(audio_file, filename, language)
+
+        # アップロード量を減らすため、効果がある場合のみ16kHzモノラルのOpusに再エンコード
+        async with self.transcoder.prepare(audio_file, filename) as (upload, upload_name):
+            return await self._transcribe(upload, upload_name, language)
+
+    async def _transcribe(self, audio_file: BinaryIO, filename: str, language: Optional[str]) -> TranscriptionResult:
+        position = audio_file.tell()
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                stage_duration.observe(await self.rate_limiter.acquire(), stage="rate_limit_wait")
+            try:
+                result = await self.run_in_thread(
+                    self.whisper.transcribe,
+                    audio_file=audio_file,
+                    filename=filename,
+                    language=language,
+                    response_format="verbose_json"
+                )
+                return TranscriptionResult.from_dict(result, engine=self.name)
+            except Exception as e:
+                transient = classify_transient_error(e)
+                if transient is None or attempt >= self.max_retries:
+                    raise
+                reason, retry_after = transient
+
+            delay = backoff_delay(attempt, self.retry_base_seconds, self.retry_max_seconds, retry_after)
+            if reason == "rate_limited" and self.rate_limiter is not None:
+                # 429はアカウント全体の制限なので、他のリクエストも一緒に待たせる
+                self.rate_limiter.pause(delay)
+            upstream_retries_total.inc(engine=self.name, reason=reason)
+            self._retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+            audio_file.seek(position)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        if self.transcoder is not None:
+            stats["transcode"] = self.transcoder.stats()
+        if self.rate_limiter is not None:
+            stats["rate_limit"] = self.rate_limiter.stats()
+        stats["retries"] = self._retries
+        return stats
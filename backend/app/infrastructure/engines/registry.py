@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.rate_limit import TokenBucket
+from app.infrastructure.engines.base import TranscriptionEngine
+from app.infrastructure.engines.local_engines import FasterWhisperEngine, MLXWhisperEngine
+from app.infrastructure.engines.openai_engine import OpenAIWhisperEngine
+from app.infrastructure.openai_client import WhisperClient, whisper_client
+from app.infrastructure.transcoder import create_upload_transcoder
+
+
+class EngineRegistry:
+    """Named set of transcription engines enabled in this process."""
+
+    def __init__(self):
+        self._engines: Dict[str, TranscriptionEngine] = {}
+
+    def register(self, engine: TranscriptionEngine) -> None:
+        self._engines[engine.name] = engine
+
+    def get(self, name: str) -> Optional[TranscriptionEngine]:
+        return self._engines.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._engines)
+
+    def available(self) -> List[TranscriptionEngine]:
+        """Registered engines whose dependencies are installed."""
+        return [engine for engine in self._engines.values() if engine.is_available()]
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: engine.stats() for name, engine in self._engines.items()}
+
+
+def build_engine_registry(client: WhisperClient) -> EngineRegistry:
+    """Register the engines listed in ``TRANSCRIPTION_ENGINES``."""
+    registry = EngineRegistry()
+    enabled = {name.strip() for name in settings.TRANSCRIPTION_ENGINES.split(",") if name.strip()}
+
+    if "openai" in enabled:
+        registry.register(OpenAIWhisperEngine(
+            client,
+            transcoder=create_upload_transcoder(),
+            rate_limiter=TokenBucket(
+                rate=settings.OPENAI_REQUESTS_PER_MINUTE / 60,
+                capacity=settings.OPENAI_REQUEST_BURST
+            ),
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            retry_base_seconds=settings.OPENAI_RETRY_BASE_SECONDS,
+            retry_max_seconds=settings.OPENAI_RETRY_MAX_SECONDS,
+            max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+            realtime_factor=settings.OPENAI_REALTIME_FACTOR
+        ))
+
+    local_options = dict(
+        model_size=settings.LOCAL_WHISPER_MODEL,
+        max_concurrency=settings.LOCAL_ENGINE_MAX_CONCURRENCY,
+        realtime_factor=settings.LOCAL_ENGINE_REALTIME_FACTOR,
+        max_duration_seconds=settings.LOCAL_ENGINE_MAX_DURATION_SECONDS
+    )
+    if "faster_whisper" in enabled:
+        registry.register(FasterWhisperEngine(
+            device=settings.LOCAL_WHISPER_DEVICE,
+            compute_type=settings.LOCAL_WHISPER_COMPUTE_TYPE,
+            cpu_threads=settings.LOCAL_WHISPER_CPU_THREADS,
+            **local_options
+        ))
+    if "mlx" in enabled:
+        registry.register(MLXWhisperEngine(**local_options))
+
+    return registry
+
+
+# シングルトンインスタンス
+engine_registry = build_engine_registry(whisper_client)
+
+
+def get_engine_registry() -> EngineRegistry:
+    """Dependency to get the transcription engine registry."""
+    return engine_registry
@@ -1,13 +1,16 @@
 import openai
-from typing import BinaryIO, Optional
+from typing import BinaryIO, Optional, Tuple
 from app.core.config import settings
 
 
 class WhisperClient:
     """OpenAI Whisper API client for transcription."""
 
+    model = "whisper-1"
+
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        # リトライは呼び出し側でレート制限と合わせて行う（SDK内蔵のリトライと二重にしない）
+        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
 
     def transcribe(
         self,
@@ -30,7 +33,7 @@ class WhisperClient:
         """
         # OpenAI APIは file-like object と filename を期待
         transcription = self.client.audio.transcriptions.create(
-            model="whisper-1",
+            model=self.model,
             file=(filename, audio_file),
             language=language,
             response_format=response_format
@@ -56,6 +59,39 @@ class WhisperClient:
         return {"text": transcription if isinstance(transcription, str) else transcription.text}
 
 
+def classify_transient_error(error: Exception) -> Optional[Tuple[str, Optional[float]]]:
+    """
+    Tell whether an OpenAI API error is worth retrying.
+
+    Returns:
+        (reason, retry_after seconds or None) for transient errors, None otherwise
+    """
+    if isinstance(error, openai.RateLimitError):
+        # クォータ超過は待っても回復しない
+        if getattr(error, "code", None) == "insufficient_quota":
+            return None
+        return "rate_limited", _retry_after(error.response)
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return "connection", None
+    if isinstance(error, openai.InternalServerError):
+        return "server_error", _retry_after(error.response)
+    if isinstance(error, openai.APIStatusError) and error.status_code in (408, 409):
+        return "server_error", None
+    return None
+
+
+def _retry_after(response) -> Optional[float]:
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
 # シングルトンインスタンス
 whisper_client = WhisperClient()
 
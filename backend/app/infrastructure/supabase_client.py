@@ -1,12 +1,64 @@
-from supabase import create_client, Client
+from typing import Optional
+
+import httpx
+from supabase import AsyncClient, AsyncClientOptions
 from app.core.config import settings
 
+# プロセス全体で共有するクライアント（コネクションプールを再利用）
+_http_client: Optional[httpx.AsyncClient] = None
+_anon_client: Optional[AsyncClient] = None
+_admin_client: Optional[AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive HTTP connection pool for Supabase clients and other calls to the project (e.g. JWKS)."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=httpx.Timeout(settings.SUPABASE_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+    return _http_client
+
+
+def _create_client(key: str) -> AsyncClient:
+    return AsyncClient(
+        settings.SUPABASE_URL,
+        key,
+        options=AsyncClientOptions(
+            auto_refresh_token=False,
+            persist_session=False,
+            httpx_client=get_http_client()
+        )
+    )
+
+
+def get_supabase_client() -> AsyncClient:
+    """Get shared Supabase client with anon key."""
+    global _anon_client
+    if _anon_client is None:
+        _anon_client = _create_client(settings.SUPABASE_ANON_KEY)
+    return _anon_client
+
 
-def get_supabase_client() -> Client:
-    """Get Supabase client with anon key."""
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+def get_supabase_admin() -> AsyncClient:
+    """Get shared Supabase client with service key (bypasses RLS)."""
+    global _admin_client
+    if _admin_client is None:
+        _admin_client = _create_client(settings.SUPABASE_SERVICE_KEY)
+    return _admin_client
 
 
-def get_supabase_admin() -> Client:
-    """Get Supabase client with service key (bypasses RLS)."""
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+async def close_supabase_clients() -> None:
+    """Close the shared connection pool. Called from the application lifespan."""
+    global _http_client, _anon_client, _admin_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _anon_client = None
+    _admin_client = None
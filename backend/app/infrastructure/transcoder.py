@@ -0,0 +1,136 @@
+import os
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import track_stage, transcode_bytes_saved, transcodes_total
+from app.infrastructure import audio
+
+# 再エンコードしても元の何割以下にならなければ元ファイルを送る
+MIN_SAVINGS_RATIO = 0.8
+
+
+class UploadTranscoder:
+    """
+    Re-encode audio to compact mono Opus before it is uploaded to an API.
+
+    Files that are already small, already low-bitrate, or not on disk are
+    sent as they are. Outcomes, bytes saved and encode time are recorded so
+    the trade-off against upload time can be checked.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        min_bytes: int = 1024 * 1024,
+        bitrate_kbps: int = 24,
+        skip_below_kbps: int = 64
+    ):
+        self.enabled = enabled
+        self.min_bytes = min_bytes
+        self.bitrate_kbps = bitrate_kbps
+        self.skip_below_kbps = skip_below_kbps
+        self._lock = threading.Lock()
+        self._outcomes: dict = {}
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._seconds = 0.0
+
+    def is_active(self) -> bool:
+        return self.enabled and audio.ffmpeg_available()
+
+    def estimate_bytes(self, size: int, duration: Optional[float]) -> int:
+        """Upload size after re-encoding, for deciding whether audio fits in one request."""
+        if not self.is_active() or not duration or size < self.min_bytes:
+            return size
+        return min(size, int(duration * self.bitrate_kbps * 1000 / 8))
+
+    @asynccontextmanager
+    async def prepare(self, audio_file: BinaryIO, filename: str) -> AsyncIterator[Tuple[BinaryIO, str]]:
+        """
+        Yield the file and filename to upload, re-encoded when that pays off.
+
+        The re-encoded file is deleted on exit.
+        """
+        path = getattr(audio_file, "name", None)
+        if not self.is_active() or not (isinstance(path, str) and os.path.isfile(path)):
+            yield audio_file, filename
+            return
+
+        size = os.path.getsize(path)
+        outcome = await self._skip_reason(path, size)
+        if outcome:
+            self._record(outcome, size, size, 0.0)
+            yield audio_file, filename
+            return
+
+        fd, output_path = tempfile.mkstemp(prefix="transcode-", suffix=".ogg")
+        os.close(fd)
+        try:
+            started = time.perf_counter()
+            outcome = "transcoded"
+            try:
+                with track_stage("transcode"):
+                    await audio.encode_speech(path, output_path, bitrate=f"{self.bitrate_kbps}k")
+                encoded_size = os.path.getsize(output_path)
+                if encoded_size > size * MIN_SAVINGS_RATIO:
+                    outcome = "not_smaller"
+            except audio.AudioToolError:
+                outcome = "failed"
+            elapsed = time.perf_counter() - started
+
+            if outcome != "transcoded":
+                self._record(outcome, size, size, elapsed)
+                yield audio_file, filename
+                return
+
+            self._record(outcome, size, encoded_size, elapsed)
+            with open(output_path, "rb") as encoded:
+                yield encoded, os.path.splitext(filename)[0] + ".ogg"
+        finally:
+            os.remove(output_path)
+
+    async def _skip_reason(self, path: str, size: int) -> Optional[str]:
+        if size < self.min_bytes:
+            return "skipped_small"
+        try:
+            duration = await audio.probe_duration(path)
+        except audio.AudioToolError:
+            return None
+        # 元のビットレートが低ければ圧縮済みの音声とみなす（チャンク分割後のMP3など）
+        if duration and size * 8 / duration / 1000 <= self.skip_below_kbps:
+            return "skipped_compact"
+        return None
+
+    def _record(self, outcome: str, size_in: int, size_out: int, seconds: float) -> None:
+        transcodes_total.inc(outcome=outcome)
+        if size_out < size_in:
+            transcode_bytes_saved.inc(size_in - size_out)
+        with self._lock:
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+            self._bytes_in += size_in
+            self._bytes_out += size_out
+            self._seconds += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.is_active(),
+                "outcomes": dict(self._outcomes),
+                "bytes_in": self._bytes_in,
+                "bytes_saved": self._bytes_in - self._bytes_out,
+                "transcode_seconds": round(self._seconds, 2),
+            }
+
+
+def create_upload_transcoder() -> UploadTranscoder:
+    """Build an upload transcoder from application settings."""
+    return UploadTranscoder(
+        enabled=settings.TRANSCODE_UPLOADS,
+        min_bytes=settings.TRANSCODE_MIN_BYTES,
+        bitrate_kbps=settings.TRANSCODE_BITRATE_KBPS,
+        skip_below_kbps=settings.TRANSCODE_SKIP_BELOW_KBPS
+    )
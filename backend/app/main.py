@@ -1,7 +1,22 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.router import router as v1_router
+from app.infrastructure.supabase_client import close_supabase_clients
+from app.services.job_service import job_queue
+from app.services.upload_service import upload_service
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """Start and stop background workers with the application."""
+    await job_queue.start()
+    await upload_service.start()
+    yield
+    await upload_service.stop()
+    await job_queue.stop()
+    await close_supabase_clients()
 
 
 def create_application() -> FastAPI:
@@ -10,7 +25,8 @@ def create_application() -> FastAPI:
         title="Whisper Web API",
         description="API for Whisper Web transcription service",
         version="1.0.0",
-        debug=settings.DEBUG
+        debug=settings.DEBUG,
+        lifespan=lifespan
     )
 
     # Configure CORS
@@ -1,5 +1,9 @@
 from app.services.transcription_service import TranscriptionService
+from app.services.job_service import JobQueue, JobStatus, TranscriptionJob
 
 __all__ = [
     "TranscriptionService",
+    "JobQueue",
+    "JobStatus",
+    "TranscriptionJob",
 ]
@@ -0,0 +1,131 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import result_cache_gauge
+
+
+def compute_audio_hash(audio_file: BinaryIO, block_size: int = 1024 * 1024) -> str:
+    """
+    Compute SHA-256 of a file-like object and rewind it to where it started.
+
+    Returns:
+        Hex digest
+    """
+    position = audio_file.tell()
+    digest = hashlib.sha256()
+    for block in iter(lambda: audio_file.read(block_size), b""):
+        digest.update(block)
+    audio_file.seek(position)
+    return digest.hexdigest()
+
+
+def _estimate_size(result: dict) -> int:
+    """Rough in-memory size of a cached result in bytes."""
+    size = len(result.get("text") or "") * 3
+    for seg in result.get("segments") or []:
+        size += len(seg.get("text") or "") * 3 + 64
+    return size
+
+
+class ResultCache:
+    """
+    Process-local LRU cache of transcription results.
+
+    Entries are keyed on (audio SHA-256, requested language, model) and are
+    evicted when older than ``ttl_seconds`` or when the cache exceeds
+    ``max_entries`` / ``max_bytes``. Lookups in the database tier are
+    counted here as well so the stats cover both tiers.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, int, dict]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(audio_sha256: str, language: Optional[str], model: str) -> Tuple[str, str, str]:
+        return (audio_sha256, language or "auto", model)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[dict]:
+        """Return a cached result, or None. Counts a local hit on success."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, size, result = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(key)
+                self.evictions += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.local_hits += 1
+            return result
+
+    def put(self, key: Tuple[str, str, str], result: dict) -> None:
+        """Store a result and evict least recently used entries over the limits."""
+        size = _estimate_size(result)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic(), size, result)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def record_db_hit(self) -> None:
+        with self._lock:
+            self.db_hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "local_hits": self.local_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key: Tuple[str, str, str]) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+# シングルトンインスタンス
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESULT_CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS
+)
+
+result_cache_gauge.set_function(lambda: {(stat,): value for stat, value in result_cache.stats().items()})
+
+
+def get_result_cache() -> ResultCache:
+    """Dependency to get transcription result cache."""
+    return result_cache
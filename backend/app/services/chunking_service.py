@@ -0,0 +1,285 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.infrastructure import audio
+from app.infrastructure.engines.base import TranscriptionEngine
+from app.services.progress_service import JobProgress
+
+
+@dataclass
+class AudioChunk:
+    """A slice of the source audio sent to Whisper as one request."""
+
+    index: int
+    start: float       # 実際に切り出す開始位置（オーバーラップ込み）
+    end: float         # 実際に切り出す終了位置（オーバーラップ込み）
+    keep_start: float  # このチャンクが担当する区間の開始
+    keep_end: float    # このチャンクが担当する区間の終了
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def plan_chunks(
+    duration: float,
+    silences: Sequence[Tuple[float, float]],
+    chunk_seconds: float,
+    overlap_seconds: float = 2.0,
+    search_window_seconds: float = 60.0
+) -> List[AudioChunk]:
+    """
+    Split [0, duration) into chunks, cutting at silences where possible.
+
+    Each cut is placed at the middle of the latest silence that falls within
+    ``search_window_seconds`` before the target length; without one the cut
+    falls exactly at the target. Chunks are widened by ``overlap_seconds`` on
+    each side so words at a cut are not lost, while ``keep_start``/``keep_end``
+    record the non-overlapping region each chunk is responsible for.
+    """
+    boundaries = [0.0]
+    position = 0.0
+
+    while duration - position > chunk_seconds:
+        target = position + chunk_seconds
+        candidates = [
+            (start + end) / 2
+            for start, end in silences
+            if target - search_window_seconds <= (start + end) / 2 <= target
+            and (start + end) / 2 > position
+        ]
+        cut = max(candidates) if candidates else target
+        boundaries.append(cut)
+        position = cut
+
+    boundaries.append(duration)
+
+    chunks = []
+    for i in range(len(boundaries) - 1):
+        keep_start, keep_end = boundaries[i], boundaries[i + 1]
+        chunks.append(AudioChunk(
+            index=i,
+            start=max(0.0, keep_start - overlap_seconds),
+            end=min(duration, keep_end + overlap_seconds),
+            keep_start=keep_start,
+            keep_end=keep_end
+        ))
+
+    return chunks
+
+
+def merge_chunk_results(chunks: Sequence[AudioChunk], results: Sequence[dict]) -> dict:
+    """
+    Stitch per-chunk Whisper results into a single verbose_json-style result.
+
+    Segment timestamps are shifted by the chunk offset. A segment is kept
+    only by the chunk whose ``keep`` region contains its midpoint, which
+    removes duplicates produced by the overlap.
+    """
+    segments: List[dict] = []
+    languages: List[str] = []
+    last = len(chunks) - 1
+
+    for chunk, result in zip(chunks, results):
+        if result.get("language"):
+            languages.append(result["language"])
+
+        for seg in result.get("segments") or []:
+            start = seg["start"] + chunk.start
+            end = seg["end"] + chunk.start
+            midpoint = (start + end) / 2
+
+            if midpoint < chunk.keep_start:
+                continue
+            if chunk.index != last and midpoint >= chunk.keep_end:
+                continue
+
+            text = seg["text"]
+            if segments:
+                previous = segments[-1]
+                # 境界で同じ発話が両側のチャンクに現れた場合は片方のみ残す
+                if text.strip() == previous["text"].strip() and start < previous["end"]:
+                    continue
+                start = max(start, previous["end"])
+                end = max(end, start)
+
+            segments.append({"start": start, "end": end, "text": text})
+
+    return {
+        "text": "".join(seg["text"] for seg in segments).strip(),
+        "language": max(set(languages), key=languages.count) if languages else None,
+        "duration": chunks[-1].keep_end if chunks else None,
+        "segments": segments
+    }
+
+
+def _size_of(audio_file: BinaryIO) -> Optional[int]:
+    """Size of a file object in bytes, or None if it cannot be determined."""
+    try:
+        position = audio_file.tell()
+        size = audio_file.seek(0, os.SEEK_END)
+        audio_file.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
+
+
+@contextmanager
+def _as_path(audio_file: BinaryIO, filename: str) -> Iterator[str]:
+    """Yield a filesystem path for the audio, spooling to a temp file if needed."""
+    name = getattr(audio_file, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        yield name
+        return
+
+    fd, path = tempfile.mkstemp(prefix="chunk-src-", suffix=os.path.splitext(filename)[1])
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(audio_file, out, 1024 * 1024)
+        yield path
+    finally:
+        os.remove(path)
+
+
+class ChunkedTranscriber:
+    """
+    Transcribe long audio by splitting it at silences and fanning the chunks
+    out to an engine concurrently.
+
+    Audio that is shorter than ``chunk_seconds`` and below the size threshold
+    goes to Whisper in a single request, as before.
+    """
+
+    def __init__(
+        self,
+        engine: TranscriptionEngine,
+        chunk_seconds: float = 600.0,
+        overlap_seconds: float = 2.0,
+        parallelism: int = 4,
+        single_request_max_bytes: int = 24 * 1024 * 1024
+    ):
+        self.engine = engine
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.parallelism = parallelism
+        self.single_request_max_bytes = single_request_max_bytes
+
+    async def transcribe(
+        self,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str] = None,
+        duration: Optional[float] = None,
+        progress: Optional[JobProgress] = None
+    ) -> dict:
+        """
+        Transcribe audio, chunking it when it is long or large.
+
+        Args:
+            duration: Audio length if already probed
+            progress: Job progress to report each finished chunk to
+
+        Returns:
+            verbose_json-style result dict
+        """
+        if not audio.ffmpeg_available():
+            # 分割できないため、1リクエストの上限を超えるファイルはここで断る
+            size = _size_of(audio_file)
+            if size is not None and self.engine.estimate_upload_bytes(size, duration) > self.single_request_max_bytes:
+                raise HTTPException(status_code=413, detail=f"ffmpegがないため、{self.single_request_max_bytes // 1024 // 1024}MBを超える音声は文字起こしできません")
+            return await self._transcribe_single(audio_file, filename, language, duration, progress)
+
+        with _as_path(audio_file, filename) as path:
+            size = os.path.getsize(path)
+            if duration is None:
+                duration = await audio.probe_duration(path)
+
+            # 再エンコードで上限内に収まる場合も1リクエストで送る
+            upload_size = self.engine.estimate_upload_bytes(size, duration)
+            if duration <= self.chunk_seconds * 1.5 and upload_size <= self.single_request_max_bytes:
+                with open(path, "rb") as f:
+                    return await self._transcribe_single(f, filename, language, duration, progress)
+
+            silences = await audio.detect_silences(path)
+            chunks = plan_chunks(
+                duration,
+                silences,
+                chunk_seconds=self.chunk_seconds,
+                overlap_seconds=self.overlap_seconds
+            )
+            results = await self._transcribe_chunks(path, filename, chunks, language, progress)
+
+        return merge_chunk_results(chunks, results)
+
+    async def _transcribe_single(
+        self,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str],
+        duration: Optional[float] = None,
+        progress: Optional[JobProgress] = None
+    ) -> dict:
+        if progress is not None:
+            await progress.plan(1, duration)
+        result = await self.engine.transcribe(audio_file, filename, language)
+        if progress is not None:
+            await progress.chunk_done(duration)
+        return result.to_dict()
+
+    async def _transcribe_chunks(
+        self,
+        path: str,
+        filename: str,
+        chunks: Sequence[AudioChunk],
+        language: Optional[str],
+        progress: Optional[JobProgress] = None
+    ) -> List[dict]:
+        semaphore = asyncio.Semaphore(self.parallelism)
+        base_name = os.path.splitext(filename)[0]
+        if progress is not None:
+            await progress.plan(len(chunks), chunks[-1].keep_end)
+
+        with tempfile.TemporaryDirectory(prefix="chunks-") as workdir:
+            async def run(chunk: AudioChunk) -> dict:
+                async with semaphore:
+                    chunk_name = f"{base_name}_part{chunk.index:03d}.mp3"
+                    chunk_path = await audio.extract_segment(
+                        path,
+                        os.path.join(workdir, chunk_name),
+                        start=chunk.start,
+                        duration=chunk.duration
+                    )
+                    with open(chunk_path, "rb") as f:
+                        result = await self._transcribe_single(f, chunk_name, language)
+                    os.remove(chunk_path)
+                    # 進捗はオーバーラップを除いた担当区間の長さで数える
+                    if progress is not None:
+                        await progress.chunk_done(chunk.keep_end - chunk.keep_start)
+                    return result
+
+            tasks = [asyncio.create_task(run(chunk)) for chunk in chunks]
+            try:
+                return await asyncio.gather(*tasks)
+            finally:
+                # 1つでも失敗したら残りのチャンクは止め、作業ディレクトリを消す前に終了を待つ
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def create_chunked_transcriber(engine: TranscriptionEngine) -> ChunkedTranscriber:
+    """Build a chunked transcriber for an engine from application settings."""
+    return ChunkedTranscriber(
+        engine=engine,
+        chunk_seconds=settings.CHUNK_SECONDS,
+        overlap_seconds=settings.CHUNK_OVERLAP_SECONDS,
+        parallelism=settings.CHUNK_PARALLELISM
+    )
@@ -0,0 +1,396 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, BinaryIO, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import circuit_open_gauge, engine_active_gauge, engine_fallbacks_total
+from app.core.resilience import CircuitBreaker, CircuitState, LatencyTracker
+from app.domain.models import TranscriptionResult
+from app.infrastructure import audio
+from app.infrastructure.engines import EngineRegistry, EngineUnavailableError, TranscriptionEngine, engine_registry
+from app.services.chunking_service import ChunkedTranscriber, create_chunked_transcriber
+from app.services.progress_service import JobProgress
+from app.services.trimming_service import SilenceTrimmer, create_silence_trimmer
+
+# ffprobeが使えない場合に音声長をファイルサイズから推定する際のビットレート（128kbps）
+FALLBACK_BYTES_PER_SECOND = 16000
+
+
+async def probe_audio_duration(audio_file: BinaryIO) -> Optional[float]:
+    """Audio length in seconds, from ffprobe when possible, otherwise estimated from size."""
+    name = getattr(audio_file, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        if audio.ffmpeg_available():
+            try:
+                return await audio.probe_duration(name)
+            except audio.AudioToolError:
+                pass
+        return os.path.getsize(name) / FALLBACK_BYTES_PER_SECOND
+    return None
+
+
+class EngineRouter:
+    """
+    Pick a transcription engine per request.
+
+    Every available engine estimates how long the request would take on it,
+    given the audio duration, its realtime factor and how many requests it is
+    already running. The fastest engine within the latency budget wins; when
+    none fits the budget, the fastest overall is used.
+
+    With a ``hedge_engine`` (a local engine) configured, requests routed to
+    any other engine are guarded against its tail latency: once a request
+    runs longer than the ``hedge_percentile`` of recent latencies (seconds
+    per audio second), the same audio is also sent to the hedge engine and
+    the first result wins. A circuit breaker per engine counts errors and
+    overly slow requests; while it is open, requests go straight to the
+    hedge engine.
+    """
+
+    def __init__(
+        self,
+        registry: EngineRegistry,
+        default_latency_budget: float = 600.0,
+        trimmer: Optional[SilenceTrimmer] = None,
+        hedge_engine: Optional[str] = None,
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 5.0,
+        hedge_min_samples: int = 20,
+        latency_window_size: int = 200,
+        breaker_options: Optional[dict] = None
+    ):
+        self.registry = registry
+        self.default_latency_budget = default_latency_budget
+        self.trimmer = trimmer
+        self.hedge_engine = hedge_engine or None
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_window_size = latency_window_size
+        self.breaker_options = breaker_options or {}
+        self._chunkers: Dict[str, ChunkedTranscriber] = {}
+        self._latencies: Dict[str, LatencyTracker] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # 打ち切ったが、まだスレッドの終了を待っているヘッジ要求
+        self._abandoned: Set[asyncio.Task] = set()
+
+    def select(
+        self,
+        duration: Optional[float],
+        latency_budget: Optional[float] = None,
+        engine_name: Optional[str] = None
+    ) -> TranscriptionEngine:
+        """
+        Choose the engine for a request.
+
+        Args:
+            duration: Audio length in seconds, or None if unknown
+            latency_budget: Seconds the caller is willing to wait
+            engine_name: Engine explicitly requested by the caller
+
+        Raises:
+            HTTPException: If the requested engine does not exist or is unavailable
+            EngineUnavailableError: If no engine is available at all
+        """
+        if engine_name:
+            engine = self.registry.get(engine_name)
+            if engine is None or not engine.is_available():
+                raise HTTPException(status_code=400, detail=f"利用できないエンジンです: {engine_name}")
+            return engine
+
+        candidates = [engine for engine in self.registry.available() if engine.can_handle(duration)]
+        if not candidates:
+            raise EngineUnavailableError("利用可能な文字起こしエンジンがありません")
+        if duration is None:
+            # 長さが分からない場合は最も空いているエンジン
+            chosen = min(candidates, key=lambda engine: engine.active / max(engine.max_concurrency, 1))
+        else:
+            ranked = self.rank(candidates, duration)
+            budget = latency_budget or self.default_latency_budget
+            within_budget = [engine for engine, estimate in ranked if estimate <= budget]
+            chosen = within_budget[0] if within_budget else ranked[0][0]
+        return chosen
+
+    def admit(self, engine: TranscriptionEngine, duration: Optional[float]) -> TranscriptionEngine:
+        """
+        The engine to actually dispatch to: ``engine``, or the hedge engine while its breaker is open.
+
+        Call only right before sending the request, after any cache lookup:
+        in half-open state this takes the breaker's single probe.
+        """
+        fallback = self.fallback_for(engine, duration)
+        if fallback is not None and not self._breaker(engine).allow_request():
+            engine_fallbacks_total.inc(engine=fallback.name, reason="circuit_open")
+            return fallback
+        return engine
+
+    @staticmethod
+    def rank(engines: List[TranscriptionEngine], duration: float) -> List[Tuple[TranscriptionEngine, float]]:
+        """Engines ordered by estimated completion time."""
+        return sorted(
+            ((engine, engine.estimate_seconds(duration)) for engine in engines),
+            key=lambda pair: pair[1]
+        )
+
+    def fallback_for(self, engine: TranscriptionEngine, duration: Optional[float]) -> Optional[TranscriptionEngine]:
+        """The hedge engine to back ``engine`` up with, if one is configured and can take the audio."""
+        if self.hedge_engine is None or engine.name == self.hedge_engine:
+            return None
+        fallback = self.registry.get(self.hedge_engine)
+        if fallback is None or not fallback.is_available() or not fallback.can_handle(duration):
+            return None
+        return fallback
+
+    def hedge_delay(self, engine: TranscriptionEngine, duration: float) -> float:
+        """Seconds to wait on ``engine`` before also sending the request to the hedge engine."""
+        tracker = self._latency(engine)
+        if len(tracker) < self.hedge_min_samples:
+            # 実測が少ないうちはエンジン自身の見積もりの2倍を目安にする
+            delay = engine.estimate_seconds(duration) * 2
+        else:
+            delay = tracker.percentile(self.hedge_percentile) * duration
+        return max(delay, self.hedge_min_delay)
+
+    async def transcribe(
+        self,
+        engine: TranscriptionEngine,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str] = None,
+        duration: Optional[float] = None,
+        progress: Optional[JobProgress] = None,
+        hedge: bool = False
+    ) -> TranscriptionResult:
+        """
+        Run a request on the chosen engine.
+
+        Long silences are cut first (unless the engine has its own VAD) and
+        segment timestamps mapped back to the original timeline; long audio
+        is split for chunked engines. Chunk completion is reported to
+        ``progress`` in seconds of the audio actually sent.
+
+        With ``hedge``, a request that runs past the hedge delay is also sent
+        to the hedge engine; ``TranscriptionResult.engine`` tells which one
+        produced the result.
+        """
+        fallback = self.fallback_for(engine, duration)
+        if fallback is None:
+            return await self._run(engine, audio_file, filename, language, duration, progress)
+
+        path = getattr(audio_file, "name", None)
+        delay = self.hedge_delay(engine, duration) if duration else None
+        if not hedge or delay is None or not (isinstance(path, str) and os.path.isfile(path)):
+            return await self._observed(engine, self._run(engine, audio_file, filename, language, duration, progress), duration, delay)
+
+        return await self._hedged(engine, fallback, path, filename, language, duration, progress, delay)
+
+    async def _hedged(
+        self,
+        engine: TranscriptionEngine,
+        fallback: TranscriptionEngine,
+        path: str,
+        filename: str,
+        language: Optional[str],
+        duration: float,
+        progress: Optional[JobProgress],
+        delay: float
+    ) -> TranscriptionResult:
+        started = time.monotonic()
+        primary = asyncio.create_task(
+            self._observed(engine, self._run_path(engine, path, filename, language, duration, progress), duration, delay)
+        )
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done and primary.exception() is not None:
+            # 本来のエンジンがリトライ後も失敗した場合は予備エンジンでやり直す
+            engine_fallbacks_total.inc(engine=fallback.name, reason="error")
+            return await self._run_path(fallback, path, filename, language, duration, progress)
+        # 予備エンジンが埋まっている場合は待たせても速くならないので投げない
+        if done or fallback.active >= fallback.max_concurrency:
+            return await primary
+
+        engine_fallbacks_total.inc(engine=fallback.name, reason="hedge")
+        if progress is not None:
+            await progress.set_stage("hedging")
+        winner = None
+        backup = asyncio.create_task(self._run_path(fallback, path, filename, language, duration, None))
+        pending = {primary, backup}
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+        finally:
+            # 負けた側はスレッドが終わるまでスロットを持ち続けるので、待たずに切り離す
+            for task in pending:
+                task.cancel()
+                self._abandoned.add(task)
+                task.add_done_callback(self._abandoned.discard)
+
+        if winner is None:
+            # 両方失敗した場合は本来のエンジンのエラーを返す
+            return primary.result()
+        if winner is backup:
+            engine_fallbacks_total.inc(engine=fallback.name, reason="hedge_won")
+            if not primary.done():
+                # 打ち切った分も下限値として記録し、遅延の裾を実測から消さない
+                self._latency(engine).observe((time.monotonic() - started) / duration)
+                self._breaker(engine).record(False)
+        return winner.result()
+
+    async def _observed(
+        self,
+        engine: TranscriptionEngine,
+        request: Awaitable[TranscriptionResult],
+        duration: Optional[float],
+        delay: Optional[float]
+    ) -> TranscriptionResult:
+        """Await a request, recording its latency and whether it succeeded in time for the breaker."""
+        started = time.monotonic()
+        try:
+            result = await request
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._breaker(engine).record(False)
+            raise
+        elapsed = time.monotonic() - started
+        if duration:
+            self._latency(engine).observe(elapsed / duration)
+        self._breaker(engine).record(delay is None or elapsed <= delay)
+        return result
+
+    async def _run_path(
+        self,
+        engine: TranscriptionEngine,
+        path: str,
+        filename: str,
+        language: Optional[str],
+        duration: Optional[float],
+        progress: Optional[JobProgress]
+    ) -> TranscriptionResult:
+        # ファイルを自前で開き、呼び出し元より長く動いても閉じられないようにする
+        with open(path, "rb") as f:
+            return await self._run(engine, f, filename, language, duration, progress)
+
+    async def _run(
+        self,
+        engine: TranscriptionEngine,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str],
+        duration: Optional[float],
+        progress: Optional[JobProgress]
+    ) -> TranscriptionResult:
+        path = getattr(audio_file, "name", None)
+        if self.trimmer is None or engine.builtin_vad or not (isinstance(path, str) and os.path.isfile(path)):
+            return await self._transcribe(engine, audio_file, filename, language, duration, progress)
+
+        async with self.trimmer.trim(path, duration) as trimmed:
+            if trimmed is None:
+                return await self._transcribe(engine, audio_file, filename, language, duration, progress)
+
+            trimmed_path, timeline = trimmed
+            with open(trimmed_path, "rb") as f:
+                result = await self._transcribe(
+                    engine,
+                    f,
+                    os.path.splitext(filename)[0] + os.path.splitext(trimmed_path)[1],
+                    language,
+                    timeline.trimmed_duration,
+                    progress
+                )
+            return timeline.remap(result, duration)
+
+    async def _transcribe(
+        self,
+        engine: TranscriptionEngine,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str],
+        duration: Optional[float],
+        progress: Optional[JobProgress] = None
+    ) -> TranscriptionResult:
+        async with engine.slot(duration):
+            if not engine.chunked:
+                if progress is not None:
+                    await progress.plan(1, duration)
+                result = await engine.transcribe(audio_file, filename, language, duration=duration)
+                if progress is not None:
+                    await progress.chunk_done(duration)
+                return result
+
+            result = await self._chunker(engine).transcribe(
+                audio_file=audio_file,
+                filename=filename,
+                language=language,
+                duration=duration if audio.ffmpeg_available() else None,
+                progress=progress
+            )
+            return TranscriptionResult.from_dict(result, engine=engine.name)
+
+    def stats(self) -> Dict[str, dict]:
+        stats = self.registry.stats()
+        for name, engine_stats in stats.items():
+            if name in self._latencies:
+                engine_stats["latency_per_audio_second"] = self._latencies[name].stats()
+            if name in self._breakers:
+                engine_stats["circuit"] = self._breakers[name].stats()
+        return stats
+
+    def circuit_states(self) -> Dict[str, CircuitState]:
+        return {name: breaker.state for name, breaker in self._breakers.items()}
+
+    def _latency(self, engine: TranscriptionEngine) -> LatencyTracker:
+        tracker = self._latencies.get(engine.name)
+        if tracker is None:
+            tracker = self._latencies[engine.name] = LatencyTracker(self.latency_window_size)
+        return tracker
+
+    def _breaker(self, engine: TranscriptionEngine) -> CircuitBreaker:
+        breaker = self._breakers.get(engine.name)
+        if breaker is None:
+            breaker = self._breakers[engine.name] = CircuitBreaker(**self.breaker_options)
+        return breaker
+
+    def _chunker(self, engine: TranscriptionEngine) -> ChunkedTranscriber:
+        chunker = self._chunkers.get(engine.name)
+        if chunker is None:
+            chunker = self._chunkers[engine.name] = create_chunked_transcriber(engine)
+        return chunker
+
+
+# シングルトンインスタンス
+engine_router = EngineRouter(
+    registry=engine_registry,
+    default_latency_budget=settings.DEFAULT_LATENCY_BUDGET_SECONDS,
+    trimmer=create_silence_trimmer(),
+    hedge_engine=settings.HEDGE_ENGINE,
+    hedge_percentile=settings.HEDGE_PERCENTILE,
+    hedge_min_delay=settings.HEDGE_MIN_DELAY_SECONDS,
+    hedge_min_samples=settings.HEDGE_MIN_SAMPLES,
+    latency_window_size=settings.LATENCY_WINDOW_SIZE,
+    breaker_options=dict(
+        failure_ratio=settings.CIRCUIT_FAILURE_RATIO,
+        min_calls=settings.CIRCUIT_MIN_CALLS,
+        window_size=settings.CIRCUIT_WINDOW_SIZE,
+        cooldown_seconds=settings.CIRCUIT_COOLDOWN_SECONDS
+    )
+)
+
+engine_active_gauge.set_function(
+    lambda: {(name,): stats["active"] for name, stats in engine_router.registry.stats().items()}
+)
+circuit_open_gauge.set_function(
+    lambda: {(name,): int(state != CircuitState.CLOSED) for name, state in engine_router.circuit_states().items()}
+)
+
+
+def get_engine_router() -> EngineRouter:
+    """Dependency to get the transcription engine router."""
+    return engine_router
@@ -0,0 +1,159 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.subtitles import format_cue, iter_cues
+
+# 形式ごとのContent-Typeと拡張子
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "srt": ("application/x-subrip; charset=utf-8", "srt"),
+    "vtt": ("text/vtt; charset=utf-8", "vtt"),
+    "txt": ("text/plain; charset=utf-8", "txt"),
+    "json": ("application/json", "json"),
+}
+
+# 細かいセグメントごとに送らず、この程度にまとめて送る
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# JSON出力に含めるカラム
+EXPORT_COLUMNS = "id, title, original_filename, text, language, duration_seconds, segments, created_at, updated_at"
+
+
+def render_srt(record: dict) -> Iterator[str]:
+    for index, seg, text in iter_cues(record.get("segments") or []):
+        yield format_cue(index, seg.get("start"), seg.get("end"), text)
+
+
+def render_vtt(record: dict) -> Iterator[str]:
+    yield "WEBVTT\n\n"
+    for index, seg, text in iter_cues(record.get("segments") or []):
+        yield format_cue(index, seg.get("start"), seg.get("end"), text, decimal_marker=".")
+
+
+def render_txt(record: dict) -> Iterator[str]:
+    segments = record.get("segments") or []
+    if not segments:
+        yield record.get("text") or ""
+        return
+    # セグメントがあれば1行1セグメントで出力
+    for _, _, text in iter_cues(segments):
+        yield text + "\n"
+
+
+def render_json(record: dict) -> Iterator[str]:
+    header = {key: value for key, value in record.items() if key != "segments"}
+    yield json.dumps(header, ensure_ascii=False)[:-1] + ', "segments": ['
+    for i, seg in enumerate(record.get("segments") or []):
+        segment = {"start": seg.get("start"), "end": seg.get("end"), "text": seg.get("text")}
+        yield ("," if i else "") + json.dumps(segment, ensure_ascii=False)
+    yield "]}"
+
+
+RENDERERS: Dict[str, Callable[[dict], Iterator[str]]] = {
+    "srt": render_srt,
+    "vtt": render_vtt,
+    "txt": render_txt,
+    "json": render_json,
+}
+
+
+class ExportCache:
+    """
+    LRU cache of rendered exports keyed by (transcription id, updated_at, format).
+
+    An edit changes ``updated_at``, so stale renderings are never served;
+    they simply age out.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Tuple[str, str, str], body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = body
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def invalidate(self, transcription_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == transcription_id]:
+                self._bytes -= len(self._entries.pop(key))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+def stream_export(record: dict, export_format: str, cache: ExportCache) -> Iterator[bytes]:
+    """
+    Render a transcription segment by segment, storing the complete output in the cache.
+
+    Rendered pieces are sent in blocks of about ``STREAM_BLOCK_SIZE`` bytes.
+    If the client disconnects before the end, nothing is cached.
+    """
+    key = (record["id"], record.get("updated_at") or "", export_format)
+    cached: Optional[List[bytes]] = []
+    cached_size = 0
+    block: List[bytes] = []
+    block_size = 0
+
+    for piece in RENDERERS[export_format](record):
+        data = piece.encode("utf-8")
+        block.append(data)
+        block_size += len(data)
+        if block_size < STREAM_BLOCK_SIZE:
+            continue
+
+        chunk = b"".join(block)
+        block, block_size = [], 0
+        # 上限を超えたらキャッシュ用のコピーは諦めて配信だけ続ける
+        if cached is not None:
+            cached_size += len(chunk)
+            if cached_size <= cache.max_bytes:
+                cached.append(chunk)
+            else:
+                cached = None
+        yield chunk
+
+    chunk = b"".join(block)
+    if chunk:
+        yield chunk
+    if cached is not None:
+        cache.put(key, b"".join(cached) + chunk)
+
+
+# シングルトンインスタンス
+export_cache = ExportCache(
+    max_entries=settings.EXPORT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.EXPORT_CACHE_MAX_MB * 1024 * 1024
+)
+
+
+def get_export_cache() -> ExportCache:
+    """Dependency to get the rendered export cache."""
+    return export_cache
@@ -1,6 +1,16 @@
+import hashlib
+import os
+import tempfile
 import magic
-from fastapi import UploadFile, HTTPException
-from typing import Set
+from dataclasses import dataclass, field
+from fastapi import HTTPException, Request
+from python_multipart import MultipartParser
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+from typing import BinaryIO, Dict, Optional, Set
+from app.core.config import settings
+from app.core.metrics import bytes_processed, track_stage
+from app.infrastructure import audio
 
 # 許可する拡張子
 ALLOWED_EXTENSIONS: Set[str] = {"mp3", "mp4", "wav", "m4a", "webm", "mpeg", "mpga", "oga", "ogg"}
@@ -23,29 +33,86 @@ ALLOWED_MIME_TYPES: Set[str] = {
     "application/ogg"
 }
 
-# 最大ファイルサイズ（25MB - OpenAI制限）
-MAX_FILE_SIZE = 25 * 1024 * 1024
+# 最大ファイルサイズ（OpenAIの25MB制限を超える音声はチャンク分割して送信）
+MAX_FILE_SIZE = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+
+# ffmpegがなく分割できない場合の上限（OpenAI APIの1リクエストあたりの上限）
+WHOLE_FILE_MAX_SIZE = 25 * 1024 * 1024
+
+# MIMEタイプの判定に使う先頭バイト数
+SNIFF_BYTES = 2048
+
+# 音声以外のフォーム項目（言語・タイトルなど）の上限
+MAX_FORM_FIELD_SIZE = 64 * 1024
+
+# 音声本体以外にmultipartの境界・ヘッダー・フォーム項目が占める分の余裕
+MULTIPART_OVERHEAD = 1024 * 1024
+
+
+@dataclass
+class IngestedUpload:
+    """An upload streamed to a temp file, with its size, hash and MIME type."""
+
+    path: str
+    size: int
+    sha256: str
+    mime_type: str
+
+    def discard(self) -> None:
+        """Delete the temp file."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class MultipartUpload:
+    """The audio part of a multipart request, already on disk, plus the other form fields."""
+
+    upload: IngestedUpload
+    filename: str
+    fields: Dict[str, str] = field(default_factory=dict)
+
+
+def max_file_size() -> int:
+    """
+    Largest upload accepted right now.
+
+    Without ffmpeg long audio cannot be split, so the whole file goes to
+    the OpenAI API in one request and its 25MB limit applies.
+    """
+    if audio.ffmpeg_available():
+        return MAX_FILE_SIZE
+    return min(MAX_FILE_SIZE, WHOLE_FILE_MAX_SIZE)
+
+
+def _too_large(limit: int, status_code: int = 413, size: Optional[int] = None) -> HTTPException:
+    detail = f"ファイルサイズが大きすぎます（最大{limit // 1024 // 1024}MB）"
+    if size is not None:
+        detail += f"。現在: {size / 1024 / 1024:.1f}MB"
+    return HTTPException(status_code=status_code, detail=detail)
 
 
 class FileService:
     """Service for file validation and processing."""
 
-    def validate_audio_file(self, file: UploadFile) -> None:
+    def validate_filename_and_size(self, filename: Optional[str], size: Optional[int]) -> None:
         """
-        Validate uploaded audio file.
+        Validate the name and declared size of an audio file before receiving it.
 
         Raises:
             HTTPException: If validation fails
         """
         # 1. ファイル名チェック
-        if not file.filename:
+        if not filename:
             raise HTTPException(
                 status_code=400,
                 detail="ファイル名が必要です"
             )
 
         # 2. 拡張子チェック
-        ext = file.filename.rsplit(".", 1)[-1].lower() if "." in file.filename else ""
+        ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
         if ext not in ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
@@ -53,21 +120,23 @@ class FileService:
             )
 
         # 3. サイズチェック
-        if file.size and file.size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"ファイルサイズが大きすぎます（最大25MB）。現在: {file.size / 1024 / 1024:.1f}MB"
-            )
+        limit = max_file_size()
+        if size and size > limit:
+            raise _too_large(limit, status_code=400, size=size)
 
-    def validate_file_content(self, file_content: bytes) -> None:
+    def validate_file_content(self, file_content: bytes) -> str:
         """
         Validate file content using magic numbers.
 
+        Returns:
+            Detected MIME type
+
         Raises:
             HTTPException: If validation fails
         """
         # MIMEタイプをマジックナンバーから検出
-        mime_type = magic.from_buffer(file_content[:2048], mime=True)
+        with track_stage("validate_content"):
+            mime_type = magic.from_buffer(file_content[:SNIFF_BYTES], mime=True)
 
         if mime_type not in ALLOWED_MIME_TYPES:
             raise HTTPException(
@@ -75,6 +144,50 @@ class FileService:
                 detail=f"不正なファイル形式です。検出されたタイプ: {mime_type}"
             )
 
+        return mime_type
+
+    async def ingest_multipart(self, request: Request, file_field: str = "file") -> MultipartUpload:
+        """
+        Parse a multipart/form-data request body as it arrives, writing the audio part to a temp file.
+
+        The body is read straight from the request stream, so the size limit
+        is enforced while bytes come in and the upload is written to disk
+        once, without being spooled by the framework first. The MIME type is
+        sniffed from the start of the audio, and size and SHA-256 are
+        computed on the fly. The caller owns the returned temp file.
+
+        Raises:
+            HTTPException: If the body is not multipart, has no or more than
+                one audio file, or the audio is invalid, empty or too large
+        """
+        limit = max_file_size()
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise HTTPException(status_code=400, detail="multipart/form-data で送信してください")
+
+        # Content-Length が分かる場合は本文を読む前に断る
+        declared = request.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > limit + MULTIPART_OVERHEAD:
+            raise _too_large(limit)
+
+        receiver = _MultipartReceiver(self, file_field, limit)
+        parser = MultipartParser(params[b"boundary"], receiver.callbacks())
+        try:
+            # 受信・ハッシュ計算・一時ファイルへの書き込みを含むアップロード処理全体を計測
+            with track_stage("upload_read"):
+                async for chunk in request.stream():
+                    parser.write(chunk)
+                parser.finalize()
+            return receiver.result()
+        except MultipartParseError:
+            receiver.discard()
+            raise HTTPException(status_code=400, detail="multipartの形式が不正です")
+        except BaseException:
+            receiver.discard()
+            raise
+        finally:
+            bytes_processed.inc(receiver.size)
+
     def sanitize_filename(self, filename: str) -> str:
         """
         Sanitize filename to prevent path traversal attacks.
@@ -103,6 +216,121 @@ class FileService:
         return filename
 
 
+class _MultipartReceiver:
+    """python-multipart callbacks that write the audio part to a temp file as it arrives."""
+
+    def __init__(self, service: FileService, file_field: str, limit: int):
+        self.service = service
+        self.file_field = file_field
+        self.limit = limit
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.path: Optional[str] = None
+        self.size = 0
+        self.mime_type: Optional[str] = None
+        self._out: Optional[BinaryIO] = None
+        self._digest = hashlib.sha256()
+        self._head = bytearray()
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._field_name: Optional[str] = None
+        self._in_file = False
+        self._data = bytearray()
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._field_name = None
+        self._in_file = False
+        self._data = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        self._field_name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        if b"filename" not in options:
+            return
+        if self._field_name != self.file_field or self.path is not None:
+            raise HTTPException(status_code=400, detail="音声ファイルは1つだけ送信してください")
+
+        # 拡張子は本体を受信する前に検証
+        filename = self.service.sanitize_filename(options[b"filename"].decode("utf-8", errors="replace") or "audio")
+        self.service.validate_filename_and_size(filename, None)
+        self.filename = filename
+        fd, self.path = tempfile.mkstemp(prefix="upload-", suffix=os.path.splitext(filename)[1])
+        self._out = os.fdopen(fd, "wb")
+        self._in_file = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        chunk = data[start:end]
+        if not self._in_file:
+            self._data.extend(chunk)
+            if len(self._data) > MAX_FORM_FIELD_SIZE:
+                raise HTTPException(status_code=400, detail="フォーム項目が大きすぎます")
+            return
+
+        self.size += len(chunk)
+        if self.size > self.limit:
+            raise _too_large(self.limit)
+        # 先頭が揃ってからMIMEタイプを検証
+        if self.mime_type is None:
+            self._head.extend(chunk[:SNIFF_BYTES])
+            if len(self._head) >= SNIFF_BYTES:
+                self.mime_type = self.service.validate_file_content(bytes(self._head))
+        self._digest.update(chunk)
+        self._out.write(chunk)
+
+    def on_part_end(self) -> None:
+        if not self._in_file:
+            if self._field_name:
+                self.fields[self._field_name] = self._data.decode("utf-8", errors="replace")
+            return
+
+        self._in_file = False
+        self._out.close()
+        if self.size == 0:
+            raise HTTPException(status_code=400, detail="ファイルが空です")
+        if self.mime_type is None:
+            self.mime_type = self.service.validate_file_content(bytes(self._head))
+
+    def result(self) -> MultipartUpload:
+        if self.path is None or self._in_file:
+            raise HTTPException(status_code=400, detail="音声ファイル（file）が必要です")
+        upload = IngestedUpload(path=self.path, size=self.size, sha256=self._digest.hexdigest(), mime_type=self.mime_type)
+        return MultipartUpload(upload=upload, filename=self.filename, fields=self.fields)
+
+    def discard(self) -> None:
+        if self._out is not None:
+            self._out.close()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
 # シングルトンインスタンス
 file_service = FileService()
 
@@ -0,0 +1,372 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import admission_rejections_total, errors_total, jobs_gauge, stage_duration
+from app.services.progress_service import JobProgress, ProgressBroker, get_progress_broker
+from app.services.transcription_service import TranscriptionService, get_transcription_service
+
+
+class JobStatus(str, Enum):
+    """Lifecycle states of a transcription job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class TranscriptionJob:
+    """A transcription request waiting for or being processed by a worker."""
+
+    id: str
+    user_id: str
+    filename: str
+    audio_path: str
+    language: Optional[str] = None
+    title: Optional[str] = None
+    audio_sha256: Optional[str] = None
+    engine: Optional[str] = None
+    latency_budget: Optional[float] = None
+    transcription_id: Optional[str] = None
+    storage_path: Optional[str] = None
+    status: JobStatus = JobStatus.QUEUED
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    progress: Optional[JobProgress] = field(default=None, repr=False)
+    # 失敗時に呼ぶ後始末（再開可能アップロードのパート削除など）
+    on_failure: Optional[Callable[["TranscriptionJob"], Awaitable[None]]] = field(default=None, repr=False)
+
+    # 経過時間の計測用（単調増加クロック）
+    _queued_mono: float = field(default_factory=time.monotonic, repr=False)
+    _started_mono: Optional[float] = field(default=None, repr=False)
+    _finished_mono: Optional[float] = field(default=None, repr=False)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
+
+    def to_dict(self) -> dict:
+        """Serialize job state for API responses."""
+        now = time.monotonic()
+        wait_end = self._started_mono or self._finished_mono or now
+        queued_seconds = wait_end - self._queued_mono
+        processing_seconds = None
+        if self._started_mono is not None:
+            processing_seconds = (self._finished_mono or now) - self._started_mono
+
+        return {
+            "id": self.id,
+            "status": self.status.value,
+            "filename": self.filename,
+            "language": self.language,
+            "title": self.title,
+            "engine": self.engine,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "queued_seconds": round(queued_seconds, 3),
+            "processing_seconds": round(processing_seconds, 3) if processing_seconds is not None else None,
+            "transcription_id": self.result.get("id") if self.result else None,
+            "error": self.error,
+            "progress": self.progress.to_dict() if self.progress and self.status == JobStatus.RUNNING else None,
+        }
+
+
+class JobQueue:
+    """
+    In-process transcription job queue with a bounded worker pool.
+
+    Jobs reference audio already saved to disk and return immediately;
+    a fixed number of worker tasks pull jobs from the queue and run
+    ``TranscriptionService.transcribe_and_save``. Job state lives in memory
+    of the current process; progress is published to the progress broker
+    on a channel named after the job id.
+
+    Admission is bounded twice: each user may have at most
+    ``max_jobs_per_user`` jobs queued or running (429), and the wait queue
+    holds at most ``max_queue_size`` jobs (503). Both rejections carry a
+    ``Retry-After`` estimated from recent job durations.
+    """
+
+    # 直近のジョブ処理時間の平滑化係数（Retry-Afterの見積もりに使う）
+    DURATION_SMOOTHING = 0.2
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue_size: int = 100,
+        max_retained_jobs: int = 1000,
+        max_jobs_per_user: int = 0,
+        broker: Optional[ProgressBroker] = None
+    ):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.max_retained_jobs = max_retained_jobs
+        self.max_jobs_per_user = max_jobs_per_user
+        self.avg_job_seconds = 30.0
+        self._outstanding: Dict[str, int] = {}
+        self.broker = broker or get_progress_broker()
+        self._jobs: "OrderedDict[str, TranscriptionJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._service: Optional[TranscriptionService] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self, service: Optional[TranscriptionService] = None) -> None:
+        """Start worker tasks. Called from the application lifespan."""
+        if self.running:
+            return
+
+        self._service = service or get_transcription_service()
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"transcription-worker-{i}")
+            for i in range(self.max_workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel worker tasks and discard spooled audio of unfinished jobs."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        for job in self._jobs.values():
+            if not job.is_finished:
+                self._discard_audio(job)
+        self._outstanding.clear()
+
+    async def submit(
+        self,
+        audio_path: str,
+        filename: str,
+        user_id: str,
+        language: Optional[str] = None,
+        title: Optional[str] = None,
+        audio_sha256: Optional[str] = None,
+        engine: Optional[str] = None,
+        latency_budget: Optional[float] = None,
+        transcription_id: Optional[str] = None,
+        storage_path: Optional[str] = None,
+        on_failure: Optional[Callable[[TranscriptionJob], Awaitable[None]]] = None
+    ) -> TranscriptionJob:
+        """
+        Enqueue a transcription job for audio already saved to disk.
+
+        The job takes ownership of ``audio_path`` and deletes it when done,
+        or immediately if the job cannot be queued. ``on_failure`` is awaited
+        after the job fails (not when it is cancelled at shutdown).
+
+        Raises:
+            HTTPException: If the user has too many jobs, or the queue is full or not running
+        """
+        job = TranscriptionJob(
+            id=str(uuid4()),
+            user_id=user_id,
+            filename=filename,
+            audio_path=audio_path,
+            language=language,
+            title=title,
+            audio_sha256=audio_sha256,
+            engine=engine,
+            latency_budget=latency_budget,
+            transcription_id=transcription_id,
+            storage_path=storage_path,
+            on_failure=on_failure
+        )
+
+        try:
+            self.check_admission(user_id)
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._discard_audio(job)
+            raise self._queue_full_error()
+        except HTTPException:
+            self._discard_audio(job)
+            raise
+
+        self._outstanding[user_id] = self._outstanding.get(user_id, 0) + 1
+        self._jobs[job.id] = job
+        self._prune()
+
+        return job
+
+    def check_admission(self, user_id: str) -> None:
+        """
+        Reject early, before any audio is read or assembled, if a job could not be queued now.
+
+        Called ahead of the upload body in ``POST /transcriptions`` and ahead
+        of part assembly when a resumable upload completes; ``submit``
+        checks again, since the queue may fill up in between.
+
+        Raises:
+            HTTPException: 429 if the user is at their job limit, 503 if the queue is full or not running
+        """
+        if not self.running:
+            raise HTTPException(status_code=503, detail="文字起こしキューが起動していません")
+
+        if self.max_jobs_per_user and self._outstanding.get(user_id, 0) >= self.max_jobs_per_user:
+            admission_rejections_total.inc(reason="user_limit")
+            raise HTTPException(
+                status_code=429,
+                detail=f"同時に処理できる文字起こしは{self.max_jobs_per_user}件までです。完了を待ってから再試行してください",
+                headers={"Retry-After": str(self._retry_after(self.avg_job_seconds))}
+            )
+
+        if self._queue.full():
+            raise self._queue_full_error()
+
+    def retry_after_seconds(self) -> int:
+        """Rough time until a queue slot frees up, for ``Retry-After``."""
+        depth = self._queue.qsize() if self._queue else 0
+        return self._retry_after(self.avg_job_seconds * (depth + 1) / max(self.max_workers, 1))
+
+    @staticmethod
+    def _retry_after(seconds: float) -> int:
+        return min(max(math.ceil(seconds), 1), 300)
+
+    def _queue_full_error(self) -> HTTPException:
+        admission_rejections_total.inc(reason="queue_full")
+        return HTTPException(
+            status_code=503,
+            detail="文字起こしキューが混雑しています。しばらくしてから再試行してください",
+            headers={"Retry-After": str(self.retry_after_seconds())}
+        )
+
+    def get_job(self, job_id: str, user_id: str) -> Optional[TranscriptionJob]:
+        """Get a job owned by the user."""
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    def list_jobs(self, user_id: str, status: Optional[JobStatus] = None) -> List[TranscriptionJob]:
+        """List the user's jobs, newest first."""
+        return [
+            job for job in reversed(self._jobs.values())
+            if job.user_id == user_id and (status is None or job.status == status)
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        """Counts of jobs by status plus queue depth."""
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            counts[job.status.value] += 1
+        counts["queue_depth"] = self._queue.qsize() if self._queue else 0
+        counts["workers"] = len(self._workers)
+        return counts
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: TranscriptionJob) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        job._started_mono = time.monotonic()
+        job.progress = JobProgress(self.broker, job.id)
+        stage_duration.observe(job._started_mono - job._queued_mono, stage="queue_wait")
+
+        try:
+            with open(job.audio_path, "rb") as audio_file:
+                job.result = await self._service.transcribe_and_save(
+                    audio_file=audio_file,
+                    filename=job.filename,
+                    user_id=job.user_id,
+                    language=job.language,
+                    title=job.title,
+                    audio_sha256=job.audio_sha256,
+                    engine=job.engine,
+                    latency_budget=job.latency_budget,
+                    transcription_id=job.transcription_id,
+                    storage_path=job.storage_path,
+                    progress=job.progress
+                )
+            job.status = JobStatus.DONE
+        except asyncio.CancelledError:
+            job.status = JobStatus.FAILED
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = f"文字起こしに失敗しました: {str(e)}"
+            errors_total.inc(stage="job", type=type(e).__name__)
+            if job.on_failure is not None:
+                try:
+                    await job.on_failure(job)
+                except Exception as cleanup_error:
+                    errors_total.inc(stage="job_cleanup", type=type(cleanup_error).__name__)
+        finally:
+            job.finished_at = datetime.utcnow()
+            job._finished_mono = time.monotonic()
+            stage_duration.observe(job._finished_mono - job._queued_mono, stage="job_total")
+            processing = job._finished_mono - job._started_mono
+            self.avg_job_seconds += self.DURATION_SMOOTHING * (processing - self.avg_job_seconds)
+            self._release(job.user_id)
+            self._discard_audio(job)
+            await job.progress.finish(
+                job.status.value,
+                transcription_id=job.result.get("id") if job.result else None,
+                error=job.error
+            )
+
+    def _release(self, user_id: str) -> None:
+        remaining = self._outstanding.get(user_id, 0) - 1
+        if remaining > 0:
+            self._outstanding[user_id] = remaining
+        else:
+            self._outstanding.pop(user_id, None)
+
+    def _discard_audio(self, job: TranscriptionJob) -> None:
+        try:
+            os.remove(job.audio_path)
+        except FileNotFoundError:
+            pass
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs once the retention limit is exceeded."""
+        excess = len(self._jobs) - self.max_retained_jobs
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.is_finished][:excess]:
+            del self._jobs[job_id]
+
+
+# シングルトンインスタンス
+job_queue = JobQueue(
+    max_workers=settings.TRANSCRIPTION_WORKERS,
+    max_queue_size=settings.TRANSCRIPTION_QUEUE_SIZE,
+    max_retained_jobs=settings.TRANSCRIPTION_JOB_RETENTION,
+    max_jobs_per_user=settings.TRANSCRIPTION_MAX_JOBS_PER_USER
+)
+
+
+# 実行中・待機中のジョブ数はスクレイプ時に集計する
+jobs_gauge.set_function(lambda: {(status,): count for status, count in job_queue.stats().items() if status not in ("workers", "queue_depth")})
+
+
+def get_job_queue() -> JobQueue:
+    """Dependency to get transcription job queue."""
+    return job_queue
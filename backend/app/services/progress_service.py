@@ -0,0 +1,168 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncIterator, Dict, Optional, Set
+
+from app.core.config import settings
+
+
+class ProgressSubscription:
+    """Events published on one channel since the subscription started."""
+
+    def __init__(self, max_pending: int = 100):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+
+    def put(self, event: dict) -> None:
+        # 読み出しが遅い購読者のために配信側を止めない（古い途中経過から捨てる）
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Next event, or None if nothing arrives within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ProgressBroker(ABC):
+    """
+    Pub/sub for job progress events, one channel per job.
+
+    The in-process implementation only reaches subscribers connected to the
+    same worker process; a shared implementation (Redis, Postgres
+    LISTEN/NOTIFY) can replace it behind the same interface.
+    """
+
+    @abstractmethod
+    async def publish(self, channel: str, event: dict) -> None:
+        """Send an event to everyone subscribed to the channel."""
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> AsyncContextManager[ProgressSubscription]:
+        """Async context manager yielding a subscription to the channel."""
+
+
+class InMemoryProgressBroker(ProgressBroker):
+    """Progress broker for a single process."""
+
+    def __init__(self, max_pending: int = 100):
+        self.max_pending = max_pending
+        self._channels: Dict[str, Set[ProgressSubscription]] = {}
+
+    async def publish(self, channel: str, event: dict) -> None:
+        for subscription in self._channels.get(channel, ()):
+            subscription.put(event)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[ProgressSubscription]:
+        subscription = ProgressSubscription(self.max_pending)
+        self._channels.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._channels.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(subscribers) for subscribers in self._channels.values()),
+        }
+
+
+class JobProgress:
+    """
+    Progress of one transcription job, published to the broker as it changes.
+
+    The ETA starts from the engine's realtime factor and switches to the
+    factor measured on this job once the first chunk is done.
+    """
+
+    def __init__(self, broker: ProgressBroker, job_id: str):
+        self.broker = broker
+        self.job_id = job_id
+        self.stage = "queued"
+        self.engine: Optional[str] = None
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.audio_seconds_total: Optional[float] = None
+        self.audio_seconds_done = 0.0
+        self.estimated_realtime_factor: Optional[float] = None
+        self._started: Optional[float] = None
+
+    @property
+    def realtime_factor(self) -> Optional[float]:
+        """Processing seconds per audio second, measured once chunks complete."""
+        if self._started is None or self.audio_seconds_done <= 0:
+            return self.estimated_realtime_factor
+        return (time.monotonic() - self._started) / self.audio_seconds_done
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        if self.audio_seconds_total is None or self.realtime_factor is None:
+            return None
+        remaining = max(self.audio_seconds_total - self.audio_seconds_done, 0.0)
+        return remaining * self.realtime_factor
+
+    async def set_stage(self, stage: str, engine: Optional[str] = None, realtime_factor: Optional[float] = None) -> None:
+        """Move to a new stage (probing, transcribing, saving, ...)."""
+        self.stage = stage
+        if engine is not None:
+            self.engine = engine
+        if realtime_factor is not None:
+            self.estimated_realtime_factor = realtime_factor
+        await self.publish()
+
+    async def plan(self, chunks_total: int, audio_seconds: Optional[float]) -> None:
+        """Record how the audio was split, right before the engine starts on it."""
+        self.chunks_total = chunks_total
+        self.chunks_done = 0
+        self.audio_seconds_done = 0.0
+        if audio_seconds:
+            self.audio_seconds_total = audio_seconds
+        self._started = time.monotonic()
+        await self.publish()
+
+    async def chunk_done(self, audio_seconds: Optional[float]) -> None:
+        self.chunks_done += 1
+        self.audio_seconds_done += audio_seconds or 0.0
+        await self.publish()
+
+    async def finish(self, status: str, **fields) -> None:
+        """Publish the final event of the job; subscribers stop after it."""
+        await self.broker.publish(self.job_id, {"job_id": self.job_id, "status": status, "final": True, **fields})
+
+    def to_dict(self) -> dict:
+        rtf = self.realtime_factor
+        eta = self.eta_seconds
+        return {
+            "job_id": self.job_id,
+            "status": "running",
+            "stage": self.stage,
+            "engine": self.engine,
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "audio_seconds_processed": round(self.audio_seconds_done, 1),
+            "audio_seconds_total": round(self.audio_seconds_total, 1) if self.audio_seconds_total else None,
+            "realtime_factor": round(rtf, 4) if rtf is not None else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "final": False,
+        }
+
+    async def publish(self) -> None:
+        await self.broker.publish(self.job_id, self.to_dict())
+
+
+# シングルトンインスタンス
+progress_broker = InMemoryProgressBroker(max_pending=settings.PROGRESS_MAX_PENDING_EVENTS)
+
+
+def get_progress_broker() -> ProgressBroker:
+    """Dependency to get the job progress broker."""
+    return progress_broker
@@ -0,0 +1,116 @@
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from app.core.config import settings
+
+
+class SegmentIndex:
+    """
+    Compact, time-sorted index over a transcription's segments.
+
+    Start/end times are stored in parallel float arrays and all segment
+    texts in one string addressed by an offsets array, so a long transcript
+    costs a few bytes per segment instead of one dict per segment, and a
+    time window is found by binary search. ``max_ends`` holds the running
+    maximum of end times, so a long segment that overlaps later ones is
+    still found by a search on a sorted array.
+    """
+
+    __slots__ = ("user_id", "updated_at", "starts", "ends", "max_ends", "offsets", "text")
+
+    def __init__(self, segments: Sequence[dict], user_id: str, updated_at: Optional[str] = None):
+        self.user_id = user_id
+        self.updated_at = updated_at
+        self.starts = array("d")
+        self.ends = array("d")
+        self.max_ends = array("d")
+        self.offsets = array("I", [0])
+
+        ordered = sorted(segments, key=lambda seg: seg.get("start", 0.0))
+        parts = []
+        position = 0
+        for seg in ordered:
+            text = seg.get("text") or ""
+            self.starts.append(float(seg.get("start", 0.0)))
+            self.ends.append(float(seg.get("end", 0.0)))
+            self.max_ends.append(max(self.ends[-1], self.max_ends[-1]) if self.max_ends else self.ends[-1])
+            parts.append(text)
+            position += len(text)
+            self.offsets.append(position)
+        self.text = "".join(parts)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint of the index."""
+        return (
+            self.starts.itemsize * len(self.starts)
+            + self.ends.itemsize * len(self.ends)
+            + self.max_ends.itemsize * len(self.max_ends)
+            + self.offsets.itemsize * len(self.offsets)
+            + len(self.text) * 4
+        )
+
+    def segment(self, i: int) -> dict:
+        return {
+            "index": i,
+            "start": self.starts[i],
+            "end": self.ends[i],
+            "text": self.text[self.offsets[i]:self.offsets[i + 1]],
+        }
+
+    def first_overlapping(self, start: float) -> int:
+        """Index of the first segment that ends after ``start``."""
+        # 終了時刻の累積最大値は単調増加なので二分探索できる
+        return bisect_right(self.max_ends, start)
+
+    def window(self, start: float, end: Optional[float] = None, limit: int = 100) -> List[dict]:
+        """Segments overlapping [start, end), at most ``limit`` of them."""
+        result = []
+        if end is not None and end <= start:
+            return result
+        i = self.first_overlapping(start)
+        while i < len(self) and len(result) < limit:
+            if end is not None and self.starts[i] >= end:
+                break
+            # 長いセグメントの内側にある、startより前に終わるセグメントは読み飛ばす
+            if self.ends[i] > start:
+                result.append(self.segment(i))
+            i += 1
+        return result
+
+
+class SegmentIndexCache:
+    """LRU cache of segment indexes keyed by transcription id."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, SegmentIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, transcription_id: str) -> Optional[SegmentIndex]:
+        with self._lock:
+            index = self._entries.get(transcription_id)
+            if index is not None:
+                self._entries.move_to_end(transcription_id)
+            return index
+
+    def put(self, transcription_id: str, index: SegmentIndex) -> None:
+        with self._lock:
+            self._entries[transcription_id] = index
+            self._entries.move_to_end(transcription_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, transcription_id: str) -> None:
+        with self._lock:
+            self._entries.pop(transcription_id, None)
+
+
+# シングルトンインスタンス
+segment_index_cache = SegmentIndexCache(max_entries=settings.SEGMENT_INDEX_CACHE_SIZE)
@@ -1,16 +1,61 @@
-from typing import Optional, BinaryIO
+import asyncio
+import base64
+import json
+from typing import Optional, BinaryIO, Tuple
 from uuid import UUID, uuid4
 from datetime import datetime
-from app.infrastructure.openai_client import WhisperClient
+from fastapi import HTTPException
+from storage3.exceptions import StorageException
+from supabase import AsyncClient
+from app.core.config import settings
+from app.core.metrics import audio_seconds_transcribed, track_stage
 from app.infrastructure.supabase_client import get_supabase_admin
+from app.services.engine_router import EngineRouter, engine_router, probe_audio_duration
+from app.services.cache_service import ResultCache, compute_audio_hash, get_result_cache
+from app.services.export_service import EXPORT_COLUMNS, export_cache
+from app.services.progress_service import JobProgress
+from app.services.segment_index import SegmentIndex, segment_index_cache
+
+# 一覧表示で返すカラム（全文・セグメントは含めない）
+SUMMARY_COLUMNS = "id, title, original_filename, duration_seconds, language, text_preview, created_at"
+
+
+def encode_cursor(created_at: str, transcription_id: str) -> str:
+    """Encode the last row's sort key as an opaque pagination cursor."""
+    raw = json.dumps([created_at, transcription_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a pagination cursor into (created_at, id).
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, transcription_id = json.loads(raw)
+        if not isinstance(created_at, str) or not isinstance(transcription_id, str):
+            raise ValueError("cursor values must be strings")
+        UUID(transcription_id)
+        datetime.fromisoformat(created_at)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="不正なカーソルです")
+    return created_at, transcription_id
 
 
 class TranscriptionService:
     """Service for handling transcription operations."""
 
-    def __init__(self, whisper_client: WhisperClient):
-        self.whisper = whisper_client
-        self.db = get_supabase_admin()
+    def __init__(self, router: EngineRouter, cache: Optional[ResultCache] = None):
+        self.router = router
+        self.cache = cache or get_result_cache()
+
+    @property
+    def db(self) -> AsyncClient:
+        """Shared, pooled Supabase admin client."""
+        return get_supabase_admin()
 
     async def transcribe_and_save(
         self,
@@ -18,36 +63,93 @@ class TranscriptionService:
         filename: str,
         user_id: str,
         language: Optional[str] = None,
-        title: Optional[str] = None
+        title: Optional[str] = None,
+        audio_sha256: Optional[str] = None,
+        engine: Optional[str] = None,
+        latency_budget: Optional[float] = None,
+        transcription_id: Optional[str] = None,
+        storage_path: Optional[str] = None,
+        progress: Optional[JobProgress] = None
     ) -> dict:
         """
         Transcribe audio and save result to database.
 
+        The engine is chosen per request by the engine router. Identical
+        audio transcribed earlier with the same language and model is served
+        from the result cache instead of transcribing it again.
+
         Args:
             audio_file: Audio file data
             filename: Original filename
             user_id: User ID
             language: Language code or None for auto-detect
             title: Custom title or None to use filename
+            audio_sha256: SHA-256 of the audio if already known
+            engine: Engine name to force (not hedged), or None to let the router choose
+            latency_budget: Seconds the caller is willing to wait, used for routing
+            transcription_id: ID to save the record under, or None to generate one
+            storage_path: Where the original audio is kept in Supabase Storage
+            progress: Progress of the job this runs in, updated stage by stage
 
         Returns:
             Saved transcription record
         """
-        # 1. Whisper APIで文字起こし
-        result = self.whisper.transcribe(
-            audio_file=audio_file,
-            filename=filename,
-            language=language,
-            response_format="verbose_json"
-        )
+        if not audio_sha256:
+            with track_stage("hash"):
+                audio_sha256 = await asyncio.to_thread(compute_audio_hash, audio_file)
+
+        # 1. 音声長・負荷・レイテンシ予算からエンジンを選択
+        if progress is not None:
+            await progress.set_stage("probing")
+        with track_stage("probe"):
+            duration = await probe_audio_duration(audio_file)
+        selected = self.router.select(duration, latency_budget=latency_budget, engine_name=engine)
 
-        # 2. タイトル設定
+        # 2. キャッシュ確認 → なければ選択したエンジンで文字起こし
+        cache_key = ResultCache.make_key(audio_sha256, language, selected.model_id)
+        with track_stage("cache_lookup"):
+            result = await self._find_cached_result(cache_key)
+
+        if result is None and not engine:
+            # ブレーカーへの問い合わせは実際に送る直前だけ（半開時の試行枠をキャッシュヒットで消費しない）
+            admitted = self.router.admit(selected, duration)
+            if admitted is not selected:
+                selected = admitted
+                cache_key = ResultCache.make_key(audio_sha256, language, selected.model_id)
+                with track_stage("cache_lookup"):
+                    result = await self._find_cached_result(cache_key)
+
+        if result is None:
+            if progress is not None:
+                await progress.set_stage("transcribing", engine=selected.name, realtime_factor=selected.realtime_factor)
+            with track_stage("engine"):
+                transcription = await self.router.transcribe(
+                    selected,
+                    audio_file=audio_file,
+                    filename=filename,
+                    language=language,
+                    duration=duration,
+                    progress=progress,
+                    hedge=not engine
+                )
+            # ヘッジで予備エンジンの結果が先に返った場合は、そちらのモデルとして保存する
+            used = self.router.registry.get(transcription.engine) or selected
+            if used is not selected:
+                selected = used
+                cache_key = ResultCache.make_key(audio_sha256, language, used.model_id)
+            result = transcription.to_dict()
+            self.cache.put(cache_key, result)
+            audio_seconds_transcribed.inc(result.get("duration") or duration or 0.0, engine=selected.name)
+        else:
+            audio_seconds_transcribed.inc(result.get("duration") or duration or 0.0, engine="cache")
+
+        # 3. タイトル設定
         if not title:
             title = filename.rsplit('.', 1)[0]  # 拡張子を除去
 
-        # 3. DBに保存
+        # 4. DBに保存
         transcription_data = {
-            "id": str(uuid4()),
+            "id": transcription_id or str(uuid4()),
             "user_id": user_id,
             "title": title,
             "original_filename": filename,
@@ -55,60 +157,268 @@ class TranscriptionService:
             "duration_seconds": result.get("duration"),
             "language": result.get("language"),
             "segments": result.get("segments"),
+            "model": selected.model_id,
+            "audio_sha256": audio_sha256,
+            "requested_language": cache_key[1],
+            "storage_path": storage_path,
             "created_at": datetime.utcnow().isoformat()
         }
 
-        response = self.db.table("transcriptions").insert(transcription_data).execute()
+        if progress is not None:
+            await progress.set_stage("saving")
+        with track_stage("db_insert"):
+            response = await self.db.table("transcriptions").insert(transcription_data).execute()
 
         return response.data[0] if response.data else transcription_data
 
+    async def _find_cached_result(self, cache_key: tuple) -> Optional[dict]:
+        """Look up a previous result in the local cache, then in the database."""
+        result = self.cache.get(cache_key)
+        if result is not None:
+            return result
+
+        audio_sha256, requested_language, model = cache_key
+        response = await self.db.table("transcriptions") \
+            .select("text, segments, duration_seconds, language") \
+            .eq("audio_sha256", audio_sha256) \
+            .eq("requested_language", requested_language) \
+            .eq("model", model) \
+            .limit(1) \
+            .execute()
+
+        if not response.data:
+            self.cache.record_miss()
+            return None
+
+        row = response.data[0]
+        result = {
+            "text": row["text"],
+            "language": row.get("language"),
+            "duration": row.get("duration_seconds"),
+            "segments": row.get("segments"),
+        }
+        self.cache.record_db_hit()
+        self.cache.put(cache_key, result)
+        return result
+
     async def get_user_transcriptions(
         self,
         user_id: str,
-        page: int = 1,
+        cursor: Optional[str] = None,
         per_page: int = 20
     ) -> dict:
-        """Get paginated transcriptions for a user."""
-        offset = (page - 1) * per_page
+        """
+        Get a page of a user's transcriptions, newest first.
 
-        # 総数を取得
-        count_response = self.db.table("transcriptions") \
-            .select("*", count="exact") \
-            .eq("user_id", user_id) \
+        Uses keyset pagination on (created_at, id) and returns summary
+        columns only; pass the returned ``next_cursor`` to get the next page.
+
+        Raises:
+            HTTPException: If the cursor is malformed
+        """
+        query = self.db.table("transcriptions") \
+            .select(SUMMARY_COLUMNS) \
+            .eq("user_id", user_id)
+
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt.{last_id})'
+            )
+
+        # 次ページの有無を判定するため1件多く取得
+        response = await query \
+            .order("created_at", desc=True) \
+            .order("id", desc=True) \
+            .limit(per_page + 1) \
             .execute()
 
-        # データを取得
-        response = self.db.table("transcriptions") \
-            .select("*") \
+        items = response.data or []
+        next_cursor = None
+        if len(items) > per_page:
+            items = items[:per_page]
+            next_cursor = encode_cursor(items[-1]["created_at"], items[-1]["id"])
+
+        # 総数はトリガーで維持しているカウンタから取得
+        count_response = await self.db.table("transcription_counts") \
+            .select("total") \
             .eq("user_id", user_id) \
-            .order("created_at", desc=True) \
-            .range(offset, offset + per_page - 1) \
+            .maybe_single() \
             .execute()
 
         return {
-            "items": response.data,
-            "total": count_response.count or 0,
-            "page": page,
-            "per_page": per_page
+            "items": items,
+            "total": count_response.data["total"] if count_response and count_response.data else 0,
+            "per_page": per_page,
+            "next_cursor": next_cursor
         }
 
     async def get_transcription(self, transcription_id: str, user_id: str) -> Optional[dict]:
         """Get a single transcription by ID."""
-        response = self.db.table("transcriptions") \
+        response = await self.db.table("transcriptions") \
             .select("*") \
             .eq("id", transcription_id) \
             .eq("user_id", user_id) \
-            .single() \
+            .maybe_single() \
             .execute()
 
-        return response.data
+        return response.data if response else None
+
+    async def search_transcriptions(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        hits_per_transcription: int = 5
+    ) -> dict:
+        """
+        Full-text search over a user's transcriptions.
+
+        Results are ranked by relevance and include the matching segments
+        with their start/end times.
+        """
+        response = await self.db.rpc("search_transcriptions", {
+            "p_user_id": user_id,
+            "p_query": query,
+            "p_limit": limit,
+            "p_offset": offset,
+            "p_hits_per_transcription": hits_per_transcription
+        }).execute()
+
+        return {
+            "query": query,
+            "items": response.data or [],
+            "limit": limit,
+            "offset": offset
+        }
+
+    async def get_cache_meta(self, transcription_id: str, user_id: str) -> Optional[dict]:
+        """Get just the title and ``updated_at`` of a transcription, to check caches keyed on them."""
+        response = await self.db.table("transcriptions") \
+            .select("title, updated_at") \
+            .eq("id", transcription_id) \
+            .eq("user_id", user_id) \
+            .maybe_single() \
+            .execute()
+
+        return response.data if response else None
+
+    async def get_export_record(self, transcription_id: str, user_id: str) -> Optional[dict]:
+        """Get the columns needed to export a transcription."""
+        response = await self.db.table("transcriptions") \
+            .select(EXPORT_COLUMNS) \
+            .eq("id", transcription_id) \
+            .eq("user_id", user_id) \
+            .maybe_single() \
+            .execute()
+
+        return response.data if response else None
+
+    async def get_segment_index(self, transcription_id: str, user_id: str) -> Optional[SegmentIndex]:
+        """
+        Get the segment index of a transcription, building and caching it on first use.
+
+        A cached index is checked against the row's ``updated_at`` first, so
+        edits made through another worker process are not served stale.
+        """
+        index = segment_index_cache.get(transcription_id)
+        if index is not None:
+            if index.user_id != user_id:
+                return None
+            meta = await self.get_cache_meta(transcription_id, user_id)
+            if meta is None:
+                segment_index_cache.invalidate(transcription_id)
+                return None
+            if meta.get("updated_at") == index.updated_at:
+                return index
+            segment_index_cache.invalidate(transcription_id)
+
+        response = await self.db.table("transcriptions") \
+            .select("segments, updated_at") \
+            .eq("id", transcription_id) \
+            .eq("user_id", user_id) \
+            .maybe_single() \
+            .execute()
+
+        if not response or not response.data:
+            return None
+
+        index = SegmentIndex(
+            response.data.get("segments") or [],
+            user_id=user_id,
+            updated_at=response.data.get("updated_at")
+        )
+        segment_index_cache.put(transcription_id, index)
+        return index
+
+    async def get_segments(
+        self,
+        transcription_id: str,
+        user_id: str,
+        start: float = 0.0,
+        end: Optional[float] = None,
+        limit: int = 100
+    ) -> Optional[dict]:
+        """Get the segments overlapping a time window."""
+        index = await self.get_segment_index(transcription_id, user_id)
+        if index is None:
+            return None
+
+        segments = index.window(start, end, limit)
+
+        # 件数上限で打ち切った場合は続きの開始位置を返す
+        next_from = None
+        if segments:
+            following = segments[-1]["index"] + 1
+            if following < len(index) and (end is None or index.starts[following] < end):
+                next_from = segments[-1]["end"]
+
+        return {
+            "transcription_id": transcription_id,
+            "from": start,
+            "to": end,
+            "total_segments": len(index),
+            "segments": segments,
+            "next_from": next_from
+        }
 
     async def delete_transcription(self, transcription_id: str, user_id: str) -> bool:
         """Delete a transcription."""
-        response = self.db.table("transcriptions") \
+        response = await self.db.table("transcriptions") \
             .delete() \
             .eq("id", transcription_id) \
             .eq("user_id", user_id) \
             .execute()
 
+        segment_index_cache.invalidate(transcription_id)
+        export_cache.invalidate(transcription_id)
+
+        # 再開可能アップロードで保存した元音声も削除
+        for row in response.data or []:
+            if row.get("storage_path"):
+                await self._remove_stored_audio(row["storage_path"])
+
         return len(response.data) > 0 if response.data else False
+
+    async def _remove_stored_audio(self, storage_path: str) -> None:
+        """Delete the objects under a transcription's storage folder (best effort)."""
+        bucket = self.db.storage.from_(settings.STORAGE_BUCKET)
+        prefix = storage_path.rstrip("/")
+        try:
+            objects = await bucket.list(prefix, {"limit": 10000})
+            paths = [f"{prefix}/{obj['name']}" for obj in objects or [] if obj.get("name")]
+            if paths:
+                await bucket.remove(paths)
+        except StorageException:
+            pass
+
+
+# シングルトンインスタンス
+transcription_service = TranscriptionService(router=engine_router)
+
+
+def get_transcription_service() -> TranscriptionService:
+    """Dependency to get transcription service."""
+    return transcription_service
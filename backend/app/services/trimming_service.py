@@ -0,0 +1,170 @@
+import os
+import tempfile
+from bisect import bisect_right
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.metrics import silence_trimmed_seconds, track_stage
+from app.domain.models import Segment, TranscriptionResult
+from app.infrastructure import audio
+
+# ffmpegの引数長の上限を超えないよう、区間がこれより多い場合は削らない
+MAX_KEPT_INTERVALS = 2000
+
+
+class TimelineMap:
+    """
+    Offset map between trimmed audio and the original recording.
+
+    Holds the kept intervals of the original timeline in order; trimmed time
+    ``t`` falls in the interval whose trimmed start is the last one <= ``t``.
+    """
+
+    def __init__(self, kept: Sequence[Tuple[float, float]]):
+        self.kept = list(kept)
+        self.trimmed_starts: List[float] = []
+        position = 0.0
+        for start, end in self.kept:
+            self.trimmed_starts.append(position)
+            position += end - start
+        self.trimmed_duration = position
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """
+        Map a trimmed timestamp to the original timeline.
+
+        At a cut the trimmed time belongs to two intervals; an end timestamp
+        is mapped to the end of the earlier one and a start timestamp to the
+        start of the later one, so segments never span removed silence.
+        """
+        if not self.kept:
+            return t
+        index = bisect_right(self.trimmed_starts, t) - 1
+        if is_end and index > 0 and t == self.trimmed_starts[index]:
+            index -= 1
+        index = max(index, 0)
+        start, end = self.kept[index]
+        return min(start + t - self.trimmed_starts[index], end)
+
+    def remap(self, result: TranscriptionResult, original_duration: float) -> TranscriptionResult:
+        """Shift segment timestamps of a result on trimmed audio back to the original timeline."""
+        result.segments = [
+            Segment(
+                start=self.to_original(seg.start),
+                end=max(self.to_original(seg.end, is_end=True), self.to_original(seg.start)),
+                text=seg.text
+            )
+            for seg in result.segments
+        ]
+        result.duration = original_duration
+        return result
+
+
+def plan_trim(
+    duration: float,
+    silences: Sequence[Tuple[float, float]],
+    min_silence_seconds: float = 2.0,
+    padding_seconds: float = 0.3
+) -> List[Tuple[float, float]]:
+    """
+    Intervals of the original audio to keep after cutting long silences.
+
+    Silences shorter than ``min_silence_seconds`` are kept as they are;
+    longer ones are cut leaving ``padding_seconds`` on each side so speech
+    onsets and tails are not clipped. Leading and trailing silence is
+    dropped entirely, including silence that starts or ends within
+    ``padding_seconds`` of the file edges.
+    """
+    kept = []
+    position = 0.0
+    for start, end in sorted(silences):
+        end = min(end, duration)
+        if end - start < min_silence_seconds:
+            continue
+        # ファイルの先頭・末尾の無音は余白を残さずすべて削る
+        # （端から余白以内で始まる・終わる無音も、無音だけの短い区間を残さないよう同様に扱う）
+        cut_start = start + padding_seconds if start > padding_seconds else 0.0
+        cut_end = end - padding_seconds if end < duration - padding_seconds else duration
+        if cut_start > position:
+            kept.append((position, cut_start))
+        position = max(position, cut_end)
+
+    if position < duration:
+        kept.append((position, duration))
+    return kept
+
+
+class SilenceTrimmer:
+    """Cut long silences out of audio before it is sent to an engine."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        min_silence_seconds: float = 2.0,
+        padding_seconds: float = 0.3,
+        noise_db: float = -35.0,
+        min_ratio: float = 0.1
+    ):
+        self.enabled = enabled
+        self.min_silence_seconds = min_silence_seconds
+        self.padding_seconds = padding_seconds
+        self.noise_db = noise_db
+        self.min_ratio = min_ratio
+
+    @asynccontextmanager
+    async def trim(self, path: str, duration: Optional[float]) -> AsyncIterator[Optional[Tuple[str, TimelineMap]]]:
+        """
+        Yield the trimmed audio path and its offset map, or None when trimming does not pay off.
+
+        The trimmed file is deleted on exit.
+        """
+        if not self.enabled or not duration or not audio.ffmpeg_available():
+            yield None
+            return
+
+        try:
+            with track_stage("silence_detect"):
+                silences = await audio.detect_silences(
+                    path,
+                    noise_db=self.noise_db,
+                    min_silence_seconds=self.min_silence_seconds
+                )
+        except audio.AudioToolError:
+            silences = []
+        kept = plan_trim(duration, silences, self.min_silence_seconds, self.padding_seconds)
+        timeline = TimelineMap(kept)
+        removed = duration - timeline.trimmed_duration
+        if not kept or removed < duration * self.min_ratio or len(kept) > MAX_KEPT_INTERVALS:
+            yield None
+            return
+
+        fd, trimmed_path = tempfile.mkstemp(prefix="trimmed-", suffix=".mp3")
+        os.close(fd)
+        try:
+            try:
+                with track_stage("silence_trim"):
+                    await audio.extract_intervals(path, trimmed_path, kept)
+                trimmed = True
+            except audio.AudioToolError:
+                # 切り出しに失敗した場合は元の音声で文字起こしする
+                trimmed = False
+
+            if trimmed:
+                silence_trimmed_seconds.inc(removed)
+                yield trimmed_path, timeline
+            else:
+                yield None
+        finally:
+            os.remove(trimmed_path)
+
+
+def create_silence_trimmer() -> SilenceTrimmer:
+    """Build a silence trimmer from application settings."""
+    return SilenceTrimmer(
+        enabled=settings.SILENCE_TRIM_ENABLED,
+        min_silence_seconds=settings.SILENCE_TRIM_MIN_SECONDS,
+        padding_seconds=settings.SILENCE_TRIM_PADDING_SECONDS,
+        noise_db=settings.SILENCE_TRIM_NOISE_DB,
+        min_ratio=settings.SILENCE_TRIM_MIN_RATIO
+    )
@@ -0,0 +1,411 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Set
+from uuid import uuid4
+
+from fastapi import HTTPException
+from storage3.exceptions import StorageException
+from supabase import AsyncClient
+
+from app.core.config import settings
+from app.core.metrics import bytes_processed, errors_total, track_stage
+from app.infrastructure.supabase_client import get_supabase_admin
+from app.services.file_service import FileService, IngestedUpload, get_file_service, max_file_size
+from app.services.job_service import JobQueue, JobStatus, TranscriptionJob, get_job_queue
+
+# セッション情報を保存するオブジェクト名（プロセス再起動後もセッションを再開できるように）
+MANIFEST_NAME = "upload.json"
+
+
+@dataclass
+class UploadSession:
+    """A resumable upload whose parts are stored under ``{user_id}/{id}/`` in Supabase Storage."""
+
+    id: str
+    user_id: str
+    filename: str
+    size: int
+    part_size: int
+    language: Optional[str] = None
+    title: Optional[str] = None
+    engine: Optional[str] = None
+    latency_budget: Optional[float] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    expires_at: float = 0.0
+    job_id: Optional[str] = None
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.user_id}/{self.id}"
+
+    @property
+    def total_parts(self) -> int:
+        return -(-self.size // self.part_size)
+
+    def part_name(self, number: int) -> str:
+        return f"part-{number:05d}"
+
+    def part_path(self, number: int) -> str:
+        return f"{self.prefix}/{self.part_name(number)}"
+
+    def expected_part_size(self, number: int) -> int:
+        """Bytes part ``number`` (1-based) must contain; only the last part may be shorter."""
+        if number < self.total_parts:
+            return self.part_size
+        return self.size - self.part_size * (self.total_parts - 1)
+
+    def to_dict(self, received: Optional[List[int]] = None) -> dict:
+        """Serialize session state for API responses."""
+        data = {
+            "id": self.id,
+            "filename": self.filename,
+            "size": self.size,
+            "part_size": self.part_size,
+            "total_parts": self.total_parts,
+            "created_at": self.created_at,
+            "expires_at": datetime.utcfromtimestamp(self.expires_at).isoformat(),
+            "job_id": self.job_id,
+        }
+        if received is not None:
+            received_set = set(received)
+            data["received_parts"] = sorted(received_set)
+            data["missing_parts"] = [n for n in range(1, self.total_parts + 1) if n not in received_set]
+        return data
+
+
+class UploadService:
+    """
+    Resumable, tus-style uploads into Supabase Storage.
+
+    A client creates a session, PUTs numbered parts (in any order, in
+    parallel, retrying any that fail) and then completes the session, which
+    assembles the parts into a local spool file and queues the transcription.
+    Parts stay in Storage as the original audio, under the transcription's
+    ``storage_path``. Sessions that expire before completing, and sessions
+    whose job fails, have their parts deleted.
+    """
+
+    def __init__(
+        self,
+        file_service: FileService,
+        job_queue: JobQueue,
+        bucket: str = "transcriptions",
+        part_size: int = 8 * 1024 * 1024,
+        session_ttl_seconds: int = 86400,
+        assembly_parallelism: int = 4,
+        cleanup_interval_seconds: float = 600
+    ):
+        self.file_service = file_service
+        self.job_queue = job_queue
+        self.bucket = bucket
+        self.part_size = part_size
+        self.session_ttl_seconds = session_ttl_seconds
+        self.assembly_parallelism = assembly_parallelism
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        self._cleanup_task: Optional[asyncio.Task] = None
+        self._sessions: Dict[str, UploadSession] = {}
+        self._completing: Set[str] = set()
+
+    @property
+    def db(self) -> AsyncClient:
+        """Shared, pooled Supabase admin client."""
+        return get_supabase_admin()
+
+    def _storage(self):
+        return self.db.storage.from_(self.bucket)
+
+    async def create_session(
+        self,
+        user_id: str,
+        filename: str,
+        size: int,
+        part_size: Optional[int] = None,
+        language: Optional[str] = None,
+        title: Optional[str] = None,
+        engine: Optional[str] = None,
+        latency_budget: Optional[float] = None
+    ) -> UploadSession:
+        """
+        Start a resumable upload.
+
+        Raises:
+            HTTPException: If the file name or declared size is not accepted
+        """
+        filename = self.file_service.sanitize_filename(filename)
+        self.file_service.validate_filename_and_size(filename, size)
+
+        session = UploadSession(
+            id=str(uuid4()),
+            user_id=user_id,
+            filename=filename,
+            size=size,
+            part_size=part_size or self.part_size,
+            language=language,
+            title=title,
+            engine=engine,
+            latency_budget=latency_budget,
+            expires_at=time.time() + self.session_ttl_seconds
+        )
+        await self._save_manifest(session)
+        self._sessions[session.id] = session
+        return session
+
+    async def get_session(self, upload_id: str, user_id: str) -> Optional[UploadSession]:
+        """Get a live session owned by the user, reloading it from Storage if this process does not know it."""
+        session = self._sessions.get(upload_id)
+        if session is None:
+            session = await self._load_manifest(upload_id, user_id)
+            if session is not None:
+                self._sessions[session.id] = session
+
+        if session is None or session.user_id != user_id:
+            return None
+        if session.expires_at < time.time():
+            # 他のプロセスで作られ、このプロセスの定期削除に載っていないセッションもここで消す
+            if not session.job_id and session.id not in self._completing:
+                try:
+                    await self.abort(session)
+                except HTTPException:
+                    errors_total.inc(stage="upload_cleanup", type="StorageException")
+            return None
+        return session
+
+    async def received_parts(self, session: UploadSession) -> List[int]:
+        """Part numbers already stored, read from Storage so parts sent to other processes count too."""
+        try:
+            objects = await self._storage().list(session.prefix, {"limit": session.total_parts + 10})
+        except StorageException as e:
+            raise HTTPException(status_code=502, detail=f"ストレージの参照に失敗しました: {e}")
+        received = []
+        for obj in objects or []:
+            name = obj.get("name", "")
+            if name.startswith("part-"):
+                try:
+                    received.append(int(name[len("part-"):]))
+                except ValueError:
+                    continue
+        return sorted(received)
+
+    async def put_part(self, session: UploadSession, number: int, body: AsyncIterator[bytes], sha256: Optional[str] = None) -> dict:
+        """
+        Store one part. Sending the same part again overwrites it.
+
+        Raises:
+            HTTPException: If the part number, length or checksum is wrong, or Storage fails
+        """
+        if session.job_id:
+            raise HTTPException(status_code=409, detail="このアップロードは完了済みです")
+        if not 1 <= number <= session.total_parts:
+            raise HTTPException(status_code=400, detail=f"パート番号は1〜{session.total_parts}で指定してください")
+
+        expected = session.expected_part_size(number)
+        # パートはメモリに溜めず一時ファイルへ書き出し、そのままストレージへ送る
+        fd, path = tempfile.mkstemp(prefix="part-")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                async for chunk in body:
+                    size += len(chunk)
+                    if size > expected:
+                        raise HTTPException(status_code=413, detail=f"パートのサイズが大きすぎます（{expected}バイト）")
+                    digest.update(chunk)
+                    out.write(chunk)
+            if size != expected:
+                raise HTTPException(status_code=400, detail=f"パートのサイズが一致しません（期待値: {expected}バイト、受信: {size}バイト）")
+            if sha256 and sha256.lower() != digest.hexdigest():
+                raise HTTPException(status_code=400, detail="パートのチェックサムが一致しません")
+
+            with track_stage("part_store"), open(path, "rb") as f:
+                await self._storage().upload(
+                    session.part_path(number),
+                    f,
+                    {"content-type": "application/octet-stream", "upsert": "true"}
+                )
+        except StorageException as e:
+            raise HTTPException(status_code=502, detail=f"ストレージへの保存に失敗しました: {e}")
+        finally:
+            os.remove(path)
+
+        bytes_processed.inc(size)
+        return {"part": number, "size": size, "sha256": digest.hexdigest()}
+
+    async def complete(self, session: UploadSession) -> TranscriptionJob:
+        """
+        Assemble the parts and queue the transcription.
+
+        Raises:
+            HTTPException: If parts are missing, the content is invalid, or the job is not admitted
+        """
+        if session.job_id or session.id in self._completing:
+            raise HTTPException(status_code=409, detail="このアップロードは完了済みです")
+
+        # 結合に時間をかける前に、ジョブを受け付けられるか確認
+        self.job_queue.check_admission(session.user_id)
+
+        self._completing.add(session.id)
+        try:
+            missing = sorted(set(range(1, session.total_parts + 1)) - set(await self.received_parts(session)))
+            if missing:
+                raise HTTPException(status_code=409, detail=f"未受信のパートがあります: {missing[:20]}")
+
+            with track_stage("assemble"):
+                upload = await self._assemble(session)
+
+            # ジョブ登録（一時ファイルの所有権はジョブへ移る）
+            job = await self.job_queue.submit(
+                audio_path=upload.path,
+                filename=session.filename,
+                user_id=session.user_id,
+                language=session.language,
+                title=session.title,
+                audio_sha256=upload.sha256,
+                engine=session.engine,
+                latency_budget=session.latency_budget,
+                transcription_id=session.id,
+                storage_path=f"{session.prefix}/",
+                on_failure=lambda job: self.abort(session)
+            )
+
+            session.job_id = job.id
+            await self._save_manifest(session)
+        finally:
+            self._completing.discard(session.id)
+        return job
+
+    async def abort(self, session: UploadSession) -> None:
+        """Delete a session and everything stored under its prefix."""
+        self._sessions.pop(session.id, None)
+        try:
+            objects = await self._storage().list(session.prefix, {"limit": session.total_parts + 10})
+            paths = [f"{session.prefix}/{obj['name']}" for obj in objects or [] if obj.get("name")]
+            if paths:
+                await self._storage().remove(paths)
+        except StorageException as e:
+            raise HTTPException(status_code=502, detail=f"ストレージからの削除に失敗しました: {e}")
+
+    def can_abort(self, session: UploadSession) -> bool:
+        """Whether the session may still be deleted: not completed, or its job failed."""
+        if not session.job_id:
+            return True
+        job = self.job_queue.get_job(session.job_id, session.user_id)
+        return job is not None and job.status == JobStatus.FAILED
+
+    async def start(self) -> None:
+        """Start the task that deletes expired sessions. Called from the application lifespan."""
+        if self._cleanup_task is None and self.cleanup_interval_seconds > 0:
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop(), name="upload-cleanup")
+
+    async def stop(self) -> None:
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            await asyncio.gather(self._cleanup_task, return_exceptions=True)
+            self._cleanup_task = None
+
+    async def expire_sessions(self) -> int:
+        """
+        Forget expired sessions and delete the parts of those never completed.
+
+        Completed sessions keep their parts: they are the transcription's
+        original audio.
+
+        Returns:
+            Number of sessions whose parts were deleted
+        """
+        now = time.time()
+        expired = [s for s in self._sessions.values() if s.expires_at < now and s.id not in self._completing]
+        deleted = 0
+        for session in expired:
+            self._sessions.pop(session.id, None)
+            if session.job_id:
+                continue
+            try:
+                await self.abort(session)
+                deleted += 1
+            except HTTPException:
+                errors_total.inc(stage="upload_cleanup", type="StorageException")
+        return deleted
+
+    async def _cleanup_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.cleanup_interval_seconds)
+            await self.expire_sessions()
+
+    async def _assemble(self, session: UploadSession) -> IngestedUpload:
+        """Download parts a few at a time ahead of the writer and write them in order to a spool file."""
+        def fetch(number: int) -> asyncio.Task:
+            return asyncio.create_task(self._storage().download(session.part_path(number)))
+
+        # 書き込み位置より先のパートを最大 assembly_parallelism 個まで並列に取得する
+        pending = deque(fetch(number) for number in range(1, min(self.assembly_parallelism, session.total_parts) + 1))
+        next_number = len(pending) + 1
+        fd, path = tempfile.mkstemp(prefix="upload-", suffix=os.path.splitext(session.filename)[1])
+        digest = hashlib.sha256()
+        mime_type = None
+        size = 0
+        limit = max_file_size()
+
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while pending:
+                    data = await pending.popleft()
+                    if next_number <= session.total_parts:
+                        pending.append(fetch(next_number))
+                        next_number += 1
+
+                    if mime_type is None:
+                        mime_type = self.file_service.validate_file_content(data)
+                    size += len(data)
+                    if size > limit:
+                        raise HTTPException(status_code=413, detail="ファイルサイズが大きすぎます")
+                    digest.update(data)
+                    out.write(data)
+        except BaseException as e:
+            for task in pending:
+                task.cancel()
+            os.remove(path)
+            if isinstance(e, StorageException):
+                raise HTTPException(status_code=502, detail=f"ストレージからの読み込みに失敗しました: {e}")
+            raise
+
+        return IngestedUpload(path=path, size=size, sha256=digest.hexdigest(), mime_type=mime_type)
+
+    async def _save_manifest(self, session: UploadSession) -> None:
+        try:
+            await self._storage().upload(
+                f"{session.prefix}/{MANIFEST_NAME}",
+                json.dumps(asdict(session)).encode(),
+                {"content-type": "application/json", "upsert": "true"}
+            )
+        except StorageException as e:
+            raise HTTPException(status_code=502, detail=f"ストレージへの保存に失敗しました: {e}")
+
+    async def _load_manifest(self, upload_id: str, user_id: str) -> Optional[UploadSession]:
+        try:
+            raw = await self._storage().download(f"{user_id}/{upload_id}/{MANIFEST_NAME}")
+            return UploadSession(**json.loads(raw))
+        except (StorageException, ValueError, TypeError):
+            return None
+
+# シングルトンインスタンス
+upload_service = UploadService(
+    file_service=get_file_service(),
+    job_queue=get_job_queue(),
+    bucket=settings.STORAGE_BUCKET,
+    part_size=settings.UPLOAD_PART_SIZE_MB * 1024 * 1024,
+    session_ttl_seconds=settings.UPLOAD_SESSION_TTL_SECONDS,
+    assembly_parallelism=settings.UPLOAD_ASSEMBLY_PARALLELISM,
+    cleanup_interval_seconds=settings.UPLOAD_CLEANUP_INTERVAL_SECONDS
+)
+
+
+def get_upload_service() -> UploadService:
+    """Dependency to get resumable upload service."""
+    return upload_service
@@ -0,0 +1,62 @@
+"""
+Offline benchmark suite.
+
+Generates deterministic synthetic audio, runs each transcription engine path
+and the ``POST /api/v1/transcriptions`` endpoint against local stand-ins for
+OpenAI and Supabase, and writes latency percentiles, real-time factor,
+throughput and peak RSS to a JSON report.
+
+Usage (from backend/):
+    python -m benchmarks --durations 30,300 --concurrency 1,4,8 --requests 16
+    python -m benchmarks --engines openai,faster_whisper --compare benchmarks/results/previous.json
+"""
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime
+
+# ベンチマークはネットワークに出ないため、設定の必須値をダミーで埋める
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark")
+
+from benchmarks.runner import compare, run, write_report  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--durations", default="30,300", help="audio lengths in seconds, comma separated")
+    parser.add_argument("--engines", default="openai", help="engines to run: openai (stubbed), faster_whisper, mlx")
+    parser.add_argument("--repeat", type=int, default=5, help="sequential runs per engine and length")
+    parser.add_argument("--concurrency", default="1,4,8", help="concurrent endpoint clients, comma separated")
+    parser.add_argument("--requests", type=int, default=16, help="endpoint requests per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="seed for synthetic audio")
+    parser.add_argument("--stub-rtf", type=float, default=0.02, help="simulated OpenAI realtime factor")
+    parser.add_argument("--stub-setup", type=float, default=0.2, help="simulated OpenAI per-request latency (s)")
+    parser.add_argument("--stub-db-latency", type=float, default=0.005, help="simulated Supabase query latency (s)")
+    parser.add_argument("--skip-engines", action="store_true", help="skip engine path scenarios")
+    parser.add_argument("--skip-endpoint", action="store_true", help="skip endpoint scenarios")
+    parser.add_argument("--output", default=None, help="report path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="previous report to compare p50 latencies against")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    report = asyncio.run(run(args))
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    print(f"Report written to {write_report(report, output)}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            for line in compare(report, json.load(f)):
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
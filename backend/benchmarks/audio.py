@@ -0,0 +1,62 @@
+"""Deterministic synthetic audio for benchmarks."""
+import math
+import random
+import wave
+from array import array
+
+SAMPLE_RATE = 16000
+
+
+def _tone(frequency: float, seconds: float, amplitude: float = 0.3) -> bytes:
+    """A short tone with a fade in/out, as 16-bit mono PCM."""
+    count = int(SAMPLE_RATE * seconds)
+    fade = max(1, int(SAMPLE_RATE * 0.02))
+    samples = array("h")
+    for i in range(count):
+        envelope = min(1.0, i / fade, (count - i) / fade)
+        # 基本周波数と倍音を重ねて音声に近いスペクトルにする
+        value = math.sin(2 * math.pi * frequency * i / SAMPLE_RATE) + 0.4 * math.sin(4 * math.pi * frequency * i / SAMPLE_RATE)
+        samples.append(int(32767 * amplitude * envelope * value / 1.4))
+    return samples.tobytes()
+
+
+def _silence(seconds: float) -> bytes:
+    return b"\x00\x00" * int(SAMPLE_RATE * seconds)
+
+
+def generate_wav(path: str, duration: float, seed: int = 0) -> str:
+    """
+    Write ``duration`` seconds of speech-like audio to a 16 kHz mono WAV.
+
+    The audio alternates "utterances" (stacks of short harmonic tones) with
+    pauses of 0.3-1.5 s, so silence detection and VAD have something to cut
+    on. The same seed and duration always produce the same bytes.
+    """
+    rng = random.Random(seed)
+    # 事前に生成した音節を組み合わせて長い音声でも高速に作る
+    syllables = [_tone(rng.uniform(110, 260), rng.uniform(0.12, 0.3)) for _ in range(16)]
+    pauses = [_silence(seconds) for seconds in (0.3, 0.6, 1.0, 1.5)]
+
+    target = int(SAMPLE_RATE * duration) * 2
+    written = 0
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+
+        while written < target:
+            for _ in range(rng.randint(4, 20)):
+                chunk = rng.choice(syllables)
+                out.writeframes(chunk[:target - written])
+                written += min(len(chunk), target - written)
+            chunk = rng.choice(pauses)[:target - written]
+            out.writeframes(chunk)
+            written += len(chunk)
+
+    return path
+
+
+def wav_duration(path: str) -> float:
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
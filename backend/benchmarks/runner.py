@@ -0,0 +1,343 @@
+"""Benchmark scenarios and result reporting."""
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+from app.domain.models import AuthenticatedUser
+from app.infrastructure.engines import EngineRegistry, FasterWhisperEngine, MLXWhisperEngine, OpenAIWhisperEngine
+from app.services.cache_service import ResultCache
+from app.services.engine_router import EngineRouter
+from benchmarks.audio import generate_wav
+from benchmarks.stubs import BenchTranscriptionService, StubSupabase, StubWhisperClient
+
+BENCH_USER_ID = "00000000-0000-0000-0000-00000000bench"
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: List[float], duration: float, elapsed: float) -> dict:
+    """Latency percentiles, real-time factor and throughput of a scenario."""
+    p50 = percentile(latencies, 50)
+    return {
+        "requests": len(latencies),
+        "latency_seconds": {
+            "p50": _round(p50),
+            "p95": _round(percentile(latencies, 95)),
+            "p99": _round(percentile(latencies, 99)),
+            "max": _round(max(latencies) if latencies else None),
+        },
+        "realtime_factor": _round(p50 / duration if p50 is not None and duration else None),
+        "throughput": {
+            "requests_per_second": _round(len(latencies) / elapsed if elapsed else None),
+            "audio_seconds_per_second": _round(len(latencies) * duration / elapsed if elapsed else None),
+        },
+    }
+
+
+def _round(value: Optional[float], digits: int = 4) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+class PeakRSSSampler:
+    """Track peak resident memory of this process while a scenario runs."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "PeakRSSSampler":
+        self.peak_bytes = self._current()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._current())
+
+    @property
+    def peak_mb(self) -> float:
+        return round(self.peak_bytes / 1024 / 1024, 1)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, self._current())
+
+    @staticmethod
+    def _current() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # /procがない環境（macOS）ではプロセス全体の最大値で代用
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _unique_copy(source: str, target: str, index: int) -> str:
+    """Copy a WAV, changing a few samples so every request has a distinct hash (no cache hits)."""
+    with open(source, "rb") as f:
+        data = bytearray(f.read())
+    # ヘッダ（44バイト）直後のサンプルにリクエスト番号を書き込む
+    data[44:52] = index.to_bytes(8, "little")
+    with open(target, "wb") as f:
+        f.write(data)
+    return target
+
+
+def build_engines(names: Sequence[str], stub_client: StubWhisperClient) -> EngineRegistry:
+    """Engines to benchmark; the OpenAI engine talks to the local stub."""
+    registry = EngineRegistry()
+    for name in names:
+        if name == "openai":
+            registry.register(OpenAIWhisperEngine(stub_client, max_concurrency=8, realtime_factor=stub_client.realtime_factor))
+        elif name == "faster_whisper":
+            registry.register(FasterWhisperEngine())
+        elif name == "mlx":
+            registry.register(MLXWhisperEngine())
+        else:
+            raise ValueError(f"unknown engine: {name}")
+    return registry
+
+
+async def bench_engines(
+    registry: EngineRegistry,
+    audio_files: Dict[float, str],
+    repeat: int,
+    workdir: str
+) -> List[dict]:
+    """Sequential runs of each engine on each audio length."""
+    results = []
+    router = EngineRouter(registry)
+
+    for engine_name in registry.names():
+        engine = registry.get(engine_name)
+        for duration, path in sorted(audio_files.items()):
+            scenario = {"engine": engine_name, "model": engine.model_id, "audio_seconds": duration}
+            if not engine.is_available():
+                results.append({**scenario, "error": "engine dependencies are not installed"})
+                continue
+
+            latencies = []
+            started = time.perf_counter()
+            try:
+                with PeakRSSSampler() as rss:
+                    for i in range(repeat):
+                        copy = _unique_copy(path, os.path.join(workdir, f"engine-{i}.wav"), i)
+                        t0 = time.perf_counter()
+                        with open(copy, "rb") as f:
+                            await router.transcribe(engine, f, os.path.basename(copy), "ja", duration)
+                        latencies.append(time.perf_counter() - t0)
+            except Exception as e:
+                results.append({**scenario, "error": f"{type(e).__name__}: {e}"})
+                continue
+
+            results.append({
+                **scenario,
+                **summarize(latencies, duration, time.perf_counter() - started),
+                "peak_rss_mb": rss.peak_mb,
+            })
+            print(f"  engine={engine_name} audio={duration:g}s p50={results[-1]['latency_seconds']['p50']}s", flush=True)
+
+    return results
+
+
+async def bench_endpoint(
+    registry: EngineRegistry,
+    audio_files: Dict[float, str],
+    concurrency_levels: Sequence[int],
+    requests: int,
+    db_latency: float,
+    workdir: str
+) -> List[dict]:
+    """POST /api/v1/transcriptions and wait for each job, with N concurrent clients."""
+    from app.core.security import get_current_user
+    from app.main import app
+    from app.services.job_service import job_queue
+
+    app.dependency_overrides[get_current_user] = lambda: AuthenticatedUser(id=BENCH_USER_ID)
+    service = BenchTranscriptionService(
+        router=EngineRouter(registry),
+        cache=ResultCache(max_entries=1, max_bytes=1, ttl_seconds=1),
+        database=StubSupabase(latency_seconds=db_latency)
+    )
+    await job_queue.start(service=service)
+
+    results = []
+    # シナリオをまたいで同じ音声を送らない（結果キャッシュに当たるため）
+    sequence = 1_000_000
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for duration, path in sorted(audio_files.items()):
+                for concurrency in concurrency_levels:
+                    payloads = []
+                    for _ in range(requests):
+                        sequence += 1
+                        copy = _unique_copy(path, os.path.join(workdir, "upload.wav"), sequence)
+                        with open(copy, "rb") as f:
+                            payloads.append(f.read())
+
+                    results.append(await _run_endpoint_scenario(client, payloads, duration, concurrency))
+                    print(f"  endpoint audio={duration:g}s clients={concurrency} p50={results[-1]['latency_seconds']['p50']}s", flush=True)
+    finally:
+        await job_queue.stop()
+        app.dependency_overrides.pop(get_current_user, None)
+
+    return results
+
+
+async def _run_endpoint_scenario(client: httpx.AsyncClient, payloads: List[bytes], duration: float, concurrency: int) -> dict:
+    pending = list(enumerate(payloads))
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def worker() -> None:
+        while pending:
+            index, payload = pending.pop()
+            t0 = time.perf_counter()
+            error = await _transcribe_once(client, payload, f"bench-{index}.wav")
+            if error:
+                errors[error] = errors.get(error, 0) + 1
+            else:
+                latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    with PeakRSSSampler() as rss:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "audio_seconds": duration,
+        "concurrency": concurrency,
+        **summarize(latencies, duration, elapsed),
+        "errors": errors,
+        "peak_rss_mb": rss.peak_mb,
+    }
+
+
+async def _transcribe_once(client: httpx.AsyncClient, payload: bytes, filename: str) -> Optional[str]:
+    """Submit one upload and poll its job; returns an error label or None."""
+    response = await client.post(
+        "/api/v1/transcriptions",
+        files={"file": (filename, payload, "audio/wav")},
+        data={"language": "ja"}
+    )
+    if response.status_code != 202:
+        return f"http_{response.status_code}"
+
+    job_id = response.json()["id"]
+    while True:
+        job = (await client.get(f"/api/v1/transcriptions/jobs/{job_id}")).json()
+        if job["status"] == "done":
+            return None
+        if job["status"] == "failed":
+            return f"job_failed: {job.get('error')}"
+        await asyncio.sleep(0.01)
+
+
+def environment() -> dict:
+    """Metadata that makes runs comparable."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+async def run(args) -> dict:
+    durations = [float(d) for d in args.durations.split(",")]
+    stub_client = StubWhisperClient(realtime_factor=args.stub_rtf, setup_seconds=args.stub_setup)
+    registry = build_engines([name.strip() for name in args.engines.split(",") if name.strip()], stub_client)
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        print("Generating audio...", flush=True)
+        audio_files = {
+            duration: generate_wav(os.path.join(workdir, f"audio-{duration:g}s.wav"), duration, seed=args.seed)
+            for duration in durations
+        }
+
+        report = {"environment": environment(), "config": vars(args), "engines": [], "endpoint": []}
+        if not args.skip_engines:
+            print("Engine paths:", flush=True)
+            report["engines"] = await bench_engines(registry, audio_files, args.repeat, workdir)
+
+            # エンジン単体で失敗したエンジンはエンドポイントのルーティング対象から外す
+            failed = {row["engine"] for row in report["engines"] if "error" in row}
+            if failed:
+                working = EngineRegistry()
+                for name in registry.names():
+                    if name not in failed:
+                        working.register(registry.get(name))
+                registry = working
+        if not args.skip_endpoint:
+            print("Endpoint:", flush=True)
+            report["endpoint"] = await bench_endpoint(
+                registry,
+                audio_files,
+                [int(c) for c in args.concurrency.split(",")],
+                args.requests,
+                args.stub_db_latency,
+                workdir
+            )
+    return report
+
+
+def compare(current: dict, baseline: dict) -> List[str]:
+    """Human-readable p50 changes for scenarios present in both reports."""
+    def keyed(report: dict) -> Dict[tuple, dict]:
+        rows = {}
+        for row in report.get("engines", []):
+            rows[("engine", row["engine"], row["audio_seconds"])] = row
+        for row in report.get("endpoint", []):
+            rows[("endpoint", row["concurrency"], row["audio_seconds"])] = row
+        return rows
+
+    lines = []
+    before = keyed(baseline)
+    for key, row in keyed(current).items():
+        old = before.get(key)
+        if not old or "latency_seconds" not in row or "latency_seconds" not in old:
+            continue
+        new_p50, old_p50 = row["latency_seconds"]["p50"], old["latency_seconds"]["p50"]
+        if new_p50 and old_p50:
+            change = (new_p50 - old_p50) / old_p50 * 100
+            lines.append(f"{key}: p50 {old_p50:.3f}s -> {new_p50:.3f}s ({change:+.1f}%)")
+    return lines
+
+
+def write_report(report: dict, output: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return output
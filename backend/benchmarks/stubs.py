@@ -0,0 +1,154 @@
+"""Local stand-ins for OpenAI and Supabase so benchmarks run offline."""
+import asyncio
+import io
+import time
+import wave
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from app.services.transcription_service import TranscriptionService
+
+# WAV以外（チャンク分割後のMP3など）の長さを推定する際のビットレート（48kbps）
+STUB_BYTES_PER_SECOND = 6000
+
+
+def _audio_duration(audio_file: BinaryIO) -> float:
+    position = audio_file.tell()
+    data = audio_file.read()
+    audio_file.seek(position)
+    try:
+        with wave.open(io.BytesIO(data), "rb") as f:
+            return f.getnframes() / f.getframerate()
+    except (wave.Error, EOFError):
+        return len(data) / STUB_BYTES_PER_SECOND
+
+
+class StubWhisperClient:
+    """
+    Drop-in for ``WhisperClient`` that returns a synthetic transcript.
+
+    Each call blocks for ``setup_seconds + duration * realtime_factor`` to
+    model API latency, and returns one segment every ``segment_seconds``.
+    """
+
+    model = "whisper-1"
+
+    def __init__(self, realtime_factor: float = 0.02, setup_seconds: float = 0.2, segment_seconds: float = 5.0):
+        self.realtime_factor = realtime_factor
+        self.setup_seconds = setup_seconds
+        self.segment_seconds = segment_seconds
+
+    def transcribe(
+        self,
+        audio_file: BinaryIO,
+        filename: str,
+        language: Optional[str] = None,
+        response_format: str = "verbose_json"
+    ) -> dict:
+        duration = _audio_duration(audio_file)
+        time.sleep(self.setup_seconds + duration * self.realtime_factor)
+
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + self.segment_seconds, duration)
+            segments.append({"start": start, "end": end, "text": f"セグメント{len(segments)}。"})
+            start = end
+
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "language": language or "ja",
+            "duration": duration,
+            "segments": segments
+        }
+
+
+class _StubResponse:
+    def __init__(self, data: Any):
+        self.data = data
+
+
+class _StubQuery:
+    """The subset of the PostgREST query builder used by TranscriptionService."""
+
+    def __init__(self, client: "StubSupabase", table: str):
+        self._client = client
+        self._table = table
+        self._operation = "select"
+        self._row: Optional[dict] = None
+        self._filters: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._single = False
+
+    def select(self, *args, **kwargs) -> "_StubQuery":
+        self._operation = "select"
+        return self
+
+    def insert(self, row: dict) -> "_StubQuery":
+        self._operation = "insert"
+        self._row = row
+        return self
+
+    def delete(self) -> "_StubQuery":
+        self._operation = "delete"
+        return self
+
+    def eq(self, column: str, value: Any) -> "_StubQuery":
+        self._filters.append((column, value))
+        return self
+
+    def limit(self, count: int) -> "_StubQuery":
+        self._limit = count
+        return self
+
+    def maybe_single(self) -> "_StubQuery":
+        self._single = True
+        return self
+
+    def order(self, *args, **kwargs) -> "_StubQuery":
+        return self
+
+    def or_(self, *args, **kwargs) -> "_StubQuery":
+        return self
+
+    async def execute(self) -> _StubResponse:
+        await asyncio.sleep(self._client.latency_seconds)
+        rows = self._client.tables.setdefault(self._table, [])
+
+        if self._operation == "insert":
+            rows.append(self._row)
+            return _StubResponse([self._row])
+
+        matched = [row for row in rows if all(row.get(column) == value for column, value in self._filters)]
+        if self._operation == "delete":
+            for row in matched:
+                rows.remove(row)
+            return _StubResponse(matched)
+
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        if self._single:
+            return _StubResponse(matched[0] if matched else None)
+        return _StubResponse(matched)
+
+
+class StubSupabase:
+    """In-memory tables behind a fixed per-query latency."""
+
+    def __init__(self, latency_seconds: float = 0.005):
+        self.latency_seconds = latency_seconds
+        self.tables: Dict[str, List[dict]] = {}
+
+    def table(self, name: str) -> _StubQuery:
+        return _StubQuery(self, name)
+
+
+class BenchTranscriptionService(TranscriptionService):
+    """TranscriptionService that stores results in a StubSupabase."""
+
+    def __init__(self, *args, database: StubSupabase, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._database = database
+
+    @property
+    def db(self) -> StubSupabase:
+        return self._database
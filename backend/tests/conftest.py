@@ -0,0 +1,7 @@
+import os
+
+# 設定の読み込み時に外部サービスの資格情報が必要なため、テスト用のダミー値を入れる
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
@@ -0,0 +1,75 @@
+import os
+import stat
+import sys
+
+import pytest
+
+from app.infrastructure import audio
+
+
+def _fake_ffmpeg(tmp_path, monkeypatch, script: str) -> None:
+    """Put a Python script named ``ffmpeg`` first on PATH."""
+    path = tmp_path / "ffmpeg"
+    path.write_text(f"#!{sys.executable}\nimport sys\n{script}\n")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ.get('PATH', '')}")
+
+
+def test_decode_to_array_survives_large_stderr_output(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    # パイプの容量（64KB程度）を大きく超える警告を出してから標準出力へPCMを書く
+    _fake_ffmpeg(tmp_path, monkeypatch, "\n".join([
+        "for i in range(20000):",
+        "    sys.stderr.write(f'[mp3 @ 0x0] invalid frame {i}\\n')",
+        "sys.stderr.flush()",
+        "sys.stdout.buffer.write(b'\\x00\\x40' * 16000 * 3)",
+    ]))
+
+    samples = audio.decode_to_array("in.mp3", duration=3.0)
+
+    assert samples.dtype == np.float32
+    assert len(samples) == 16000 * 3
+    assert samples[0] == pytest.approx(0.5)
+
+
+def test_decode_to_array_grows_buffer_past_the_estimate(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    _fake_ffmpeg(tmp_path, monkeypatch, "sys.stdout.buffer.write(b'\\x00\\x00' * 16000 * 5)")
+
+    assert len(audio.decode_to_array("in.mp3", duration=1.0)) == 16000 * 5
+
+
+def test_decode_to_array_reports_last_stderr_line_on_failure(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    _fake_ffmpeg(tmp_path, monkeypatch, "\n".join([
+        "sys.stderr.write('noise\\n' * 5000 + 'in.mp3: Invalid data found when processing input\\n')",
+        "sys.exit(1)",
+    ]))
+
+    with pytest.raises(audio.AudioToolError, match="Invalid data found"):
+        audio.decode_to_array("in.mp3")
+
+
+def test_local_engine_sizes_decode_buffer_from_probed_duration(tmp_path, monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    from app.infrastructure.engines.local_engines import FasterWhisperEngine
+
+    calls = []
+    monkeypatch.setattr(audio, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(audio, "decode_to_array", lambda path, duration=None: calls.append(duration) or [0.0])
+
+    class _Model:
+        def transcribe(self, source, **kwargs):
+            return iter(()), SimpleNamespace(language="ja", duration=12.5)
+
+    engine = FasterWhisperEngine()
+    monkeypatch.setattr(engine, "get_model", lambda: _Model())
+    path = tmp_path / "a.wav"
+    path.write_bytes(b"RIFF")
+
+    with open(path, "rb") as f:
+        asyncio.run(engine.transcribe(f, "a.wav", "ja", duration=12.5))
+
+    assert calls == [12.5]
@@ -0,0 +1,183 @@
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.domain.models import TranscriptionResult
+from app.infrastructure import audio
+from app.infrastructure.engines.base import TranscriptionEngine
+from app.services.chunking_service import AudioChunk, ChunkedTranscriber, merge_chunk_results, plan_chunks
+
+
+class StubEngine(TranscriptionEngine):
+    name = "stub"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    @property
+    def model_id(self) -> str:
+        return "stub-model"
+
+    async def transcribe(self, audio_file, filename, language=None):
+        self.calls += 1
+        return TranscriptionResult(text="ok", duration=1.0)
+
+
+def test_plan_chunks_single_chunk_for_short_audio():
+    chunks = plan_chunks(300.0, [], chunk_seconds=600.0)
+
+    assert chunks == [AudioChunk(index=0, start=0.0, end=300.0, keep_start=0.0, keep_end=300.0)]
+
+
+def test_plan_chunks_cuts_at_latest_silence_in_window():
+    silences = [(500.0, 502.0), (560.0, 564.0), (700.0, 701.0)]
+
+    chunks = plan_chunks(1000.0, silences, chunk_seconds=600.0, overlap_seconds=2.0, search_window_seconds=60.0)
+
+    # 540〜600秒の範囲にある最後の無音の中点（562秒）で切る
+    assert [(c.keep_start, c.keep_end) for c in chunks] == [(0.0, 562.0), (562.0, 1000.0)]
+    assert (chunks[0].start, chunks[0].end) == (0.0, 564.0)
+    assert (chunks[1].start, chunks[1].end) == (560.0, 1000.0)
+
+
+def test_plan_chunks_cuts_at_target_without_silence():
+    chunks = plan_chunks(1500.0, [(100.0, 101.0)], chunk_seconds=600.0, overlap_seconds=0.0)
+
+    assert [(c.keep_start, c.keep_end) for c in chunks] == [(0.0, 600.0), (600.0, 1200.0), (1200.0, 1500.0)]
+    assert [c.index for c in chunks] == [0, 1, 2]
+
+
+def test_plan_chunks_covers_whole_duration_without_gaps():
+    silences = [(t, t + 1.5) for t in range(50, 3000, 170)]
+
+    chunks = plan_chunks(3000.0, silences, chunk_seconds=600.0)
+
+    assert chunks[0].keep_start == 0.0
+    assert chunks[-1].keep_end == 3000.0
+    for previous, following in zip(chunks, chunks[1:]):
+        assert previous.keep_end == following.keep_start
+    assert all(0.0 <= c.start <= c.keep_start and c.keep_end <= c.end <= 3000.0 for c in chunks)
+
+
+def test_merge_offsets_segments_to_original_timeline():
+    chunks = [
+        AudioChunk(index=0, start=0.0, end=102.0, keep_start=0.0, keep_end=100.0),
+        AudioChunk(index=1, start=98.0, end=200.0, keep_start=100.0, keep_end=200.0),
+    ]
+    results = [
+        {"language": "ja", "segments": [{"start": 0.0, "end": 5.0, "text": "一"}]},
+        {"language": "ja", "segments": [{"start": 10.0, "end": 12.0, "text": "二"}]},
+    ]
+
+    merged = merge_chunk_results(chunks, results)
+
+    assert [(s["start"], s["end"], s["text"]) for s in merged["segments"]] == [(0.0, 5.0, "一"), (108.0, 110.0, "二")]
+    assert merged["text"] == "一二"
+    assert merged["language"] == "ja"
+    assert merged["duration"] == 200.0
+
+
+def test_merge_drops_overlap_by_keep_region():
+    chunks = [
+        AudioChunk(index=0, start=0.0, end=102.0, keep_start=0.0, keep_end=100.0),
+        AudioChunk(index=1, start=98.0, end=200.0, keep_start=100.0, keep_end=200.0),
+    ]
+    results = [
+        # 99〜101秒の発話は中点が100秒なので後ろのチャンクの担当
+        {"segments": [{"start": 90.0, "end": 97.0, "text": "a"}, {"start": 99.0, "end": 101.0, "text": "b"}]},
+        {"segments": [{"start": 0.0, "end": 1.5, "text": "a-tail"}, {"start": 1.0, "end": 3.0, "text": "b"}]},
+    ]
+
+    merged = merge_chunk_results(chunks, results)
+
+    assert [s["text"] for s in merged["segments"]] == ["a", "b"]
+    assert merged["segments"][1]["start"] == 99.0
+
+
+def test_merge_skips_repeated_text_at_boundary_and_keeps_order():
+    chunks = [
+        AudioChunk(index=0, start=0.0, end=62.0, keep_start=0.0, keep_end=60.0),
+        AudioChunk(index=1, start=58.0, end=120.0, keep_start=60.0, keep_end=120.0),
+    ]
+    results = [
+        {"segments": [{"start": 55.0, "end": 61.0, "text": " 同じ"}]},
+        {"segments": [{"start": 1.0, "end": 4.0, "text": "同じ "}, {"start": 3.0, "end": 6.0, "text": "次"}]},
+    ]
+
+    merged = merge_chunk_results(chunks, results)
+
+    assert [s["text"] for s in merged["segments"]] == [" 同じ", "次"]
+    # 前のセグメントと重ならないよう開始位置を詰める
+    assert merged["segments"][1]["start"] == 61.0
+
+
+def test_merge_language_is_majority_vote():
+    chunks = plan_chunks(1800.0, [], chunk_seconds=600.0)
+    results = [{"language": lang, "segments": []} for lang in ("ja", "en", "ja")]
+
+    assert merge_chunk_results(chunks, results)["language"] == "ja"
+
+
+def test_without_ffmpeg_rejects_file_over_single_request_limit(monkeypatch):
+    monkeypatch.setattr(audio, "ffmpeg_available", lambda: False)
+    engine = StubEngine()
+    transcriber = ChunkedTranscriber(engine, single_request_max_bytes=1024)
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(transcriber.transcribe(io.BytesIO(b"x" * 2048), "a.mp3"))
+
+    assert excinfo.value.status_code == 413
+    assert engine.calls == 0
+
+
+def test_without_ffmpeg_sends_small_file_whole(monkeypatch):
+    monkeypatch.setattr(audio, "ffmpeg_available", lambda: False)
+    engine = StubEngine()
+    transcriber = ChunkedTranscriber(engine, single_request_max_bytes=1024)
+
+    result = asyncio.run(transcriber.transcribe(io.BytesIO(b"x" * 512), "a.mp3"))
+
+    assert result["text"] == "ok"
+    assert engine.calls == 1
+
+
+def test_failed_chunk_cancels_the_others_before_workdir_is_removed(monkeypatch, tmp_path):
+    source = tmp_path / "long.mp3"
+    source.write_bytes(b"x" * 64)
+    finished = []
+
+    async def extract_segment(path, output_path, start, duration):
+        with open(output_path, "wb") as f:
+            f.write(b"chunk")
+        return output_path
+
+    class _FailingEngine(StubEngine):
+        async def transcribe(self, audio_file, filename, language=None):
+            self.calls += 1
+            if "part001" in filename:
+                raise HTTPException(status_code=502, detail="失敗")
+            try:
+                await asyncio.sleep(10)
+            finally:
+                # キャンセルされた時点でもチャンクファイルはまだ残っている
+                finished.append(os.path.exists(audio_file.name))
+            return TranscriptionResult(text="ok", duration=1.0)
+
+    monkeypatch.setattr(audio, "extract_segment", extract_segment)
+    engine = _FailingEngine()
+    transcriber = ChunkedTranscriber(engine, parallelism=3)
+    chunks = plan_chunks(1800.0, [], chunk_seconds=600.0)
+
+    async def scenario():
+        with pytest.raises(HTTPException):
+            await asyncio.wait_for(transcriber._transcribe_chunks(str(source), "long.mp3", chunks, None), timeout=5)
+        # 取り残されたタスクがない
+        assert [t for t in asyncio.all_tasks() if t is not asyncio.current_task()] == []
+
+    asyncio.run(scenario())
+    assert engine.calls == 3
+    assert finished == [True, True]
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+from typing import Optional
+
+import pytest
+
+from app.domain.models import TranscriptionResult
+from app.infrastructure.engines.base import TranscriptionEngine
+from app.infrastructure.engines.registry import EngineRegistry
+from app.services.engine_router import EngineRouter
+
+
+class _ThreadEngine(TranscriptionEngine):
+    """Engine whose work runs in a thread until ``release`` is set."""
+
+    def __init__(self, name: str, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.release = threading.Event()
+        self.fail = False
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.name}-model"
+
+    async def transcribe(self, audio_file, filename, language: Optional[str] = None, duration=None) -> TranscriptionResult:
+        return await self.run_in_thread(self._transcribe_sync)
+
+    def _transcribe_sync(self) -> TranscriptionResult:
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("boom")
+        return TranscriptionResult(text=self.name, engine=self.name)
+
+
+def _router(primary: TranscriptionEngine, fallback: TranscriptionEngine, **breaker_options) -> EngineRouter:
+    registry = EngineRegistry()
+    registry.register(primary)
+    registry.register(fallback)
+    return EngineRouter(
+        registry,
+        hedge_engine=fallback.name,
+        hedge_min_delay=0.05,
+        breaker_options=breaker_options or None
+    )
+
+
+@pytest.fixture
+def audio_path(tmp_path):
+    path = tmp_path / "a.mp3"
+    path.write_bytes(b"\x00" * 128)
+    return str(path)
+
+
+def test_losing_hedge_keeps_its_slot_until_the_thread_returns(audio_path):
+    primary = _ThreadEngine("openai", max_concurrency=4, realtime_factor=0.001)
+    fallback = _ThreadEngine("faster_whisper", max_concurrency=1)
+    fallback.release.set()
+    router = _router(primary, fallback)
+
+    async def scenario():
+        with open(audio_path, "rb") as f:
+            result = await router.transcribe(primary, f, "a.mp3", duration=10.0, hedge=True)
+        assert result.engine == "faster_whisper"
+
+        # 打ち切られた側のスレッドはまだ動いているので、スロットも埋まったまま
+        await asyncio.sleep(0.05)
+        assert primary.active == 1
+
+        primary.release.set()
+        while router._abandoned:
+            await asyncio.sleep(0.01)
+
+        stats = primary.stats()
+        assert primary.active == 0
+        assert stats["cancelled"] == 1
+        assert stats["failures"] == 0
+        assert stats["completed"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_failed_run_is_counted_as_failure_not_cancellation(audio_path):
+    engine = _ThreadEngine("openai")
+    engine.fail = True
+    engine.release.set()
+    router = _router(engine, _ThreadEngine("faster_whisper"))
+    router.hedge_engine = None
+
+    async def scenario():
+        with open(audio_path, "rb") as f:
+            with pytest.raises(RuntimeError):
+                await router.transcribe(engine, f, "a.mp3", duration=10.0)
+
+    asyncio.run(scenario())
+    assert engine.stats()["failures"] == 1
+    assert engine.stats()["cancelled"] == 0
+
+
+class _FakeQuery:
+    """Chainable stand-in for a Supabase table query."""
+
+    def __init__(self, rows=None):
+        self.rows = rows or []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def insert(self, row):
+        return _FakeQuery([row])
+
+    async def execute(self):
+        from types import SimpleNamespace
+
+        return SimpleNamespace(data=self.rows)
+
+
+def _service(router: EngineRouter):
+    from app.services.cache_service import ResultCache
+    from app.services.transcription_service import TranscriptionService
+
+    class _Service(TranscriptionService):
+        @property
+        def db(self):
+            from types import SimpleNamespace
+
+            return SimpleNamespace(table=lambda name: _FakeQuery())
+
+    return _Service(router, cache=ResultCache())
+
+
+def test_cache_hit_does_not_take_the_half_open_probe(audio_path, monkeypatch):
+    from app.services import engine_router as module
+    from app.services.cache_service import ResultCache
+
+    primary = _ThreadEngine("openai", max_concurrency=4, realtime_factor=0.001)
+    fallback = _ThreadEngine("faster_whisper")
+    now = [0.0]
+    router = _router(primary, fallback, failure_ratio=0.5, min_calls=1, cooldown_seconds=60.0, clock=lambda: now[0])
+    breaker = router._breaker(primary)
+    breaker.record(False)
+    now[0] += 60.0
+    service = _service(router)
+    service.cache.put(ResultCache.make_key("abc", None, primary.model_id), {"text": "cached", "segments": []})
+    monkeypatch.setattr(module.audio, "ffmpeg_available", lambda: False)
+
+    async def scenario():
+        with open(audio_path, "rb") as f:
+            return await service.transcribe_and_save(f, "a.mp3", user_id="u1", audio_sha256="abc")
+
+    saved = asyncio.run(scenario())
+
+    assert saved["text"] == "cached"
+    assert saved["model"] == primary.model_id
+    # 半開状態の試行枠は次に実際に送るリクエストのために残っている
+    assert breaker.allow_request()
+
+
+def test_open_breaker_reroutes_to_fallback_on_cache_miss(audio_path, monkeypatch):
+    from app.services import engine_router as module
+
+    primary = _ThreadEngine("openai", max_concurrency=4, realtime_factor=0.001)
+    fallback = _ThreadEngine("faster_whisper")
+    fallback.release.set()
+    router = _router(primary, fallback, failure_ratio=0.5, min_calls=1, cooldown_seconds=60.0)
+    router._breaker(primary).record(False)
+    service = _service(router)
+    monkeypatch.setattr(module.audio, "ffmpeg_available", lambda: False)
+
+    async def scenario():
+        with open(audio_path, "rb") as f:
+            return await service.transcribe_and_save(f, "a.mp3", user_id="u1", audio_sha256="abc")
+
+    saved = asyncio.run(scenario())
+
+    assert saved["text"] == "faster_whisper"
+    assert saved["model"] == fallback.model_id
+    assert primary.stats()["completed"] == 0
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from app.core.subtitles import format_timestamp
+from app.services import export_service as module
+from app.services.export_service import ExportCache, RENDERERS, stream_export
+
+RECORD = {
+    "id": "t1",
+    "title": "会議",
+    "text": "こんにちは 世界",
+    "updated_at": "2024-01-01T00:00:00",
+    "segments": [
+        {"start": 0.0, "end": 1.5, "text": " こんにちは "},
+        {"start": 1.5, "end": 2.0, "text": "   "},
+        {"start": 2.0, "end": 2.9999, "text": "世界"},
+    ],
+}
+
+
+def _render(export_format: str, record: dict = RECORD) -> str:
+    return "".join(RENDERERS[export_format](record))
+
+
+@pytest.mark.parametrize("seconds, marker, expected", [
+    (0.0, ",", "00:00:00,000"),
+    (None, ",", "00:00:00,000"),
+    (-1.0, ",", "00:00:00,000"),
+    (2.9999, ",", "00:00:03,000"),
+    (59.9996, ".", "00:01:00.000"),
+    (3661.5, ".", "01:01:01.500"),
+    (360000.0, ",", "100:00:00,000"),
+])
+def test_format_timestamp(seconds, marker, expected):
+    assert format_timestamp(seconds, marker) == expected
+
+
+def test_render_srt_skips_empty_segments_and_renumbers():
+    assert _render("srt") == (
+        "1\n00:00:00,000 --> 00:00:01,500\nこんにちは\n\n"
+        "2\n00:00:02,000 --> 00:00:03,000\n世界\n\n"
+    )
+
+
+def test_render_vtt_uses_header_and_dot_marker():
+    assert _render("vtt") == (
+        "WEBVTT\n\n"
+        "1\n00:00:00.000 --> 00:00:01.500\nこんにちは\n\n"
+        "2\n00:00:02.000 --> 00:00:03.000\n世界\n\n"
+    )
+
+
+def test_render_txt_uses_segments_or_falls_back_to_text():
+    assert _render("txt") == "こんにちは\n世界\n"
+    assert _render("txt", {**RECORD, "segments": []}) == "こんにちは 世界"
+
+
+def test_render_json_is_valid_and_keeps_all_segments():
+    data = json.loads(_render("json"))
+
+    assert data["title"] == "会議"
+    assert [seg["text"] for seg in data["segments"]] == [" こんにちは ", "   ", "世界"]
+    assert json.loads(_render("json", {**RECORD, "segments": None}))["segments"] == []
+
+
+def test_stream_export_sends_blocks_and_caches_the_whole_body(monkeypatch):
+    monkeypatch.setattr(module, "STREAM_BLOCK_SIZE", 32)
+    cache = ExportCache()
+
+    chunks = list(stream_export(RECORD, "srt", cache))
+
+    assert len(chunks) > 1
+    assert b"".join(chunks) == _render("srt").encode()
+    assert cache.get(("t1", RECORD["updated_at"], "srt")) == b"".join(chunks)
+
+
+def test_stream_export_caches_nothing_when_client_disconnects(monkeypatch):
+    monkeypatch.setattr(module, "STREAM_BLOCK_SIZE", 16)
+    cache = ExportCache()
+
+    stream = stream_export(RECORD, "srt", cache)
+    next(stream)
+    stream.close()
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_stream_export_skips_cache_for_bodies_over_the_limit(monkeypatch):
+    monkeypatch.setattr(module, "STREAM_BLOCK_SIZE", 16)
+    cache = ExportCache(max_bytes=64)
+
+    body = b"".join(stream_export(RECORD, "srt", cache))
+
+    assert len(body) > 64
+    assert cache.stats()["entries"] == 0
+
+
+def test_export_cache_evicts_least_recently_used():
+    cache = ExportCache(max_entries=2, max_bytes=10)
+    cache.put(("a", "", "srt"), b"1234")
+    cache.put(("b", "", "srt"), b"1234")
+    cache.get(("a", "", "srt"))
+
+    cache.put(("c", "", "srt"), b"1234")
+    assert cache.get(("b", "", "srt")) is None
+    assert cache.get(("a", "", "srt")) == b"1234"
+
+    # バイト数の上限でも古いものから捨てる
+    cache.put(("d", "", "srt"), b"123456")
+    assert cache.get(("c", "", "srt")) is None
+    assert cache.stats()["bytes"] == 10
+
+
+def test_export_cache_keys_on_updated_at_and_invalidates_all_formats():
+    cache = ExportCache()
+    cache.put(("t1", "v1", "srt"), b"old")
+    cache.put(("t1", "v1", "vtt"), b"old")
+    cache.put(("t2", "v1", "srt"), b"other")
+
+    assert cache.get(("t1", "v2", "srt")) is None
+
+    cache.invalidate("t1")
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == len(b"other")
@@ -0,0 +1,161 @@
+import pytest
+from fastapi import HTTPException
+
+from app.infrastructure import audio
+from app.services import file_service as module
+from app.services.file_service import FileService, max_file_size
+
+
+def test_max_file_size_uses_upload_limit_with_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio, "ffmpeg_available", lambda: True)
+
+    assert max_file_size() == module.MAX_FILE_SIZE
+
+
+def test_max_file_size_falls_back_to_single_request_limit_without_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio, "ffmpeg_available", lambda: False)
+
+    assert max_file_size() == min(module.MAX_FILE_SIZE, module.WHOLE_FILE_MAX_SIZE)
+
+
+def test_declared_size_over_25mb_rejected_without_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio, "ffmpeg_available", lambda: False)
+
+    with pytest.raises(HTTPException) as excinfo:
+        FileService().validate_filename_and_size("long.mp3", 30 * 1024 * 1024)
+
+    assert excinfo.value.status_code == 400
+
+
+def test_declared_size_over_25mb_accepted_with_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio, "ffmpeg_available", lambda: True)
+
+    FileService().validate_filename_and_size("long.mp3", 30 * 1024 * 1024)
+
+
+def _wav_bytes(seconds: float = 0.5) -> bytes:
+    import io
+    import wave
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\x00\x00" * int(16000 * seconds))
+    return buffer.getvalue()
+
+
+def _multipart(parts, boundary: str = "testboundary") -> bytes:
+    body = b""
+    for name, value, filename in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{boundary}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + value + b"\r\n"
+    return body + f"--{boundary}--\r\n".encode()
+
+
+class _StreamedRequest:
+    """Minimal stand-in for a Starlette request whose body arrives in chunks."""
+
+    def __init__(self, body: bytes, chunk_size: int = 4096, headers=None, boundary: str = "testboundary"):
+        self.headers = {"content-type": f"multipart/form-data; boundary={boundary}", **(headers or {})}
+        self._chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        self.chunks_read = 0
+
+    async def stream(self):
+        for chunk in self._chunks:
+            self.chunks_read += 1
+            yield chunk
+
+
+def _ingest(request):
+    import asyncio
+
+    return asyncio.run(FileService().ingest_multipart(request))
+
+
+def test_ingest_multipart_writes_file_and_collects_fields():
+    import hashlib
+    import os
+
+    audio = _wav_bytes()
+    request = _StreamedRequest(_multipart([
+        ("language", b"ja", None),
+        ("file", audio, "../meeting.wav"),
+        ("title", "会議".encode(), None),
+    ]), chunk_size=1000)
+
+    received = _ingest(request)
+    try:
+        assert received.filename == "_meeting.wav"
+        assert received.fields == {"language": "ja", "title": "会議"}
+        assert received.upload.size == len(audio)
+        assert received.upload.sha256 == hashlib.sha256(audio).hexdigest()
+        with open(received.upload.path, "rb") as f:
+            assert f.read() == audio
+    finally:
+        received.upload.discard()
+    assert not os.path.exists(received.upload.path)
+
+
+def test_ingest_multipart_stops_reading_at_size_limit(monkeypatch):
+    import os
+
+    monkeypatch.setattr(module, "max_file_size", lambda: 64 * 1024)
+    created = []
+    real_mkstemp = module.tempfile.mkstemp
+
+    def tracking_mkstemp(*args, **kwargs):
+        fd, path = real_mkstemp(*args, **kwargs)
+        created.append(path)
+        return fd, path
+
+    monkeypatch.setattr(module.tempfile, "mkstemp", tracking_mkstemp)
+    request = _StreamedRequest(_multipart([("file", _wav_bytes(10.0), "long.wav")]), chunk_size=8192)
+
+    with pytest.raises(HTTPException) as excinfo:
+        _ingest(request)
+
+    assert excinfo.value.status_code == 413
+    assert request.chunks_read < len(request._chunks)
+    assert created and not any(os.path.exists(path) for path in created)
+
+
+def test_ingest_multipart_rejects_declared_length_before_reading(monkeypatch):
+    monkeypatch.setattr(module, "max_file_size", lambda: 1024)
+    request = _StreamedRequest(
+        _multipart([("file", _wav_bytes(), "a.wav")]),
+        headers={"content-length": str(10 * 1024 * 1024)}
+    )
+
+    with pytest.raises(HTTPException) as excinfo:
+        _ingest(request)
+
+    assert excinfo.value.status_code == 413
+    assert request.chunks_read == 0
+
+
+def test_ingest_multipart_rejects_extension_before_body():
+    request = _StreamedRequest(_multipart([("file", b"MZ" + b"\x00" * 10000, "tool.exe")]), chunk_size=256)
+
+    with pytest.raises(HTTPException) as excinfo:
+        _ingest(request)
+
+    assert excinfo.value.status_code == 400
+    assert request.chunks_read == 1
+
+
+def test_ingest_multipart_requires_file_part():
+    with pytest.raises(HTTPException) as excinfo:
+        _ingest(_StreamedRequest(_multipart([("language", b"ja", None)])))
+
+    assert excinfo.value.status_code == 400
+
+
+def test_ingest_multipart_rejects_non_audio_content():
+    with pytest.raises(HTTPException) as excinfo:
+        _ingest(_StreamedRequest(_multipart([("file", b"just some text " * 500, "fake.mp3")])))
+
+    assert excinfo.value.status_code == 400
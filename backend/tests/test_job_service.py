@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.job_service import JobQueue, JobStatus
+from app.services.progress_service import InMemoryProgressBroker
+
+
+class _BlockingService:
+    """Transcription service stand-in that holds every job until released."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def transcribe_and_save(self, **kwargs):
+        await self.release.wait()
+        return {"id": "t-1"}
+
+
+def _audio(tmp_path, name: str = "a.wav") -> str:
+    path = tmp_path / name
+    path.write_bytes(b"RIFF")
+    return str(path)
+
+
+def test_per_user_limit_rejects_with_429_and_retry_after(tmp_path):
+    async def scenario():
+        queue = JobQueue(max_workers=1, max_queue_size=10, max_jobs_per_user=2, broker=InMemoryProgressBroker())
+        service = _BlockingService()
+        await queue.start(service)
+        try:
+            await queue.submit(_audio(tmp_path, "1.wav"), "1.wav", user_id="u1")
+            await queue.submit(_audio(tmp_path, "2.wav"), "2.wav", user_id="u1")
+
+            with pytest.raises(HTTPException) as excinfo:
+                queue.check_admission("u1")
+            assert excinfo.value.status_code == 429
+            assert int(excinfo.value.headers["Retry-After"]) >= 1
+
+            # 他のユーザーは影響を受けない
+            queue.check_admission("u2")
+
+            # 拒否されたジョブの一時ファイルは削除される
+            rejected = _audio(tmp_path, "3.wav")
+            with pytest.raises(HTTPException):
+                await queue.submit(rejected, "3.wav", user_id="u1")
+            assert not (tmp_path / "3.wav").exists()
+
+            service.release.set()
+            await queue._queue.join()
+            queue.check_admission("u1")
+            assert all(job.status == JobStatus.DONE for job in queue.list_jobs("u1"))
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_with_503_and_retry_after(tmp_path):
+    async def scenario():
+        queue = JobQueue(max_workers=1, max_queue_size=1, broker=InMemoryProgressBroker())
+        service = _BlockingService()
+        await queue.start(service)
+        try:
+            await queue.submit(_audio(tmp_path, "1.wav"), "1.wav", user_id="u1")
+            await asyncio.sleep(0)  # ワーカーが1件目を取り出す
+            await queue.submit(_audio(tmp_path, "2.wav"), "2.wav", user_id="u2")
+
+            with pytest.raises(HTTPException) as excinfo:
+                queue.check_admission("u3")
+            assert excinfo.value.status_code == 503
+            assert int(excinfo.value.headers["Retry-After"]) >= 1
+        finally:
+            service.release.set()
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stopped_queue_rejects_with_503():
+    with pytest.raises(HTTPException) as excinfo:
+        JobQueue(broker=InMemoryProgressBroker()).check_admission("u1")
+
+    assert excinfo.value.status_code == 503
+
+
+def test_create_transcription_rejects_before_reading_body(tmp_path):
+    from types import SimpleNamespace
+
+    from app.api.v1.transcriptions import create_transcription
+    from app.services.file_service import FileService
+
+    class _UnreadRequest:
+        headers = {"content-type": "multipart/form-data; boundary=x"}
+        chunks_read = 0
+
+        async def stream(self):
+            self.chunks_read += 1
+            yield b""
+
+    async def scenario():
+        queue = JobQueue(max_workers=1, max_queue_size=10, max_jobs_per_user=1, broker=InMemoryProgressBroker())
+        service = _BlockingService()
+        await queue.start(service)
+        try:
+            await queue.submit(_audio(tmp_path), "a.wav", user_id="u1")
+            request = _UnreadRequest()
+
+            with pytest.raises(HTTPException) as excinfo:
+                await create_transcription(
+                    request=request,
+                    current_user=SimpleNamespace(id="u1"),
+                    engine_router=None,
+                    file_service=FileService(),
+                    job_queue=queue
+                )
+
+            assert excinfo.value.status_code == 429
+            assert "Retry-After" in excinfo.value.headers
+            assert request.chunks_read == 0
+        finally:
+            service.release.set()
+            await queue.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.api.v1 import metrics as endpoint
+from app.api.v1.health import health_check
+from app.core.metrics import metrics_registry
+from app.services.cache_service import result_cache
+
+
+def _bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_health_reports_status_only():
+    assert asyncio.run(health_check()) == {"status": "ok", "version": "1.0.0"}
+
+
+def test_metrics_are_open_without_a_token(monkeypatch):
+    monkeypatch.setattr(endpoint.settings, "METRICS_TOKEN", "")
+
+    assert asyncio.run(endpoint.verify_metrics_token(None)) is None
+
+
+@pytest.mark.parametrize("credentials", [None, _bearer("wrong"), _bearer("")])
+def test_metrics_reject_missing_or_wrong_token(monkeypatch, credentials):
+    monkeypatch.setattr(endpoint.settings, "METRICS_TOKEN", "scrape-secret")
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(endpoint.verify_metrics_token(credentials))
+    assert excinfo.value.status_code == 401
+
+
+def test_metrics_accept_the_configured_token(monkeypatch):
+    monkeypatch.setattr(endpoint.settings, "METRICS_TOKEN", "scrape-secret")
+
+    assert asyncio.run(endpoint.verify_metrics_token(_bearer("scrape-secret"))) is None
+
+
+def test_result_cache_stats_are_exported_as_a_gauge():
+    body = metrics_registry.render()
+
+    entries = result_cache.stats()["entries"]
+    assert f'whisper_result_cache{{stat="entries"}} {entries}' in body
+    assert 'whisper_result_cache{stat="misses"}' in body
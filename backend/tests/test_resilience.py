@@ -0,0 +1,160 @@
+import pytest
+
+from app.core.resilience import CircuitBreaker, CircuitState, LatencyTracker
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _breaker(clock: FakeClock, **kwargs) -> CircuitBreaker:
+    options = dict(failure_ratio=0.5, min_calls=4, window_size=10, cooldown_seconds=30.0)
+    options.update(kwargs)
+    return CircuitBreaker(clock=clock, **options)
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.record(False)
+    assert breaker.state == CircuitState.OPEN
+
+
+# --- LatencyTracker ---
+
+def test_percentile_of_empty_tracker_is_none():
+    assert LatencyTracker().percentile(95) is None
+
+
+@pytest.mark.parametrize("q, expected", [
+    (0, 1.0),
+    (10, 1.0),
+    (50, 5.0),
+    (51, 6.0),
+    (90, 9.0),
+    (95, 10.0),
+    (100, 10.0),
+])
+def test_percentile_uses_nearest_rank(q, expected):
+    tracker = LatencyTracker()
+    for value in [7, 3, 10, 1, 5, 9, 2, 8, 4, 6]:
+        tracker.observe(float(value))
+
+    assert tracker.percentile(q) == expected
+
+
+def test_tracker_keeps_only_the_latest_window():
+    tracker = LatencyTracker(window_size=3)
+    for value in [100.0, 1.0, 2.0, 3.0]:
+        tracker.observe(value)
+
+    assert len(tracker) == 3
+    assert tracker.percentile(100) == 3.0
+    assert tracker.stats() == {"samples": 3, "p50": 2.0, "p95": 3.0, "p99": 3.0}
+
+
+# --- CircuitBreaker ---
+
+def test_breaker_stays_closed_below_min_calls():
+    breaker = _breaker(FakeClock())
+    for _ in range(3):
+        breaker.record(False)
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_breaker_opens_when_failure_ratio_is_reached():
+    breaker = _breaker(FakeClock())
+    for ok in [True, True, False]:
+        breaker.record(ok)
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record(False)
+
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.times_opened == 1
+
+
+def test_breaker_stays_closed_under_failure_ratio():
+    breaker = _breaker(FakeClock())
+    for ok in [True, True, True, False] * 3:
+        breaker.record(ok)
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_open_breaker_allows_a_single_probe_after_cooldown():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _open(breaker)
+
+    clock.advance(29.9)
+    assert not breaker.allow_request()
+
+    clock.advance(0.1)
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes_breaker():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _open(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+
+    breaker.record(True)
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.stats()["recent_calls"] == 0
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_breaker_for_another_cooldown():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _open(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+
+    breaker.record(False)
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.times_opened == 2
+    clock.advance(29)
+    assert not breaker.allow_request()
+    clock.advance(1)
+    assert breaker.allow_request()
+
+
+def test_unreported_probe_is_given_up_after_cooldown():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _open(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+
+    clock.advance(29)
+    assert not breaker.allow_request()
+    clock.advance(1)
+    assert breaker.allow_request()
+
+
+def test_outcomes_recorded_while_open_are_ignored():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _open(breaker)
+
+    breaker.record(True)
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.stats() == {"state": "open", "recent_calls": 0, "recent_failures": 0, "times_opened": 1}
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core import security
+from app.core.security import TokenVerifier
+
+SECRET = "test-jwt-secret-" + "x" * 64
+JWKS_URL = "http://auth.local/.well-known/jwks.json"
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Jwks:
+    """JWKS endpoint served through an httpx mock transport, counting fetches."""
+
+    def __init__(self, *keys):
+        self.keys = list(keys)
+        self.fetches = 0
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(self._handle))
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.fetches += 1
+        return httpx.Response(200, json={"keys": [json.loads(jwk) for jwk in self.keys]})
+
+
+def _ec_key(kid: str):
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    jwk = json.loads(jwt.algorithms.ECAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update(kid=kid, alg="ES256", use="sig")
+    return private_key, json.dumps(jwk)
+
+
+def _claims(**overrides) -> dict:
+    claims = {"sub": "user-1", "email": "a@example.com", "role": "authenticated", "aud": "authenticated", "exp": int(time.time()) + 3600}
+    claims.update(overrides)
+    return claims
+
+
+def _verifier(jwks: _Jwks = None, clock: FakeClock = None, **kwargs) -> TokenVerifier:
+    jwks = jwks or _Jwks()
+    return TokenVerifier(
+        jwt_secret=SECRET,
+        jwks_url=JWKS_URL,
+        http_client=lambda: jwks.client,
+        clock=clock or FakeClock(),
+        **kwargs
+    )
+
+
+def test_hs256_token_is_verified_locally_and_cached(monkeypatch):
+    verifier = _verifier()
+    token = jwt.encode(_claims(), SECRET, algorithm="HS256")
+
+    user = asyncio.run(verifier.verify(token))
+    assert user.id == "user-1" and user.email == "a@example.com"
+
+    # 2回目は署名検証をせずキャッシュから返す
+    monkeypatch.setattr(jwt, "decode", lambda *args, **kwargs: pytest.fail("decoded again"))
+    assert asyncio.run(verifier.verify(token)) is user
+
+
+def test_cache_entry_expires_with_the_token(monkeypatch):
+    verifier = _verifier()
+    token = jwt.encode(_claims(), SECRET, algorithm="HS256")
+    user = SimpleNamespace(id="user-1")
+
+    verifier.remember(token, user, expires_at=time.time() + 10)
+    assert verifier.get_cached(token) is user
+
+    monkeypatch.setattr(security.time, "time", lambda: 10 ** 10)
+    assert verifier.get_cached(token) is None
+
+
+def test_cache_evicts_least_recently_used():
+    verifier = _verifier(cache_max_entries=2)
+    for name in ("a", "b"):
+        verifier.remember(name, SimpleNamespace(id=name))
+    verifier.get_cached("a")
+    verifier.remember("c", SimpleNamespace(id="c"))
+
+    assert verifier.get_cached("b") is None
+    assert verifier.get_cached("a").id == "a"
+
+
+@pytest.mark.parametrize("claims, error", [
+    (_claims(exp=int(time.time()) - 60), jwt.ExpiredSignatureError),
+    (_claims(aud="someone-else"), jwt.InvalidAudienceError),
+])
+def test_expired_or_foreign_tokens_are_rejected(claims, error):
+    verifier = _verifier()
+
+    with pytest.raises(error):
+        asyncio.run(verifier.verify(jwt.encode(claims, SECRET, algorithm="HS256")))
+    assert verifier.get_cached(jwt.encode(claims, SECRET, algorithm="HS256")) is None
+
+
+def test_token_with_wrong_secret_or_algorithm_is_rejected():
+    verifier = _verifier()
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        asyncio.run(verifier.verify(jwt.encode(_claims(), SECRET + "x", algorithm="HS256")))
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        asyncio.run(verifier.verify(jwt.encode(_claims(), SECRET, algorithm="HS512")))
+
+
+def test_es256_token_is_verified_against_jwks_fetched_once():
+    private_key, jwk = _ec_key("key-1")
+    jwks = _Jwks(jwk)
+    verifier = _verifier(jwks)
+
+    async def scenario():
+        for sub in ("user-1", "user-2", "user-3"):
+            token = jwt.encode(_claims(sub=sub), private_key, algorithm="ES256", headers={"kid": "key-1"})
+            assert (await verifier.verify(token)).id == sub
+
+    asyncio.run(scenario())
+    assert jwks.fetches == 1
+
+
+def test_unknown_kid_refetch_is_rate_limited():
+    old_key, old_jwk = _ec_key("old")
+    new_key, new_jwk = _ec_key("new")
+    jwks = _Jwks(old_jwk)
+    clock = FakeClock()
+    verifier = _verifier(jwks, clock, jwks_min_refresh_seconds=60)
+    rotated = jwt.encode(_claims(), new_key, algorithm="ES256", headers={"kid": "new"})
+
+    async def scenario():
+        await verifier.verify(jwt.encode(_claims(), old_key, algorithm="ES256", headers={"kid": "old"}))
+        jwks.keys.append(new_jwk)
+
+        # 直前に取得したばかりなので再取得せず、ローカル検証できない扱い
+        clock.now = 30
+        assert await verifier.verify(rotated) is None
+        assert await verifier.verify(jwt.encode(_claims(), new_key, algorithm="ES256", headers={"kid": "bogus"})) is None
+        assert jwks.fetches == 1
+
+        # 間隔を空ければ再取得して新しい鍵で検証できる
+        clock.now = 61
+        assert (await verifier.verify(rotated)).id == "user-1"
+        assert jwks.fetches == 2
+
+    asyncio.run(scenario())
+
+
+def test_jwks_fetch_failure_falls_back_to_remote_check():
+    failing = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+    verifier = TokenVerifier(jwt_secret=SECRET, jwks_url=JWKS_URL, http_client=lambda: failing, clock=FakeClock())
+    private_key, _ = _ec_key("key-1")
+
+    token = jwt.encode(_claims(), private_key, algorithm="ES256", headers={"kid": "key-1"})
+    assert asyncio.run(verifier.verify(token)) is None
+
+
+def _remote_user(monkeypatch, user_id: str = "remote-user"):
+    calls = []
+
+    async def get_user(token):
+        calls.append(token)
+        return SimpleNamespace(user=SimpleNamespace(
+            id=user_id, email="r@example.com", role="authenticated", created_at=None, email_confirmed_at=None
+        ))
+
+    monkeypatch.setattr(security, "get_supabase_client", lambda: SimpleNamespace(auth=SimpleNamespace(get_user=get_user)))
+    return calls
+
+
+def test_get_current_user_falls_back_to_supabase_when_not_locally_verifiable(monkeypatch):
+    monkeypatch.setattr(security, "token_verifier", TokenVerifier(jwt_secret="", jwks_url=JWKS_URL, clock=FakeClock()))
+    calls = _remote_user(monkeypatch)
+    token = jwt.encode(_claims(), "some-other-secret-of-sufficient-length", algorithm="HS256")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    user = asyncio.run(security.get_current_user(credentials))
+    assert user.id == "remote-user"
+
+    # 問い合わせ結果もキャッシュされ、2回目はSupabaseに問い合わせない
+    assert asyncio.run(security.get_current_user(credentials)).id == "remote-user"
+    assert calls == [token]
+
+
+def test_get_current_user_rejects_invalid_local_token_without_remote_call(monkeypatch):
+    monkeypatch.setattr(security, "token_verifier", _verifier())
+    calls = _remote_user(monkeypatch)
+    token = jwt.encode(_claims(exp=int(time.time()) - 60), SECRET, algorithm="HS256")
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(security.get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)))
+
+    assert excinfo.value.status_code == 401
+    assert calls == []
+
+
+def test_remote_verified_user_is_cached_only_until_the_token_expires(monkeypatch):
+    monkeypatch.setattr(security, "token_verifier", TokenVerifier(jwt_secret="", jwks_url=JWKS_URL, clock=FakeClock()))
+    calls = _remote_user(monkeypatch)
+    now = time.time()
+    token = jwt.encode(_claims(exp=int(now) + 10), "some-other-secret-of-sufficient-length", algorithm="HS256")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    asyncio.run(security.get_current_user(credentials))
+    assert security.token_verifier.get_cached(token) is not None
+
+    # キャッシュのTTL（300秒）より前でも、トークンの期限が切れたらSupabaseに問い合わせ直す
+    monkeypatch.setattr(security.time, "time", lambda: now + 11)
+    assert security.token_verifier.get_cached(token) is None
+    asyncio.run(security.get_current_user(credentials))
+    assert calls == [token, token]
+
+
+@pytest.mark.parametrize("claims", [
+    {"sub": "user-1"},
+    {"sub": "user-1", "exp": "tomorrow"},
+])
+def test_remote_verified_user_without_readable_expiry_is_not_cached(monkeypatch, claims):
+    monkeypatch.setattr(security, "token_verifier", TokenVerifier(jwt_secret="", jwks_url=JWKS_URL, clock=FakeClock()))
+    calls = _remote_user(monkeypatch)
+    token = jwt.encode(claims, "some-other-secret-of-sufficient-length", algorithm="HS256")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    asyncio.run(security.get_current_user(credentials))
+    asyncio.run(security.get_current_user(credentials))
+    assert calls == [token, token]
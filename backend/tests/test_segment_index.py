@@ -0,0 +1,129 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.segment_index import SegmentIndex, segment_index_cache
+
+SEGMENTS = [
+    {"start": 4.0, "end": 6.0, "text": "c"},
+    {"start": 0.0, "end": 2.0, "text": "a"},
+    {"start": 2.0, "end": 4.0, "text": "b"},
+    {"start": 8.0, "end": 10.0, "text": "d"},
+]
+
+
+def _texts(segments) -> str:
+    return "".join(seg["text"] for seg in segments)
+
+
+@pytest.mark.parametrize("start, end, limit, expected", [
+    (0.0, None, 100, "abcd"),
+    (0.0, 2.0, 100, "a"),         # endちょうどに始まるセグメントは含まない
+    (2.0, 4.0, 100, "b"),         # startちょうどに終わるセグメントは含まない
+    (1.999, 2.001, 100, "ab"),
+    (3.0, 5.0, 100, "bc"),
+    (6.0, 8.0, 100, ""),          # 無音区間だけの窓
+    (7.0, None, 100, "d"),
+    (10.0, None, 100, ""),        # 最後のセグメントの終了以降
+    (-5.0, 0.5, 100, "a"),
+    (0.0, None, 2, "ab"),
+    (5.0, 5.0, 100, ""),
+])
+def test_window_boundaries(start, end, limit, expected):
+    index = SegmentIndex(SEGMENTS, user_id="u1")
+
+    assert _texts(index.window(start, end, limit)) == expected
+
+
+def test_window_finds_long_segment_overlapping_later_ones():
+    index = SegmentIndex([
+        {"start": 0.0, "end": 10.0, "text": "long"},
+        {"start": 1.0, "end": 2.0, "text": "x"},
+        {"start": 3.0, "end": 4.0, "text": "y"},
+        {"start": 11.0, "end": 12.0, "text": "z"},
+    ], user_id="u1")
+
+    assert [seg["text"] for seg in index.window(5.0, 11.5)] == ["long", "z"]
+
+
+def test_segments_are_addressed_by_index_with_texts_intact():
+    index = SegmentIndex([{"start": 0.0, "end": 1.0, "text": "こんにちは"}, {"start": 1.0, "end": 2.0}], user_id="u1")
+
+    assert len(index) == 2
+    assert index.segment(0) == {"index": 0, "start": 0.0, "end": 1.0, "text": "こんにちは"}
+    assert index.segment(1)["text"] == ""
+    assert SegmentIndex([], user_id="u1").window(0.0) == []
+
+
+class _Rows:
+    """Chainable stand-in for a Supabase query returning one row."""
+
+    def __init__(self, db, columns):
+        self.db = db
+        self.columns = columns
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    async def execute(self):
+        self.db.queries.append(self.columns)
+        return SimpleNamespace(data=dict(self.db.row) if self.db.row else None)
+
+
+class _FakeDb:
+    def __init__(self, row):
+        self.row = row
+        self.queries = []
+
+    def table(self, name):
+        return SimpleNamespace(select=lambda columns: _Rows(self, columns))
+
+
+def _service(db):
+    from app.services.transcription_service import TranscriptionService
+
+    class _Service(TranscriptionService):
+        @property
+        def db(self):
+            return db
+
+    return _Service(router=None)
+
+
+def test_cached_index_is_revalidated_against_updated_at():
+    db = _FakeDb({"segments": SEGMENTS, "updated_at": "2024-01-01T00:00:00", "title": "t"})
+    service = _service(db)
+    segment_index_cache.invalidate("t1")
+
+    async def scenario():
+        first = await service.get_segment_index("t1", "u1")
+        again = await service.get_segment_index("t1", "u1")
+        assert again is first
+        # 2回目は updated_at だけを確認する軽い問い合わせ
+        assert db.queries == ["segments, updated_at", "title, updated_at"]
+
+        db.row = {"segments": SEGMENTS[:1], "updated_at": "2024-01-02T00:00:00", "title": "t"}
+        rebuilt = await service.get_segment_index("t1", "u1")
+        assert rebuilt is not first and len(rebuilt) == 1
+
+        db.row = None
+        assert await service.get_segment_index("t1", "u1") is None
+        assert segment_index_cache.get("t1") is None
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        segment_index_cache.invalidate("t1")
+
+
+def test_cached_index_of_another_user_is_not_served():
+    db = _FakeDb({"segments": SEGMENTS, "updated_at": "2024-01-01T00:00:00", "title": "t"})
+    service = _service(db)
+    segment_index_cache.put("t2", SegmentIndex(SEGMENTS, user_id="owner", updated_at="2024-01-01T00:00:00"))
+
+    try:
+        assert asyncio.run(service.get_segment_index("t2", "intruder")) is None
+        assert db.queries == []
+    finally:
+        segment_index_cache.invalidate("t2")
@@ -0,0 +1,125 @@
+import asyncio
+import base64
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.transcription_service import TranscriptionService, decode_cursor, encode_cursor
+
+ID = "2b1c8f0e-5d7a-4c1e-9f3b-6a2d8e4f1c0a"
+
+
+def _raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("created_at", [
+    "2024-12-12T09:30:00+00:00",
+    "2024-12-12T09:30:00.123456+00:00",
+    "2024-12-12T09:30:00",
+])
+def test_cursor_round_trips(created_at):
+    cursor = encode_cursor(created_at, ID)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, ID)
+
+
+def test_cursor_is_url_safe():
+    # クエリ文字列にそのまま載せられるよう、"+" "/" "=" を含めない
+    cursor = encode_cursor("2024-12-12T09:30:00+00:00", ID)
+
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not-base64!",
+    "あいう",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    _raw_cursor({"created_at": "2024-12-12T09:30:00", "id": ID}),
+    _raw_cursor(["2024-12-12T09:30:00"]),
+    _raw_cursor(["2024-12-12T09:30:00", ID, "extra"]),
+    _raw_cursor([1, 2]),
+    _raw_cursor(["2024-12-12T09:30:00", "not-a-uuid"]),
+    _raw_cursor(["yesterday", ID]),
+    _raw_cursor(['2024-12-12T09:30:00",id.gt.0', ID]),
+])
+def test_malformed_cursor_is_rejected_with_400(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor)
+
+    assert excinfo.value.status_code == 400
+
+
+class _Query:
+    """Chainable stand-in for a Supabase query that records the filters."""
+
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            self.db.calls.append((self.name, method, args))
+            return self
+        return call
+
+    async def execute(self):
+        if self.name == "transcription_counts":
+            return SimpleNamespace(data={"total": len(self.db.rows)})
+        return SimpleNamespace(data=self.db.rows)
+
+
+class _Db:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+def _service(db):
+    class _Service(TranscriptionService):
+        @property
+        def db(self):
+            return db
+
+    return _Service(router=None)
+
+
+def _rows(count):
+    return [{"id": f"{i:08d}-0000-4000-8000-000000000000", "created_at": f"2024-12-{12 - i:02d}T00:00:00+00:00"} for i in range(count)]
+
+
+def test_list_returns_next_cursor_from_last_item_of_the_page():
+    db = _Db(_rows(3))
+
+    page = asyncio.run(_service(db).get_user_transcriptions("u1", per_page=2))
+
+    assert [row["id"] for row in page["items"]] == [db.rows[0]["id"], db.rows[1]["id"]]
+    assert decode_cursor(page["next_cursor"]) == (db.rows[1]["created_at"], db.rows[1]["id"])
+    assert ("transcriptions", "limit", (3,)) in db.calls
+
+
+def test_list_has_no_next_cursor_on_the_last_page():
+    page = asyncio.run(_service(_Db(_rows(2))).get_user_transcriptions("u1", per_page=2))
+
+    assert page["next_cursor"] is None
+    assert page["total"] == 2
+
+
+def test_list_filters_after_the_cursor_position():
+    db = _Db([])
+    cursor = encode_cursor("2024-12-12T09:30:00+00:00", ID)
+
+    asyncio.run(_service(db).get_user_transcriptions("u1", cursor=cursor))
+
+    filters = [args[0] for table, method, args in db.calls if method == "or_"]
+    assert filters == [
+        f'created_at.lt."2024-12-12T09:30:00+00:00",'
+        f'and(created_at.eq."2024-12-12T09:30:00+00:00",id.lt.{ID})'
+    ]
@@ -0,0 +1,87 @@
+import pytest
+
+from app.domain.models import Segment, TranscriptionResult
+from app.services.trimming_service import TimelineMap, plan_trim
+
+
+@pytest.mark.parametrize("duration, silences, expected", [
+    # 無音なし・短い無音は残す
+    (10.0, [], [(0.0, 10.0)]),
+    (10.0, [(4.0, 5.0)], [(0.0, 10.0)]),
+    # 途中の長い無音は両側に余白を残して削る
+    (10.0, [(3.0, 6.0)], [(0.0, 3.3), (5.7, 10.0)]),
+    # 先頭・末尾の無音はファイル端の側に余白を残さない（発話側の余白は残す）
+    (10.0, [(0.0, 3.0)], [(2.7, 10.0)]),
+    (10.0, [(7.0, 10.0)], [(0.0, 7.3)]),
+    (10.0, [(7.0, 12.0)], [(0.0, 7.3)]),
+    # 端から余白以内で始まる・終わる無音も先頭・末尾として扱う
+    (10.0, [(0.1, 3.0)], [(2.7, 10.0)]),
+    (10.0, [(0.3, 3.0)], [(2.7, 10.0)]),
+    (10.0, [(7.0, 9.8)], [(0.0, 7.3)]),
+    # 余白より後で始まる無音は途中の無音
+    (10.0, [(0.5, 3.0)], [(0.0, 0.8), (2.7, 10.0)]),
+    # 余白同士が重なる近い無音は1つの区間にまとめる
+    (10.0, [(1.0, 3.5), (3.7, 6.0)], [(0.0, 1.3), (3.2, 4.0), (5.7, 10.0)]),
+    (10.0, [(1.0, 4.0), (3.0, 6.0)], [(0.0, 1.3), (5.7, 10.0)]),
+    # 入力の順序によらない
+    (10.0, [(6.0, 9.0), (1.0, 4.0)], [(0.0, 1.3), (3.7, 6.3), (8.7, 10.0)]),
+    # 全体が無音
+    (10.0, [(0.0, 10.0)], []),
+])
+def test_plan_trim(duration, silences, expected):
+    kept = plan_trim(duration, silences, min_silence_seconds=2.0, padding_seconds=0.3)
+
+    assert kept == pytest.approx(expected)
+
+
+# 元の音声 [0, 10) から [0, 2) と [5, 8) を残した場合（切り出し後は 0-2, 2-5）
+TIMELINE = TimelineMap([(0.0, 2.0), (5.0, 8.0)])
+
+
+@pytest.mark.parametrize("t, is_end, expected", [
+    (0.0, False, 0.0),
+    (0.0, True, 0.0),
+    (1.5, False, 1.5),
+    # 切れ目では開始は後の区間の先頭、終了は前の区間の末尾
+    (2.0, False, 5.0),
+    (2.0, True, 2.0),
+    (3.0, False, 6.0),
+    (3.0, True, 6.0),
+    (5.0, True, 8.0),
+    # 切り出し後の長さを超えた値は最後の区間の末尾に丸める
+    (6.0, False, 8.0),
+    (6.0, True, 8.0),
+])
+def test_timeline_to_original(t, is_end, expected):
+    assert TIMELINE.to_original(t, is_end=is_end) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("t, is_end, expected", [
+    # 先頭の無音を削った場合はずれた分を足す
+    (0.0, False, 3.0),
+    (0.0, True, 3.0),
+    (7.0, True, 10.0),
+])
+def test_timeline_to_original_after_leading_silence(t, is_end, expected):
+    assert TimelineMap([(3.0, 10.0)]).to_original(t, is_end=is_end) == pytest.approx(expected)
+
+
+def test_timeline_without_cuts_is_identity():
+    timeline = TimelineMap([])
+
+    assert timeline.trimmed_duration == 0.0
+    assert timeline.to_original(4.2) == 4.2
+
+
+def test_remap_keeps_segments_out_of_removed_silence():
+    result = TranscriptionResult(
+        text="a b",
+        language="ja",
+        duration=5.0,
+        segments=[Segment(start=0.5, end=2.0, text="a"), Segment(start=2.0, end=4.0, text="b")]
+    )
+
+    remapped = TIMELINE.remap(result, original_duration=10.0)
+
+    assert [(seg.start, seg.end) for seg in remapped.segments] == pytest.approx([(0.5, 2.0), (5.0, 7.0)])
+    assert remapped.duration == 10.0
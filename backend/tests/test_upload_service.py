@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.file_service import FileService
+from app.services.job_service import JobQueue, JobStatus
+from app.services.progress_service import InMemoryProgressBroker
+from app.services.upload_service import MANIFEST_NAME, UploadService
+
+
+class _FakeBucket:
+    """In-memory stand-in for a Supabase Storage bucket."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploaded_types = []
+
+    async def upload(self, path, file, options=None):
+        self.uploaded_types.append(type(file))
+        self.objects[path] = file if isinstance(file, bytes) else file.read()
+
+    async def download(self, path):
+        return self.objects[path]
+
+    async def list(self, prefix, options=None):
+        return [{"name": path[len(prefix) + 1:]} for path in self.objects if path.startswith(prefix + "/")]
+
+    async def remove(self, paths):
+        for path in paths:
+            self.objects.pop(path, None)
+
+
+class _Uploads(UploadService):
+    def __init__(self, bucket: _FakeBucket, job_queue: JobQueue, **kwargs):
+        super().__init__(FileService(), job_queue, **kwargs)
+        self.bucket_stub = bucket
+
+    def _storage(self):
+        return self.bucket_stub
+
+
+class _FailingService:
+    async def transcribe_and_save(self, **kwargs):
+        raise RuntimeError("engine exploded")
+
+
+def _wav_bytes(seconds: float = 0.5) -> bytes:
+    import io
+    import wave
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\x00\x00" * int(16000 * seconds))
+    return buffer.getvalue()
+
+
+async def _body(data: bytes, chunk_size: int = 1000):
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+
+def _queue() -> JobQueue:
+    return JobQueue(max_workers=1, max_queue_size=10, broker=InMemoryProgressBroker())
+
+
+def _part_paths(bucket: _FakeBucket, session) -> list:
+    return [path for path in bucket.objects if path.startswith(session.prefix + "/part-")]
+
+
+def test_put_part_streams_from_disk_and_verifies_checksum():
+    bucket = _FakeBucket()
+    uploads = _Uploads(bucket, _queue())
+    data = _wav_bytes()
+
+    async def scenario():
+        session = await uploads.create_session("u1", "a.wav", len(data), part_size=1024 * 1024)
+        with pytest.raises(HTTPException) as excinfo:
+            await uploads.put_part(session, 1, _body(data), sha256="0" * 64)
+        assert excinfo.value.status_code == 400
+        assert not _part_paths(bucket, session)
+
+        stored = await uploads.put_part(session, 1, _body(data), sha256=hashlib.sha256(data).hexdigest())
+        return session, stored
+
+    session, stored = asyncio.run(scenario())
+
+    assert stored == {"part": 1, "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+    assert bucket.objects[session.part_path(1)] == data
+    # パートはバイト列ではなくファイルとして渡す（メモリに全体を持たない）
+    assert bucket.uploaded_types[-1] is not bytes
+
+
+def test_put_part_rejects_oversized_part_without_storing():
+    bucket = _FakeBucket()
+    uploads = _Uploads(bucket, _queue())
+
+    async def scenario():
+        session = await uploads.create_session("u1", "a.wav", 2 * 1024 * 1024, part_size=1024 * 1024)
+        with pytest.raises(HTTPException) as excinfo:
+            await uploads.put_part(session, 2, _body(b"\x00" * (1024 * 1024 + 1), chunk_size=64 * 1024))
+        return session, excinfo.value
+
+    session, error = asyncio.run(scenario())
+
+    assert error.status_code == 413
+    assert not _part_paths(bucket, session)
+
+
+def test_expired_sessions_lose_their_parts_but_completed_ones_keep_them():
+    bucket = _FakeBucket()
+    uploads = _Uploads(bucket, _queue())
+
+    async def scenario():
+        abandoned = await uploads.create_session("u1", "a.wav", 4, part_size=1024 * 1024)
+        completed = await uploads.create_session("u1", "b.wav", 4, part_size=1024 * 1024)
+        live = await uploads.create_session("u1", "c.wav", 4, part_size=1024 * 1024)
+        for session in (abandoned, completed, live):
+            await uploads.put_part(session, 1, _body(b"RIFF"))
+        completed.job_id = "job-1"
+        abandoned.expires_at = completed.expires_at = time.time() - 1
+
+        deleted = await uploads.expire_sessions()
+        return deleted, abandoned, completed, live
+
+    deleted, abandoned, completed, live = asyncio.run(scenario())
+
+    assert deleted == 1
+    assert not any(path.startswith(abandoned.prefix + "/") for path in bucket.objects)
+    assert _part_paths(bucket, completed) and _part_paths(bucket, live)
+    assert set(uploads._sessions) == {live.id}
+
+
+def test_expired_session_loaded_from_storage_is_deleted_on_access():
+    bucket = _FakeBucket()
+    uploads = _Uploads(bucket, _queue())
+
+    async def scenario():
+        session = await uploads.create_session("u1", "a.wav", 4, part_size=1024 * 1024)
+        await uploads.put_part(session, 1, _body(b"RIFF"))
+        session.expires_at = time.time() - 1
+        await uploads._save_manifest(session)
+
+        # 別プロセスから見た状態（メモリにセッションがない）
+        other = _Uploads(bucket, _queue())
+        return session, await other.get_session(session.id, "u1")
+
+    session, found = asyncio.run(scenario())
+
+    assert found is None
+    assert f"{session.prefix}/{MANIFEST_NAME}" not in bucket.objects
+    assert not _part_paths(bucket, session)
+
+
+def test_failed_job_deletes_the_uploaded_parts(monkeypatch):
+    from app.infrastructure import audio
+
+    monkeypatch.setattr(audio, "ffmpeg_available", lambda: True)
+    bucket = _FakeBucket()
+    queue = _queue()
+    uploads = _Uploads(bucket, queue)
+    data = _wav_bytes()
+
+    async def scenario():
+        await queue.start(_FailingService())
+        try:
+            session = await uploads.create_session("u1", "a.wav", len(data), part_size=1024 * 1024)
+            await uploads.put_part(session, 1, _body(data))
+            job = await uploads.complete(session)
+            await queue._queue.join()
+            return session, job
+        finally:
+            await queue.stop()
+
+    session, job = asyncio.run(scenario())
+
+    assert job.status == JobStatus.FAILED
+    assert not any(path.startswith(session.prefix + "/") for path in bucket.objects)
+    assert session.id not in uploads._sessions
+
+
+def test_session_of_failed_job_can_be_aborted():
+    queue = _queue()
+    uploads = _Uploads(_FakeBucket(), queue)
+    session = SimpleNamespace(job_id="job-1", user_id="u1")
+
+    assert not uploads.can_abort(session)
+
+    queue._jobs["job-1"] = SimpleNamespace(user_id="u1", status=JobStatus.FAILED)
+    assert uploads.can_abort(session)
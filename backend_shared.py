@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+バックエンド（backend/app）のモジュールをプロトタイプから共用するための読み込み処理
+
+- 直下の app.py とバックエンドの app パッケージの名前が衝突するため、
+  パッケージとしてではなくファイルパスから読み込む
+- 読み込めるのは標準ライブラリだけに依存するモジュール（app.* をimportしないもの）に限る
+"""
+import importlib.util
+import os
+import sys
+
+_BACKEND_APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'app')
+
+
+def load_backend_module(*parts):
+    """backend/app 以下のモジュールを読み込む（例: load_backend_module('core', 'subtitles')）"""
+    name = '_backend_' + '_'.join(parts)
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    path = os.path.join(_BACKEND_APP_DIR, *parts[:-1], parts[-1] + '.py')
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+faster-whisper バッチ推論モード
+
+VADで分割した音声ウィンドウ（最大30秒）をまとめてエンコーダ/デコーダに流す。
+1ファイル内のウィンドウは BatchedInferencePipeline がバッチ化し、
+さらに同時に届いた複数リクエストのバッチを CrossRequestBatcher が
+1回の generate 呼び出しに結合する（CPUでのスループット向上が目的）。
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+from faster_whisper import BatchedInferencePipeline
+
+
+class _BatchItem:
+    __slots__ = ('model', 'features', 'tokenizer', 'options', 'key', 'future')
+
+    def __init__(self, model, features, tokenizer, options):
+        self.model = model
+        self.features = features
+        self.tokenizer = tokenizer
+        self.options = options
+        self.key = _batch_key(model, tokenizer, options)
+        self.future = Future()
+
+    @property
+    def rows(self):
+        return self.features.shape[0]
+
+
+def _batch_key(model, tokenizer, options):
+    """同じ generate 呼び出しにまとめてよいかを判定するキー"""
+    return (
+        id(model),
+        tokenizer.language_code,
+        tokenizer.task,
+        options.beam_size,
+        options.patience,
+        options.length_penalty,
+        options.repetition_penalty,
+        options.no_repeat_ngram_size,
+        options.temperatures[0],
+        options.suppress_blank,
+        tuple(options.suppress_tokens or ()),
+        options.without_timestamps,
+        options.max_new_tokens,
+        options.multilingual,
+        str(options.initial_prompt),
+        options.hotwords,
+    )
+
+
+class CrossRequestBatcher:
+    """
+    複数リクエストのウィンドウを1つのバッチに結合して推論するスケジューラ
+
+    最初のバッチが届いてから max_delay 秒以内に届いた同条件のバッチを、
+    合計 max_batch_size 行まで結合する。推論は専用スレッドで直列に行う。
+    """
+
+    def __init__(self, max_batch_size=16, max_delay=0.02):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._requests = 0
+        self._thread = threading.Thread(target=self._loop, name='whisper-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, model, features, tokenizer, options):
+        """バッチを投入し、結果（行ごとの出力リスト）を待つ"""
+        item = _BatchItem(model, features, tokenizer, options)
+        self._queue.put(item)
+        return item.future.result()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batches': self._batches,
+                'rows': self._rows,
+                'requests': self._requests,
+                'avg_rows_per_batch': round(self._rows / self._batches, 2) if self._batches else 0,
+                'max_batch_size': self.max_batch_size,
+                'max_delay_ms': int(self.max_delay * 1000),
+            }
+
+    def _next(self, timeout=None):
+        if self._pending:
+            return self._pending.popleft()
+        return self._queue.get(timeout=timeout)
+
+    def _loop(self):
+        while True:
+            first = self._next()
+            group = [first]
+            rows = first.rows
+
+            # 保留中のバッチから同条件のものを先に結合
+            for item in list(self._pending):
+                if rows >= self.max_batch_size:
+                    break
+                if item.key == first.key and rows + item.rows <= self.max_batch_size:
+                    self._pending.remove(item)
+                    group.append(item)
+                    rows += item.rows
+
+            # 一定時間だけ後続のリクエストを待つ
+            deadline = time.monotonic() + self.max_delay
+            while rows < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item.key == first.key and rows + item.rows <= self.max_batch_size:
+                    group.append(item)
+                    rows += item.rows
+                else:
+                    self._pending.append(item)
+
+            self._run(group, rows)
+
+    def _run(self, group, rows):
+        first = group[0]
+        try:
+            features = np.concatenate([item.features for item in group]) if len(group) > 1 else first.features
+            _, outputs = BatchedInferencePipeline.generate_segment_batched(
+                _PipelineView(first.model), features, first.tokenizer, first.options
+            )
+        except BaseException as e:
+            for item in group:
+                item.future.set_exception(e)
+            return
+
+        with self._lock:
+            self._batches += 1
+            self._rows += rows
+            self._requests += len(group)
+
+        offset = 0
+        for item in group:
+            item.future.set_result(outputs[offset:offset + item.rows])
+            offset += item.rows
+
+
+class _PipelineView:
+    """generate_segment_batched が参照する self.model だけを持つ軽量ビュー"""
+
+    __slots__ = ('model',)
+
+    def __init__(self, model):
+        self.model = model
+
+
+class SharedBatchPipeline(BatchedInferencePipeline):
+    """generate をリクエスト横断のバッチャに委譲する BatchedInferencePipeline"""
+
+    def __init__(self, model, batcher):
+        super().__init__(model)
+        self._batcher = batcher
+
+    def generate_segment_batched(self, features, tokenizer, options):
+        # 単語タイムスタンプはエンコーダ出力が必要なため通常経路で処理
+        if options.word_timestamps:
+            return super().generate_segment_batched(features, tokenizer, options)
+        return None, self._batcher.submit(self.model, features, tokenizer, options)
+
+
+def transcribe_batched(model, batcher, audio, batch_size=8, **kwargs):
+    """
+    バッチ推論で文字起こし（戻り値は WhisperModel.transcribe と同じ (segments, info)）
+
+    Args:
+        model: WhisperModel
+        batcher: CrossRequestBatcher
+        audio: ファイルパスまたは16kHzモノラルのfloat32配列
+        batch_size: 1リクエストあたりのウィンドウ数
+    """
+    pipeline = SharedBatchPipeline(model, batcher)
+    return pipeline.transcribe(audio, batch_size=batch_size, **kwargs)
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推論ワーカープロセスプール（app.py / app_fast.py / app_mlx.py 共通）
+
+- N個の推論専用プロセスにジョブを振り分け、GILに縛られずコア数に応じて並列処理
+- 各ワーカーをCPUのサブセットに固定し、スレッド数（cpu_threads）をその数に合わせる
+- fork前にロードしたモデルはコピーオンライトで全ワーカーが共有
+- Webプロセスとはローカルキュー（multiprocessing.Queue）でやり取りし、
+  セグメントは確定するたびにWeb側へ送られる
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+from model_registry import ModelRegistry
+
+
+def split_cpus(num_workers):
+    """利用可能なCPUをワーカー数で均等に分割"""
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+
+    per_worker = max(1, len(cpus) // num_workers)
+    slices = []
+    for i in range(num_workers):
+        start = (i * per_worker) % len(cpus)
+        slices.append(cpus[start:start + per_worker])
+    return slices
+
+
+def _pin_cpus(cpus, cpu_threads):
+    """プロセスをCPUサブセットに固定し、数値計算ライブラリのスレッド数を合わせる"""
+    # macOSにはCPUアフィニティのAPIがないため、スレッド数の調整のみ行う
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[name] = str(cpu_threads)
+
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(cpu_threads)
+
+
+def _worker_main(worker_id, cpus, cpu_threads, loader, transcribe_fn, preloaded,
+                 warmup_models, memory_budget_mb, task_queue, result_queue, current_job):
+    """ワーカープロセスのメインループ"""
+    _pin_cpus(cpus, cpu_threads)
+
+    registry = ModelRegistry(
+        loader=lambda model_name: loader(model_name, cpu_threads),
+        memory_budget_mb=memory_budget_mb
+    )
+    # fork前にロード済みのモデルはそのまま使う（重みはコピーオンライトで共有）
+    for model_name, model in preloaded.items():
+        registry.register(model_name, model)
+    registry.warmup([m for m in warmup_models if m not in preloaded])
+
+    result_queue.put((None, 'ready', worker_id))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        job_id, model_name, audio_path, options = task
+        # 異常終了時にどのジョブを失ったか親プロセスが分かるよう共有メモリに記録
+        current_job.value = job_id
+        try:
+            model = registry.get(model_name)
+            info, segments = transcribe_fn(model, audio_path, options)
+            result_queue.put((job_id, 'info', info))
+            for segment in segments:
+                result_queue.put((job_id, 'segment', segment))
+            result_queue.put((job_id, 'done', None))
+        except Exception as e:
+            result_queue.put((job_id, 'error', f'{type(e).__name__}: {e}'))
+        current_job.value = 0
+
+
+class WorkerError(RuntimeError):
+    """ワーカー側で文字起こしに失敗した"""
+
+
+class _WorkerJob:
+    def __init__(self, job_id):
+        self.id = job_id
+        self.events = queue.Queue()
+
+
+class InferenceWorkerPool:
+    """
+    推論ワーカープロセスのプール
+
+    loader(model_name, cpu_threads) でモデルを生成し、
+    transcribe_fn(model, audio_path, options) が (info, セグメントのイテレータ) を返す。
+    どちらもモジュールレベルの関数にする（spawn時にpickleされるため）。
+    """
+
+    # 落ちたワーカーを確認する間隔（秒）
+    REAP_INTERVAL = 1.0
+
+    def __init__(self, loader, transcribe_fn, num_workers=2, cpu_threads=None,
+                 preload_models=(), preload_before_fork=True, start_method='fork',
+                 memory_budget_mb=4096, max_queue_size=32):
+        self.loader = loader
+        self.transcribe_fn = transcribe_fn
+        self.num_workers = num_workers
+        self.preload_models = list(preload_models)
+        # spawnではモデルを引き継げないため、各ワーカーが起動時にロードする
+        self.preload_before_fork = preload_before_fork and start_method == 'fork'
+        self.memory_budget_mb = memory_budget_mb
+
+        self._ctx = multiprocessing.get_context(start_method)
+        self._task_queue = self._ctx.Queue(maxsize=max_queue_size)
+        self._result_queue = self._ctx.Queue()
+        self._cpu_slices = split_cpus(num_workers)
+        self.cpu_threads = cpu_threads or len(self._cpu_slices[0])
+
+        self._preloaded = {}
+        self._processes = {}
+        self._current_jobs = {}
+        self._ready = set()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._dispatcher = None
+        self._running = False
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._restarts = 0
+
+    def start(self):
+        """モデルをロードしてからワーカーをforkし、結果の振り分けを開始"""
+        if self._running:
+            return
+
+        if self.preload_before_fork:
+            for model_name in self.preload_models:
+                print(f"[INFO] ワーカー起動前にモデル '{model_name}' をロード中...", flush=True)
+                self._preloaded[model_name] = self.loader(model_name, self.cpu_threads)
+
+        for worker_id in range(self.num_workers):
+            self._spawn(worker_id)
+
+        self._running = True
+        self._dispatcher = threading.Thread(target=self._dispatch, name='worker-dispatcher', daemon=True)
+        self._dispatcher.start()
+        print(f"[INFO] 推論ワーカー {self.num_workers} 個を起動 "
+              f"(cpu_threads={self.cpu_threads}, CPU割り当て={self._cpu_slices})", flush=True)
+
+    def stop(self, timeout=10):
+        """ワーカーを終了"""
+        self._running = False
+        for _ in self._processes:
+            self._task_queue.put(None)
+        for process in self._processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
+
+    def transcribe(self, model_name, audio_path, options, timeout=None):
+        """
+        ワーカーで文字起こし
+
+        Returns:
+            (info, segments): infoはワーカーが返した辞書、segmentsは
+            ワーカーから届き次第セグメントを返すジェネレータ
+
+        Raises:
+            RuntimeError: ワーカーが起動していない、またはキューが満杯
+            WorkerError: ワーカー側で失敗した
+        """
+        if not self._running:
+            raise RuntimeError('推論ワーカーが起動していません')
+
+        job = _WorkerJob(next(self._ids))
+        with self._lock:
+            self._jobs[job.id] = job
+            self._submitted += 1
+
+        try:
+            self._task_queue.put((job.id, model_name, audio_path, options), timeout=1.0)
+        except queue.Full:
+            self._finish(job.id, failed=True)
+            raise RuntimeError('推論ワーカーが混雑しています。しばらくしてから再度お試しください')
+
+        kind, payload = self._next_event(job, timeout)
+        if kind == 'error':
+            raise WorkerError(payload)
+        return payload, self._segments(job, timeout)
+
+    def stats(self):
+        """ワーカーの状態と処理件数"""
+        with self._lock:
+            return {
+                'workers': [
+                    {
+                        'id': worker_id,
+                        'pid': process.pid,
+                        'alive': process.is_alive(),
+                        'ready': worker_id in self._ready,
+                        'cpus': self._cpu_slices[worker_id],
+                        'busy_job': self._current_jobs[worker_id].value or None,
+                    }
+                    for worker_id, process in sorted(self._processes.items())
+                ],
+                'cpu_threads': self.cpu_threads,
+                'preloaded_models': list(self._preloaded),
+                'in_flight': len(self._jobs),
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'restarts': self._restarts,
+            }
+
+    def _spawn(self, worker_id):
+        current_job = self._ctx.Value('q', 0, lock=False)
+        process = self._ctx.Process(
+            target=_worker_main,
+            name=f'whisper-worker-{worker_id}',
+            args=(
+                worker_id,
+                self._cpu_slices[worker_id],
+                self.cpu_threads,
+                self.loader,
+                self.transcribe_fn,
+                self._preloaded,
+                self.preload_models,
+                self.memory_budget_mb,
+                self._task_queue,
+                self._result_queue,
+                current_job,
+            ),
+            daemon=True
+        )
+        process.start()
+        self._processes[worker_id] = process
+        self._current_jobs[worker_id] = current_job
+
+    def _next_event(self, job, timeout):
+        try:
+            kind, payload = job.events.get(timeout=timeout)
+        except queue.Empty:
+            self._finish(job.id, failed=True)
+            raise WorkerError('文字起こしがタイムアウトしました')
+
+        if kind in ('done', 'error'):
+            self._finish(job.id, failed=kind == 'error')
+        return kind, payload
+
+    def _segments(self, job, timeout):
+        try:
+            while True:
+                kind, payload = self._next_event(job, timeout)
+                if kind == 'done':
+                    return
+                if kind == 'error':
+                    raise WorkerError(payload)
+                yield payload
+        finally:
+            # 途中で切断された場合も追跡を解除（ワーカー側の結果は破棄される）
+            with self._lock:
+                self._jobs.pop(job.id, None)
+
+    def _finish(self, job_id, failed=False):
+        with self._lock:
+            if self._jobs.pop(job_id, None) is None:
+                return
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def _dispatch(self):
+        """ワーカーからの結果をジョブごとのキューに振り分け、落ちたワーカーを再起動"""
+        next_reap = time.monotonic() + self.REAP_INTERVAL
+        while self._running:
+            # 他のワーカーの結果が途切れなく届いていても、落ちたワーカーの検出を遅らせない
+            if time.monotonic() >= next_reap:
+                self._reap()
+                next_reap = time.monotonic() + self.REAP_INTERVAL
+
+            try:
+                job_id, kind, payload = self._result_queue.get(timeout=self.REAP_INTERVAL)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            if kind == 'ready':
+                with self._lock:
+                    self._ready.add(payload)
+                continue
+
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is not None:
+                job.events.put((kind, payload))
+
+    def _reap(self):
+        for worker_id, process in list(self._processes.items()):
+            if process.is_alive() or not self._running:
+                continue
+
+            print(f"[WARN] 推論ワーカー {worker_id} が終了しました (exitcode={process.exitcode})。再起動します", flush=True)
+            with self._lock:
+                self._ready.discard(worker_id)
+                lost = self._jobs.get(self._current_jobs[worker_id].value)
+                self._restarts += 1
+            if lost is not None:
+                lost.events.put(('error', f'推論ワーカーが異常終了しました (exitcode={process.exitcode})'))
+            self._spawn(worker_id)
+
+
+def workers_from_env(name='WHISPER_WORKERS', default='0'):
+    """ワーカー数を環境変数から取得（0ならリクエストスレッドで推論）"""
+    return max(0, int(os.environ.get(name, default)))
+
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Whisperモデルのレジストリ（app_fast.py / app_mlx.py 共通）
+
+- モデルごとのシングルフライトロード（同じモデルの同時ロードは1回だけ）
+- メモリ予算を超える場合は最も長く使われていないモデルを解放（LRU）
+- 起動時のウォームアップ
+- ロード時間・ヒット数・解放数などの統計
+"""
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# モデルごとのおおよそのメモリ使用量（MB）
+MODEL_SIZE_MB = {
+    'tiny': 150,
+    'base': 300,
+    'small': 1000,
+    'medium': 2600,
+    'large': 4700,
+    'large-v2': 4700,
+    'large-v3': 4700,
+    'distil-small.en': 700,
+    'distil-medium.en': 1600,
+    'distil-large-v2': 2500,
+    'distil-large-v3': 2500,
+}
+DEFAULT_MODEL_SIZE_MB = 2000
+
+
+def estimate_model_size_mb(model_name):
+    """モデル名からメモリ使用量を推定"""
+    return MODEL_SIZE_MB.get(model_name, DEFAULT_MODEL_SIZE_MB)
+
+
+def models_from_env(name, default=''):
+    """カンマ区切りの環境変数をモデル名のリストに変換"""
+    return [m.strip() for m in os.environ.get(name, default).split(',') if m.strip()]
+
+
+class ModelRegistry:
+    """メモリ予算付きLRUのモデルキャッシュ"""
+
+    def __init__(self, loader, memory_budget_mb=4096, size_estimator=estimate_model_size_mb):
+        self._loader = loader
+        self._size_estimator = size_estimator
+        self.memory_budget_mb = memory_budget_mb
+        self._models = OrderedDict()  # model_name -> dict(model, size_mb, load_seconds, hits, last_used)
+        self._loading = {}            # model_name -> Future
+        self._reserved_mb = 0         # ロード中のモデル用に確保済みのメモリ
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._load_failures = 0
+
+    def get(self, model_name):
+        """モデルを取得（未ロードならロード、同時ロードは1回にまとめる）"""
+        with self._lock:
+            entry = self._models.get(model_name)
+            if entry is not None:
+                self._models.move_to_end(model_name)
+                entry['hits'] += 1
+                entry['last_used'] = time.time()
+                self._hits += 1
+                return entry['model']
+
+            future = self._loading.get(model_name)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._loading[model_name] = future
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        # 他のリクエストがロード中なら完了を待つ
+        if not owner:
+            return future.result()
+
+        reserved_mb = 0
+        try:
+            size_mb = self._size_estimator(model_name)
+            self._evict_for(size_mb)
+            reserved_mb = size_mb
+
+            start = time.time()
+            model = self._loader(model_name)
+            load_seconds = time.time() - start
+
+            with self._lock:
+                # 確保分をロード済みモデルの使用量に付け替える
+                self._reserved_mb -= reserved_mb
+                reserved_mb = 0
+                self._models[model_name] = {
+                    'model': model,
+                    'size_mb': size_mb,
+                    'load_seconds': load_seconds,
+                    'hits': 0,
+                    'last_used': time.time(),
+                }
+            future.set_result(model)
+            return model
+        except BaseException as e:
+            with self._lock:
+                self._load_failures += 1
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                # ロードに失敗した場合は確保したメモリを返す
+                self._reserved_mb -= reserved_mb
+                self._loading.pop(model_name, None)
+
+    def register(self, model_name, model, load_seconds=0.0):
+        """ロード済みのモデルを登録（ワーカー起動前にロードしたモデルの引き継ぎ用）"""
+        with self._lock:
+            self._models[model_name] = {
+                'model': model,
+                'size_mb': self._size_estimator(model_name),
+                'load_seconds': load_seconds,
+                'hits': 0,
+                'last_used': time.time(),
+            }
+
+    def warmup(self, model_names):
+        """指定したモデルを事前ロード（失敗しても起動は継続）"""
+        for model_name in model_names:
+            try:
+                print(f"[INFO] ウォームアップ: モデル '{model_name}' をロード中...", flush=True)
+                self.get(model_name)
+            except Exception as e:
+                print(f"[WARN] ウォームアップ失敗 ({model_name}): {e}", flush=True)
+
+    def warmup_async(self, model_names):
+        """バックグラウンドスレッドでウォームアップ"""
+        thread = threading.Thread(target=self.warmup, args=(list(model_names),), daemon=True)
+        thread.start()
+        return thread
+
+    def evict(self, model_name):
+        """モデルを明示的に解放"""
+        with self._lock:
+            evicted = self._models.pop(model_name, None) is not None
+            if evicted:
+                self._evictions += 1
+        if evicted:
+            gc.collect()
+        return evicted
+
+    def stats(self):
+        """統計情報"""
+        with self._lock:
+            models = {
+                name: {
+                    'size_mb': entry['size_mb'],
+                    'load_seconds': round(entry['load_seconds'], 2),
+                    'hits': entry['hits'],
+                    'last_used': entry['last_used'],
+                }
+                for name, entry in self._models.items()
+            }
+            return {
+                'models': models,
+                'loading': list(self._loading),
+                'memory_used_mb': sum(entry['size_mb'] for entry in self._models.values()),
+                'memory_reserved_mb': self._reserved_mb,
+                'memory_budget_mb': self.memory_budget_mb,
+                'hits': self._hits,
+                'misses': self._misses,
+                'coalesced_loads': self._coalesced,
+                'evictions': self._evictions,
+                'load_failures': self._load_failures,
+            }
+
+    def _evict_for(self, size_mb):
+        """
+        新しいモデルが予算内に収まるよう古いモデルから解放し、その分のメモリを確保
+
+        同時に別々のモデルをロードしても合計が予算を超えないよう、ロード中の
+        モデルの確保分も使用量に含める。確保分は get() がロード後に解除する。
+        """
+        evicted = []
+        with self._lock:
+            used = sum(entry['size_mb'] for entry in self._models.values()) + self._reserved_mb
+            while self._models and used + size_mb > self.memory_budget_mb:
+                name, entry = self._models.popitem(last=False)
+                used -= entry['size_mb']
+                evicted.append(name)
+                self._evictions += 1
+            self._reserved_mb += size_mb
+
+        if evicted:
+            print(f"[INFO] メモリ予算超過のためモデルを解放: {', '.join(evicted)}", flush=True)
+            gc.collect()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字幕（SRT）書き出しの共通処理（app.py / app_fast.py / app_mlx.py 共通）
+
+- タイムスタンプと字幕1件分の書式は backend/app/core/subtitles.py を共用する
+  （FastAPIバックエンドのSRT/WebVTTエクスポートと同じ結果になる）
+- タイムスタンプは整数ミリ秒で計算するため、2.9996秒のような値でも「1000ミリ秒」にならない
+- 空のセグメントは飛ばし、番号は書き出した字幕だけで1から振り直す
+"""
+from backend_shared import load_backend_module
+
+_shared = load_backend_module('core', 'subtitles')
+format_timestamp = _shared.format_timestamp
+format_cue = _shared.format_cue
+iter_cues = _shared.iter_cues
+
+
+def format_clock(seconds):
+    """進捗表示用に秒数を HH:MM:SS 形式に変換"""
+    return format_timestamp(seconds)[:8]
+
+
+def srt_block(index, start, end, text):
+    """SRTの字幕1件分の文字列を返す"""
+    return format_cue(index, start, end, text)
+
+
+class SrtWriter:
+    """セグメントを受け取るたびにSRTファイルへ追記する"""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, start, end, text):
+        text = text.strip()
+        if not text:
+            return
+        self.count += 1
+        self.f.write(srt_block(self.count, start, end, text))
+
+
+def write_srt(f, segments):
+    """セグメント一覧をSRTとして書き出し、書き出した字幕の件数を返す"""
+    count = 0
+    for count, seg, text in iter_cues(segments):
+        f.write(srt_block(count, seg['start'], seg['end'], text))
+    return count
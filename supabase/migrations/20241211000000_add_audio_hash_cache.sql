@@ -0,0 +1,19 @@
+-- Whisper Web: 文字起こし結果キャッシュ用カラム
+-- 同一音声（SHA-256）・同一言語指定・同一モデルの結果を再利用する
+
+-- ============================================
+-- カラム追加
+-- ============================================
+
+ALTER TABLE transcriptions
+  ADD COLUMN IF NOT EXISTS audio_sha256 CHAR(64),         -- 音声ファイルのSHA-256
+  ADD COLUMN IF NOT EXISTS requested_language VARCHAR(10); -- リクエスト時の言語指定（自動検出は 'auto'）
+
+-- ============================================
+-- インデックス
+-- ============================================
+
+-- キャッシュ検索（ハッシュ + 言語指定 + モデル）を高速化
+CREATE INDEX IF NOT EXISTS idx_transcriptions_cache_key
+  ON transcriptions(audio_sha256, requested_language, model)
+  WHERE audio_sha256 IS NOT NULL;
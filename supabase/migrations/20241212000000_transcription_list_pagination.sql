@@ -0,0 +1,74 @@
+-- Whisper Web: 一覧取得の高速化
+-- キーセットページネーション・要約カラム・ユーザー別件数カウンタ
+
+-- ============================================
+-- 一覧表示用のテキストプレビュー
+-- ============================================
+-- 一覧では全文・セグメントを返さず、先頭200文字のみ返す
+
+ALTER TABLE transcriptions
+  ADD COLUMN IF NOT EXISTS text_preview VARCHAR(200)
+  GENERATED ALWAYS AS (LEFT(text, 200)) STORED;
+
+-- ============================================
+-- インデックス
+-- ============================================
+
+-- (user_id, created_at, id) のキーセットページネーション用
+CREATE INDEX IF NOT EXISTS idx_transcriptions_user_created_at
+  ON transcriptions(user_id, created_at DESC, id DESC);
+
+-- 複合インデックスで代替できるため削除
+DROP INDEX IF EXISTS idx_transcriptions_user_id;
+
+-- ============================================
+-- ユーザー別件数カウンタ
+-- ============================================
+-- count="exact" による全件スキャンを避けるため、トリガーで件数を維持
+
+CREATE TABLE IF NOT EXISTS transcription_counts (
+  user_id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+  total BIGINT NOT NULL DEFAULT 0
+);
+
+ALTER TABLE transcription_counts ENABLE ROW LEVEL SECURITY;
+
+-- 再実行できるよう、既存のポリシー・トリガーは作り直す
+DROP POLICY IF EXISTS "Users can view own transcription count" ON transcription_counts;
+CREATE POLICY "Users can view own transcription count"
+  ON transcription_counts
+  FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- SECURITY DEFINER のため、呼び出し元の search_path で別スキーマのテーブルを
+-- 参照させられないよう search_path を固定する
+CREATE OR REPLACE FUNCTION update_transcription_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO transcription_counts (user_id, total)
+    VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE
+      SET total = transcription_counts.total + 1;
+    RETURN NEW;
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE transcription_counts
+      SET total = GREATEST(total - 1, 0)
+      WHERE user_id = OLD.user_id;
+    RETURN OLD;
+  END IF;
+  RETURN NULL;
+END;
+$$ language 'plpgsql' SECURITY DEFINER
+SET search_path = public;
+
+DROP TRIGGER IF EXISTS update_transcription_counts_on_change ON transcriptions;
+CREATE TRIGGER update_transcription_counts_on_change
+  AFTER INSERT OR DELETE ON transcriptions
+  FOR EACH ROW
+  EXECUTE FUNCTION update_transcription_counts();
+
+-- 既存データの件数を反映
+INSERT INTO transcription_counts (user_id, total)
+SELECT user_id, COUNT(*) FROM transcriptions GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET total = EXCLUDED.total;
@@ -0,0 +1,82 @@
+-- Whisper Web: 文字起こし全文検索
+-- 日本語を正しく扱えるPGroonga（Supabase標準搭載）で全文インデックスを作成し、
+-- 一致したセグメントのタイムスタンプも返す
+
+-- ============================================
+-- 拡張機能
+-- ============================================
+
+CREATE EXTENSION IF NOT EXISTS pgroonga;
+
+-- ============================================
+-- インデックス
+-- ============================================
+
+-- 全文検索（日本語のN-gram/形態素に対応）
+CREATE INDEX IF NOT EXISTS idx_transcriptions_text_pgroonga
+  ON transcriptions USING pgroonga (text);
+
+-- ============================================
+-- 検索関数
+-- ============================================
+-- スコア順に文字起こしを返し、各文字起こし内で一致したセグメント
+-- [{index, start, end, text}, ...] を先頭から p_hits_per_transcription 件まで付与する
+-- SECURITY INVOKER のため、呼び出し元のRLSがそのまま適用される
+
+CREATE OR REPLACE FUNCTION search_transcriptions(
+  p_user_id UUID,
+  p_query TEXT,
+  p_limit INT DEFAULT 20,
+  p_offset INT DEFAULT 0,
+  p_hits_per_transcription INT DEFAULT 5
+)
+RETURNS TABLE (
+  transcription_id UUID,
+  title VARCHAR,
+  created_at TIMESTAMPTZ,
+  duration_seconds FLOAT,
+  score FLOAT,
+  hits JSONB
+)
+LANGUAGE sql STABLE
+AS $$
+  WITH matched AS (
+    SELECT
+      t.id,
+      t.title,
+      t.created_at,
+      t.duration_seconds,
+      t.segments,
+      pgroonga_score(t.tableoid, t.ctid) AS score
+    FROM transcriptions t
+    WHERE t.user_id = p_user_id
+      AND t.text &@~ p_query
+    ORDER BY score DESC, t.created_at DESC
+    LIMIT p_limit OFFSET p_offset
+  )
+  SELECT
+    m.id,
+    m.title,
+    m.created_at,
+    m.duration_seconds,
+    m.score,
+    COALESCE((
+      SELECT jsonb_agg(
+        jsonb_build_object(
+          'index', h.ord - 1,
+          'start', (h.seg->>'start')::FLOAT,
+          'end', (h.seg->>'end')::FLOAT,
+          'text', h.seg->>'text'
+        ) ORDER BY h.ord
+      )
+      FROM (
+        SELECT e.seg, e.ord
+        FROM jsonb_array_elements(m.segments) WITH ORDINALITY AS e(seg, ord)
+        WHERE (e.seg->>'text') &@~ p_query
+        ORDER BY e.ord
+        LIMIT p_hits_per_transcription
+      ) h
+    ), '[]'::JSONB)
+  FROM matched m
+  ORDER BY m.score DESC, m.created_at DESC;
+$$;
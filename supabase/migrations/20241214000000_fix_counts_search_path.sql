@@ -0,0 +1,5 @@
+-- Whisper Web: 件数カウンタのトリガー関数の search_path を固定
+-- 20241212000000 を適用済みのデータベース向け（SECURITY DEFINER の関数が
+-- 呼び出し元の search_path で別スキーマのテーブルを参照しないようにする）
+
+ALTER FUNCTION update_transcription_counts() SET search_path = public;
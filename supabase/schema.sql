@@ -17,6 +17,7 @@ CREATE TABLE IF NOT EXISTS transcriptions (
 
   -- 文字起こし結果
   text TEXT NOT NULL,
+  text_preview VARCHAR(200) GENERATED ALWAYS AS (LEFT(text, 200)) STORED,  -- 一覧表示用
   segments JSONB,  -- タイムスタンプ付きセグメント [{start, end, text}, ...]
 
   -- メタデータ
@@ -24,6 +25,10 @@ CREATE TABLE IF NOT EXISTS transcriptions (
   language VARCHAR(10),
   model VARCHAR(50) DEFAULT 'whisper-1',
 
+  -- 結果キャッシュ
+  audio_sha256 CHAR(64),          -- 音声ファイルのSHA-256
+  requested_language VARCHAR(10), -- リクエスト時の言語指定（自動検出は 'auto'）
+
   -- ストレージ
   storage_path VARCHAR(500),  -- Supabase Storageのパス
 
@@ -36,14 +41,19 @@ CREATE TABLE IF NOT EXISTS transcriptions (
 -- インデックス
 -- ============================================
 
--- ユーザーIDでの検索を高速化
-CREATE INDEX IF NOT EXISTS idx_transcriptions_user_id
-  ON transcriptions(user_id);
+-- ユーザーIDでの検索と (created_at, id) のキーセットページネーションを高速化
+CREATE INDEX IF NOT EXISTS idx_transcriptions_user_created_at
+  ON transcriptions(user_id, created_at DESC, id DESC);
 
 -- 作成日時での並び替えを高速化
 CREATE INDEX IF NOT EXISTS idx_transcriptions_created_at
   ON transcriptions(created_at DESC);
 
+-- キャッシュ検索（ハッシュ + 言語指定 + モデル）を高速化
+CREATE INDEX IF NOT EXISTS idx_transcriptions_cache_key
+  ON transcriptions(audio_sha256, requested_language, model)
+  WHERE audio_sha256 IS NOT NULL;
+
 -- ============================================
 -- Row Level Security (RLS)
 -- ============================================
@@ -92,6 +102,121 @@ CREATE TRIGGER update_transcriptions_updated_at
   FOR EACH ROW
   EXECUTE FUNCTION update_updated_at_column();
 
+-- ============================================
+-- ユーザー別件数カウンタ
+-- ============================================
+-- count="exact" による全件スキャンを避けるため、トリガーで件数を維持
+
+CREATE TABLE IF NOT EXISTS transcription_counts (
+  user_id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+  total BIGINT NOT NULL DEFAULT 0
+);
+
+ALTER TABLE transcription_counts ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own transcription count"
+  ON transcription_counts
+  FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- SECURITY DEFINER のため、呼び出し元の search_path で別スキーマのテーブルを
+-- 参照させられないよう search_path を固定する
+CREATE OR REPLACE FUNCTION update_transcription_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO transcription_counts (user_id, total)
+    VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE
+      SET total = transcription_counts.total + 1;
+    RETURN NEW;
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE transcription_counts
+      SET total = GREATEST(total - 1, 0)
+      WHERE user_id = OLD.user_id;
+    RETURN OLD;
+  END IF;
+  RETURN NULL;
+END;
+$$ language 'plpgsql' SECURITY DEFINER
+SET search_path = public;
+
+CREATE TRIGGER update_transcription_counts_on_change
+  AFTER INSERT OR DELETE ON transcriptions
+  FOR EACH ROW
+  EXECUTE FUNCTION update_transcription_counts();
+
+-- ============================================
+-- 全文検索（PGroonga）
+-- ============================================
+
+CREATE EXTENSION IF NOT EXISTS pgroonga;
+
+CREATE INDEX IF NOT EXISTS idx_transcriptions_text_pgroonga
+  ON transcriptions USING pgroonga (text);
+
+-- スコア順に文字起こしを返し、各文字起こし内で一致したセグメント
+-- [{index, start, end, text}, ...] を先頭から p_hits_per_transcription 件まで付与する
+-- SECURITY INVOKER のため、呼び出し元のRLSがそのまま適用される
+
+CREATE OR REPLACE FUNCTION search_transcriptions(
+  p_user_id UUID,
+  p_query TEXT,
+  p_limit INT DEFAULT 20,
+  p_offset INT DEFAULT 0,
+  p_hits_per_transcription INT DEFAULT 5
+)
+RETURNS TABLE (
+  transcription_id UUID,
+  title VARCHAR,
+  created_at TIMESTAMPTZ,
+  duration_seconds FLOAT,
+  score FLOAT,
+  hits JSONB
+)
+LANGUAGE sql STABLE
+AS $$
+  WITH matched AS (
+    SELECT
+      t.id,
+      t.title,
+      t.created_at,
+      t.duration_seconds,
+      t.segments,
+      pgroonga_score(t.tableoid, t.ctid) AS score
+    FROM transcriptions t
+    WHERE t.user_id = p_user_id
+      AND t.text &@~ p_query
+    ORDER BY score DESC, t.created_at DESC
+    LIMIT p_limit OFFSET p_offset
+  )
+  SELECT
+    m.id,
+    m.title,
+    m.created_at,
+    m.duration_seconds,
+    m.score,
+    COALESCE((
+      SELECT jsonb_agg(
+        jsonb_build_object(
+          'index', h.ord - 1,
+          'start', (h.seg->>'start')::FLOAT,
+          'end', (h.seg->>'end')::FLOAT,
+          'text', h.seg->>'text'
+        ) ORDER BY h.ord
+      )
+      FROM (
+        SELECT e.seg, e.ord
+        FROM jsonb_array_elements(m.segments) WITH ORDINALITY AS e(seg, ord)
+        WHERE (e.seg->>'text') &@~ p_query
+        ORDER BY e.ord
+        LIMIT p_hits_per_transcription
+      ) h
+    ), '[]'::JSONB)
+  FROM matched m
+  ORDER BY m.score DESC, m.created_at DESC;
+$$;
+
 -- ============================================
 -- Storage バケット設定
 -- ============================================
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常駐Whisperデーモン（app.py 用）
+
+モデルをメモリに保持したままUnixソケットで文字起こしリクエストを受け付け、
+結果をJSON Linesで返す。リクエストごとにwhisper CLIを起動していた頃の
+Python起動・torchのimport・モデルロードのコストがなくなる。
+
+openai-whisperの transcribe() にはセグメント単位のコールバックがないため、
+セグメントは文字起こしが最後まで終わってからまとめて送る（途中経過は返さない）。
+
+プロトコル（1接続1リクエスト、改行区切りJSON）:
+    → {"op": "transcribe", "audio_path": "...", "model": "medium", "language": "ja"}
+    ← {"type": "info", "language": "ja"}                              （文字起こし完了後）
+    ← {"type": "segment", "start": 0.0, "end": 2.5, "text": "..."}  （0件以上、続けて送る）
+    ← {"type": "done", "text": "...", "language": "ja", "processing_time": 12.3}
+    ← {"type": "error", "message": "..."}  （失敗時）
+
+    → {"op": "stats"}  ← {"type": "stats", ...}
+    → {"op": "ping"}   ← {"type": "pong"}
+
+起動:
+    python whisper_daemon.py
+"""
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from model_registry import ModelRegistry, models_from_env
+from inference_workers import InferenceWorkerPool, workers_from_env
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), 'whisper-daemon.sock')
+
+
+def socket_path_from_env():
+    return os.environ.get('WHISPER_DAEMON_SOCKET', DEFAULT_SOCKET_PATH)
+
+
+def create_model(model_name, cpu_threads=0):
+    """openai-whisperのモデルをロード"""
+    import torch
+    import whisper
+
+    if cpu_threads:
+        torch.set_num_threads(cpu_threads)
+    print(f"[INFO] モデル '{model_name}' をロード中...", flush=True)
+    return whisper.load_model(model_name, device='cpu')
+
+
+def run_transcription(model, audio_path, options):
+    """
+    文字起こしを実行（デーモン内と推論ワーカーで共通）
+
+    model.transcribe() が最後まで終わってから結果を返す（セグメントを逐次には返さない）
+
+    Returns:
+        (info, segments): 言語・全文の辞書、セグメント辞書のリスト
+    """
+    result = model.transcribe(audio_path, language=options.get('language'), fp16=False, verbose=False)
+    segments = [
+        {'start': seg['start'], 'end': seg['end'], 'text': seg['text']}
+        for seg in result.get('segments', [])
+    ]
+    return {'language': result.get('language'), 'text': result.get('text', '')}, segments
+
+
+class WhisperDaemon:
+    """モデルを常駐させて文字起こしを実行するバックエンド"""
+
+    def __init__(self, memory_budget_mb=8192, num_workers=0, concurrency=1, warmup_models=()):
+        self.warmup_models = list(warmup_models)
+        self.registry = ModelRegistry(
+            loader=lambda model_name: create_model(model_name),
+            memory_budget_mb=memory_budget_mb
+        )
+        # WHISPER_WORKERS > 0 なら推論はワーカープロセスで行う（モデルはfork前にロードして共有）
+        self.worker_pool = InferenceWorkerPool(
+            loader=create_model,
+            transcribe_fn=run_transcription,
+            num_workers=num_workers,
+            preload_models=self.warmup_models,
+            preload_before_fork=True,
+            memory_budget_mb=memory_budget_mb
+        ) if num_workers else None
+        # ワーカーなしの場合、同時実行数を制限してCPUの奪い合いを防ぐ
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._requests = 0
+        self._failures = 0
+        self._active = 0
+
+    def start(self):
+        if self.worker_pool is not None:
+            self.worker_pool.start()
+        else:
+            self.registry.warmup_async(self.warmup_models)
+
+    def stop(self):
+        if self.worker_pool is not None:
+            self.worker_pool.stop()
+
+    def transcribe(self, audio_path, model_name, language):
+        """(info, セグメントのイテレータ) を返す"""
+        options = {'language': language}
+        if self.worker_pool is not None:
+            return self.worker_pool.transcribe(model_name, audio_path, options)
+
+        with self._slots:
+            model = self.registry.get(model_name)
+            return run_transcription(model, audio_path, options)
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'uptime_seconds': round(time.time() - self._started_at, 1),
+                'requests': self._requests,
+                'failures': self._failures,
+                'active': self._active,
+            }
+        if self.worker_pool is not None:
+            stats['workers'] = self.worker_pool.stats()
+        else:
+            stats['models'] = self.registry.stats()
+        return stats
+
+    def _track(self, delta, failed=False):
+        with self._lock:
+            self._active += delta
+            if delta > 0:
+                self._requests += 1
+            if failed:
+                self._failures += 1
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.whisper_daemon
+        try:
+            request = json.loads(self.rfile.readline() or b'{}')
+        except ValueError:
+            self._send({'type': 'error', 'message': '不正なリクエストです'})
+            return
+
+        op = request.get('op')
+        if op == 'ping':
+            self._send({'type': 'pong'})
+        elif op == 'stats':
+            self._send({'type': 'stats', **daemon.stats()})
+        elif op == 'transcribe':
+            self._transcribe(daemon, request)
+        else:
+            self._send({'type': 'error', 'message': f'不明な操作です: {op}'})
+
+    def _transcribe(self, daemon, request):
+        audio_path = request.get('audio_path')
+        if not audio_path or not os.path.exists(audio_path):
+            self._send({'type': 'error', 'message': f'音声ファイルが見つかりません: {audio_path}'})
+            return
+
+        daemon._track(1)
+        failed = False
+        start = time.time()
+        try:
+            info, segments = daemon.transcribe(audio_path, request.get('model', 'medium'), request.get('language'))
+            self._send({'type': 'info', 'language': info.get('language')})
+            for segment in segments:
+                self._send({'type': 'segment', **segment})
+            self._send({
+                'type': 'done',
+                'text': info.get('text', ''),
+                'language': info.get('language'),
+                'processing_time': round(time.time() - start, 2),
+            })
+        except (BrokenPipeError, ConnectionResetError):
+            # クライアントが切断した
+            failed = True
+        except Exception as e:
+            failed = True
+            print(f"[ERROR] 文字起こし失敗 ({audio_path}): {e}", flush=True)
+            self._send({'type': 'error', 'message': str(e)})
+        finally:
+            daemon._track(-1, failed=failed)
+
+    def _send(self, message):
+        self.wfile.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, daemon):
+        self.whisper_daemon = daemon
+        super().__init__(socket_path, _RequestHandler)
+
+
+def serve(socket_path=None):
+    """デーモンを起動（Ctrl+Cで終了）"""
+    socket_path = socket_path or socket_path_from_env()
+    if os.path.exists(socket_path):
+        if WhisperDaemonClient(socket_path).ping():
+            print(f"[INFO] デーモンは既に起動しています: {socket_path}", flush=True)
+            return
+        # 前回のプロセスが残した古いソケットを削除
+        os.unlink(socket_path)
+
+    daemon = WhisperDaemon(
+        memory_budget_mb=int(os.environ.get('WHISPER_MODEL_MEMORY_BUDGET_MB', '8192')),
+        num_workers=workers_from_env(),
+        concurrency=int(os.environ.get('WHISPER_DAEMON_CONCURRENCY', '1')),
+        warmup_models=models_from_env('WHISPER_WARMUP_MODELS', 'medium')
+    )
+    # ワーカーのforkはソケットを開く前に行う（子プロセスにリスニングソケットを持たせない）
+    daemon.start()
+
+    server = _Server(socket_path, daemon)
+    os.chmod(socket_path, 0o600)
+    print(f"[INFO] Whisperデーモン起動: {socket_path}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.stop()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+class DaemonError(RuntimeError):
+    """デーモンへの接続または文字起こしに失敗した"""
+
+
+class WhisperDaemonClient:
+    """Whisperデーモンのクライアント"""
+
+    def __init__(self, socket_path=None, timeout=3600):
+        self.socket_path = socket_path or socket_path_from_env()
+        self.timeout = timeout
+
+    def ping(self):
+        try:
+            return self._request({'op': 'ping'}, timeout=2)[0].get('type') == 'pong'
+        except (OSError, DaemonError):
+            return False
+
+    def stats(self):
+        return self._request({'op': 'stats'}, timeout=5)[0]
+
+    def transcribe(self, audio_path, model='medium', language=None):
+        """
+        デーモンで文字起こし（完了するまでブロックし、結果をまとめて返す）
+
+        Returns:
+            (done, segments): doneは全文・言語・処理時間の辞書、segmentsはセグメント辞書のリスト
+
+        Raises:
+            DaemonError: デーモンに接続できない、または文字起こしに失敗した
+        """
+        request = {
+            'op': 'transcribe',
+            'audio_path': os.path.abspath(audio_path),
+            'model': model,
+            'language': language,
+        }
+        segments = []
+        for message in self._stream(request, timeout=self.timeout):
+            kind = message.get('type')
+            if kind == 'segment':
+                segments.append(message)
+            elif kind == 'done':
+                return message, segments
+            elif kind == 'error':
+                raise DaemonError(message.get('message'))
+        raise DaemonError('デーモンとの接続が途中で切断されました')
+
+    def ensure_running(self, wait_seconds=30):
+        """デーモンが起動していなければバックグラウンドで起動"""
+        if self.ping():
+            return True
+
+        print(f"[INFO] Whisperデーモンを起動します: {self.socket_path}", flush=True)
+        env = os.environ.copy()
+        env['WHISPER_DAEMON_SOCKET'] = self.socket_path
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            env=env,
+            start_new_session=True
+        )
+
+        deadline = time.time() + wait_seconds
+        while time.time() < deadline:
+            if self.ping():
+                return True
+            time.sleep(0.2)
+        return False
+
+    def _request(self, request, timeout):
+        return list(self._stream(request, timeout))
+
+    def _stream(self, request, timeout):
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(self.socket_path)
+        except OSError as e:
+            raise DaemonError(f'Whisperデーモンに接続できません ({self.socket_path}): {e}')
+
+        with sock, sock.makefile('rb') as reader:
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            for line in reader:
+                yield json.loads(line)
+
+
+if __name__ == '__main__':
+    serve()